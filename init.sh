@@ -85,6 +85,30 @@ alias cor="python $ATHENAUI_DIR/src/tui/cor.py"
 # spc命令：绘制能谱，调用spc.py
 alias spc="python $ATHENAUI_DIR/src/tui/spc.py"
 
+# sfn命令：计算结构函数与增量统计，调用sfn.py
+alias sfn="python $ATHENAUI_DIR/src/tui/sfn.py"
+
+# prf命令：统计并比较模拟吞吐量，调用perf.py (不用perf, 避免覆盖Linux的perf性能分析工具)
+alias prf="python $ATHENAUI_DIR/src/run/perf.py"
+
+# dcp命令：规划meshblock分解方案，调用decomp.py
+alias dcp="python $ATHENAUI_DIR/src/run/decomp.py"
+
+# swp命令：批量生成并提交参数扫描case，调用sweep.py
+alias swp="python $ATHENAUI_DIR/src/run/sweep.py"
+
+# pak命令：将不足一个节点的小作业装箱提交，调用pack.py
+alias pak="python $ATHENAUI_DIR/src/run/pack.py"
+
+# jst命令：查询作业状态与排队位置，调用jobs.py
+alias jst="python $ATHENAUI_DIR/src/run/jobs.py"
+
+# ret命令：按保留策略清理、稀疏化与压缩输出文件，调用retention.py
+alias ret="python $ATHENAUI_DIR/src/post/retention.py"
+
+# rpk命令：将athdf输出重排为压缩分块的全局数组布局，调用repack.py
+alias rpk="python $ATHENAUI_DIR/src/post/repack.py"
+
 # 用户名命令：切换到对应用户目录
 if [ -n "$USERNAME" ]; then
     alias $USERNAME="cd $ATHENAUI_PATH"
@@ -98,7 +122,11 @@ Available commands:
   run: 启动新的模拟case(仅支持剪切盒)     mon: 监控当前模拟case运行进度
   rst: 继续运行已有模拟case               hst: 绘制物理量随时间变化的曲线图
   slc: 绘制流场的切片图                   spc: 绘制能谱图
-  cor: 计算两点空间关联函数
+  cor: 计算两点空间关联函数               prf: 统计并比较模拟吞吐量
+  dcp: 规划meshblock分解方案              swp: 批量提交参数扫描case
+  pak: 合并提交不足一个节点的小作业       jst: 查询作业状态与排队位置
+  ret: 按保留策略清理输出文件             rpk: 重排并压缩athdf输出文件
+  sfn: 计算结构函数与增量统计
 EOF
 
 # cor：计算两点空间关联函数
\ No newline at end of file
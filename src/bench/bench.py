@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后处理流程基准测试工具
+
+主要功能:
+1. 用fixtures.py生成指定网格与时间切片数的测试case, 或直接使用已有的case目录
+2. 分阶段计时: 元数据扫描、物理量读取、类型转换与转置、能谱、关联函数、绘图、hst.py、切片作业
+3. 每个阶段在独立的子进程中运行, 分别记录峰值RSS, 互不影响
+4. 结果写入JSON文件, 可与保存的基线结果比较, 超出容差的阶段视为性能退化
+
+用法:
+    python bench.py --grid 64 --snapshots 10 --output result.json
+    python bench.py --grid 64 --snapshots 10 --baseline result.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+import fixtures
+
+# 后处理脚本所在目录
+POST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../post'))
+
+# 读取的物理量, 与output2turbulence一致
+QUANTITIES = ['rho', 'vel1', 'vel2', 'vel3', 'Bcc1', 'Bcc2', 'Bcc3']
+
+
+def peakRSS() -> float:
+    """当前进程的峰值RSS(MB), Linux上ru_maxrss的单位为KB, macOS上为字节"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024**2 if sys.platform == 'darwin' else rss / 1024
+
+
+def listFiles(outn: str) -> List[str]:
+    """当前case中某种输出的所有athdf文件"""
+    return sorted(glob.glob(os.path.join(os.getcwd(), 'outputs', f'*.{outn}.*.athdf')))
+
+
+# -------各阶段的实现: 在case目录中运行, 返回计时的秒数-----------------------------
+
+def stageScan(outn: str, fft: str) -> float:
+    """元数据扫描: 列出文件并读取每个文件的时间"""
+    import preprocess
+    start = time.perf_counter()
+    for file in listFiles(outn):
+        preprocess.snapshotTime(file)
+    return time.perf_counter() - start
+
+
+def stageLoad(outn: str, fft: str) -> float:
+    """物理量读取: 逐个读取时间切片的全部物理量"""
+    import preprocess
+    start = time.perf_counter()
+    for file in listFiles(outn):
+        preprocess.readAthdf(file, QUANTITIES)
+    return time.perf_counter() - start
+
+
+def stageCast(outn: str, fft: str) -> float:
+    """类型转换与转置: 与output2turbulence相同的astype(float64)与 (z, y, x) -> (x, y, z) 转置, 读取不计时"""
+    import preprocess
+    elapsed = 0.0
+    for file in listFiles(outn):
+        data = preprocess.readAthdf(file, QUANTITIES)
+        start = time.perf_counter()
+        for q in QUANTITIES:
+            np.ascontiguousarray(np.transpose(data[q].astype(np.float64), (2, 1, 0)))
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def stageTurbulence(outn: str, fft: str) -> float:
+    """完整的output2turbulence: 读取并构建PyMRI的Turbulence对象"""
+    import preprocess
+    start = time.perf_counter()
+    preprocess.output2turbulence(outn, None, None)
+    return time.perf_counter() - start
+
+
+def stageSpectra(outn: str, fft: str) -> float:
+    """能谱: spectrum.computeSpectra"""
+    import fftbackend
+    import spectrum
+    backend = fftbackend.getBackend(fft)
+    start = time.perf_counter()
+    spectrum.computeSpectra(outn, fft=backend)
+    return time.perf_counter() - start
+
+
+def stageCorrelation(outn: str, fft: str) -> float:
+    """关联函数: autocorr.computeCorrelation"""
+    import autocorr
+    import fftbackend
+    backend = fftbackend.getBackend(fft)
+    start = time.perf_counter()
+    autocorr.computeCorrelation(outn, fft=backend)
+    return time.perf_counter() - start
+
+
+def stagePlot(outn: str, fft: str) -> float:
+    """绘图: 能谱与关联函数的绘图与保存, 计算部分不计时"""
+    import autocorr
+    import fftbackend
+    import spectrum
+    backend = fftbackend.getBackend(fft)
+    spectra = spectrum.computeSpectra(outn, fft=backend)
+    correlation = autocorr.computeCorrelation(outn, fft=backend)
+    case = os.path.basename(os.getcwd())
+    start = time.perf_counter()
+    spectrum.plotSpectra(spectra, case)
+    autocorr.plotCorrelation(correlation, case)
+    return time.perf_counter() - start
+
+
+def stageHst(outn: str, fft: str) -> float:
+    """hst.py: 读取.hst文件并绘制所有物理量"""
+    import hst
+    start = time.perf_counter()
+    # 子进程的sys.argv是本脚本的参数, 传入空参数列表而不是由hst.py解析
+    hst.main([])
+    return time.perf_counter() - start
+
+
+def stageSlice(outn: str, fft: str) -> float:
+    """切片作业: 与slice.sh生成的作业相同, 对每个文件读取时间并调用Athena++的plot_slice.py"""
+    pythonPath = os.path.join(os.environ.get('ATHENA_PATH', ''), 'vis/python')
+    plotSlice = os.path.join(pythonPath, 'plot_slice.py')
+    if not os.path.isfile(plotSlice):
+        raise RuntimeError(f"未找到 {plotSlice}, 请设置ATHENA_PATH")
+
+    outputDir = os.path.join('slicePlots', 'rho(z=0)')
+    os.makedirs(outputDir, exist_ok=True)
+    readTime = f"import sys; sys.path.insert(0, '{pythonPath}'); import athena_read; " \
+               f"print('{{:.2f}}'.format(athena_read.athdf(sys.argv[1])['Time']))"
+    start = time.perf_counter()
+    for file in listFiles(outn):
+        t = subprocess.run([sys.executable, '-c', readTime, file], check=True,
+                           capture_output=True, text=True).stdout.strip()
+        subprocess.run([sys.executable, plotSlice, file, 'rho', os.path.join(outputDir, f't={t}.pdf'),
+                        '--direction', '3', '--colormap', 'viridis'], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+# 阶段名称 -> 实现, 按默认的运行顺序排列
+STAGES: Dict[str, Callable[[str, str], float]] = {
+    'scan': stageScan,
+    'load': stageLoad,
+    'cast': stageCast,
+    'turbulence': stageTurbulence,
+    'spectra': stageSpectra,
+    'correlation': stageCorrelation,
+    'plot': stagePlot,
+    'hst': stageHst,
+    'slice': stageSlice,
+}
+
+
+def runStage(name: str, outn: str, fft: str) -> Dict:
+    """在当前进程中运行一个阶段(由子进程调用), 阶段自身的输出被丢弃"""
+    sys.path.insert(0, POST_DIR)
+    import matplotlib
+    matplotlib.use('Agg')
+
+    rssBefore = peakRSS()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = STAGES[name](outn, fft)
+    except SystemExit as e:
+        return {'error': f"阶段调用了sys.exit({e.code})"}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    return {'time': elapsed, 'peak_rss_mb': peakRSS(), 'base_rss_mb': rssBefore}
+
+
+def measureStage(name: str, caseDir: str, outn: str, fft: str, repeat: int) -> Dict:
+    """在独立的子进程中重复运行一个阶段, 汇总计时与峰值RSS"""
+    times = []
+    peaks = []
+    base = []
+    for _ in range(repeat):
+        command = [sys.executable, os.path.abspath(__file__), '--run-stage', name, '--outn', outn, '--fft', fft]
+        proc = subprocess.run(command, cwd=caseDir, capture_output=True, text=True)
+        lines = proc.stdout.strip().splitlines()
+        try:
+            result = json.loads(lines[-1])
+        except (IndexError, ValueError):
+            message = proc.stderr.strip().splitlines()
+            return {'error': message[-1] if message else f"子进程退出码 {proc.returncode}"}
+        if 'error' in result:
+            return result
+        times.append(result['time'])
+        peaks.append(result['peak_rss_mb'])
+        base.append(result['base_rss_mb'])
+    return {
+        'time': min(times),
+        'time_median': float(np.median(times)),
+        'times': times,
+        'peak_rss_mb': max(peaks),
+        'base_rss_mb': min(base),
+    }
+
+
+def compareBaseline(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    """与基线结果比较并打印对比表, 返回是否存在性能退化"""
+    if results['meta'].get('fixture') != baseline['meta'].get('fixture'):
+        print(f"警告: 测试数据与基线不同: {results['meta'].get('fixture')} vs {baseline['meta'].get('fixture')}",
+              flush=True)
+
+    regressed = False
+    print(f"\n{'stage':<12}{'baseline(s)':>12}{'current(s)':>12}{'ratio':>8}{'RSS ratio':>11}  ")
+    for name, current in results['stages'].items():
+        reference = baseline['stages'].get(name)
+        if reference is None or 'time' not in reference or 'time' not in current:
+            continue
+        ratio = current['time'] / reference['time'] if reference['time'] > 0 else float('inf')
+        rssRatio = current['peak_rss_mb'] / reference['peak_rss_mb'] if reference['peak_rss_mb'] > 0 else 1.0
+        status = ''
+        if ratio > 1 + tolerance or rssRatio > 1 + tolerance:
+            status = '退化'
+            regressed = True
+        elif ratio < 1 - tolerance:
+            status = '加快'
+        print(f"{name:<12}{reference['time']:>12.3f}{current['time']:>12.3f}{ratio:>8.2f}{rssRatio:>11.2f}  {status}")
+    return regressed
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='后处理流程基准测试工具')
+    parser.add_argument('--case', type=str, help='使用已有的case目录, 默认生成测试数据')
+    parser.add_argument('--grid', type=str, default='64', help='测试数据的网格尺寸, 例如64或128x256x64')
+    parser.add_argument('--snapshots', type=int, default=10, help='测试数据的时间切片个数')
+    parser.add_argument('--meshblock', type=str, help='测试数据的meshblock尺寸, 默认每个方向不超过32')
+    parser.add_argument('--workdir', type=str, help='生成测试数据的目录, 默认为临时目录')
+    parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+    parser.add_argument('--outn', type=str, default='out2', help='输出文件格式')
+    parser.add_argument('--stages', type=str, default=','.join(STAGES), help='运行的阶段, 逗号分隔')
+    parser.add_argument('--fft', type=str, default='numpy', help='能谱与关联函数使用的FFT后端')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段的重复次数, 计时取最小值')
+    parser.add_argument('--output', type=str, help='结果JSON文件')
+    parser.add_argument('--baseline', type=str, help='用于比较的基线结果JSON文件')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='判定退化的相对容差')
+    parser.add_argument('--run-stage', type=str, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    # 子进程: 只运行一个阶段, 结果以JSON输出到最后一行
+    if args.run_stage:
+        print(json.dumps(runStage(args.run_stage, args.outn, args.fft)), flush=True)
+        return
+
+    stages = args.stages.split(',')
+    for name in stages:
+        if name not in STAGES:
+            print(f"错误: 未知的阶段 {name}, 可选: {', '.join(STAGES)}", flush=True)
+            sys.exit(1)
+
+    # 测试结束后删除的目录, 只删除由本脚本创建的目录或原本为空的--workdir中的内容
+    generated = None
+    generatedOwned = False
+    if args.case:
+        caseDir = os.path.abspath(args.case)
+        fixture = {'case': caseDir}
+    else:
+        try:
+            grid = fixtures.parseGrid(args.grid)
+            meshblock = fixtures.parseGrid(args.meshblock) if args.meshblock else None
+        except ValueError as e:
+            print(f"错误: {e}", flush=True)
+            sys.exit(1)
+        if args.workdir:
+            caseDir = os.path.abspath(args.workdir)
+            if os.path.isdir(caseDir) and os.listdir(caseDir):
+                print(f"错误: --workdir {caseDir} 不是空目录, 请指定新目录或空目录", flush=True)
+                sys.exit(1)
+            generatedOwned = not os.path.exists(caseDir)
+        else:
+            caseDir = tempfile.mkdtemp(prefix='athenaui-bench-')
+            generatedOwned = True
+        generated = caseDir
+        print(f"正在生成测试数据: {caseDir}", flush=True)
+        start = time.perf_counter()
+        try:
+            fixtures.createCase(caseDir, grid, args.snapshots, meshblock, outn=args.outn)
+        except ValueError as e:
+            print(f"错误: {e}", flush=True)
+            sys.exit(1)
+        print(f"   用时 {time.perf_counter() - start:.1f} s", flush=True)
+        fixture = {'grid': list(grid), 'snapshots': args.snapshots,
+                   'meshblock': list(meshblock) if meshblock else None}
+
+    results = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'fft': args.fft,
+            'repeat': args.repeat,
+            'fixture': fixture,
+        },
+        'stages': {},
+    }
+
+    try:
+        print(f"\n{'stage':<12}{'time(s)':>10}{'median(s)':>11}{'peak RSS(MB)':>14}", flush=True)
+        for name in stages:
+            result = measureStage(name, caseDir, args.outn, args.fft, args.repeat)
+            results['stages'][name] = result
+            if 'error' in result:
+                print(f"{name:<12}  跳过: {result['error']}", flush=True)
+            else:
+                print(f"{name:<12}{result['time']:>10.3f}{result['time_median']:>11.3f}"
+                      f"{result['peak_rss_mb']:>14.1f}", flush=True)
+    finally:
+        if generated and not args.keep:
+            if generatedOwned:
+                shutil.rmtree(generated, ignore_errors=True)
+            else:
+                # 原本为空的目录只删除其中生成的内容, 保留目录本身
+                for name in os.listdir(generated):
+                    path = os.path.join(generated, name)
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n结果已保存: {args.output}", flush=True)
+
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"错误: 无法读取基线结果 {args.baseline}: {e}", flush=True)
+            sys.exit(1)
+        if compareBaseline(results, baseline, args.tolerance):
+            print(f"\n存在超过 {args.tolerance:.0%} 的性能退化", flush=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
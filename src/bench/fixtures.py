@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试数据生成模块, 生成与Athena++输出格式相同的athdf、hst与athinput文件
+
+主要功能:
+1. 按指定的网格与meshblock尺寸写出athdf文件, 数据集与属性与Athena++的HDF5输出一致,
+   athena_read与preprocess.readAthdf都可以直接读取
+2. 生成包含常用列的.hst历史数据文件
+3. 生成athinput.hgb, 使getOmega、getShear等函数可以在测试case中正常工作
+
+每次只在内存中生成一个时间切片, 生成大网格、多时间切片的数据时内存占用不随时间切片数增长
+"""
+
+import argparse
+import os
+import sys
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# 测试case的问题名, 与Athena++ hgb问题生成器一致
+PROBLEM_ID = 'HGB'
+
+# 测试case的物理参数
+OMEGA = 1.0
+QSHEAR = 1.5
+CS = 1.0
+NU = 1e-4
+ETA = 1e-4
+
+# prim与B两个数据集中的变量
+PRIM_VARIABLES = ['rho', 'vel1', 'vel2', 'vel3']
+B_VARIABLES = ['Bcc1', 'Bcc2', 'Bcc3']
+
+# hst文件的列
+HST_COLUMNS = ['time', 'dt', 'mass', '1-mom', '2-mom', '3-mom', '1-KE', '2-KE', '3-KE',
+               '1-ME', '2-ME', '3-ME', '-BxBy']
+
+
+def parseGrid(text: str) -> Tuple[int, int, int]:
+    """解析网格尺寸: "64" 表示64^3, "128x256x64" 表示 (nx, ny, nz)"""
+    sizes = [int(n) for n in text.lower().split('x')]
+    if len(sizes) == 1:
+        sizes *= 3
+    if len(sizes) != 3 or min(sizes) < 1:
+        raise ValueError(f"无法解析网格尺寸: {text}")
+    return sizes[0], sizes[1], sizes[2]
+
+
+def writeAthinput(caseDir: str, grid: Tuple[int, int, int], meshblock: Tuple[int, int, int],
+                  box: Tuple[float, float, float], tlim: float, dt: float) -> str:
+    """写出测试case的athinput.hgb"""
+    path = os.path.join(caseDir, 'athinput.hgb')
+    Lx, Ly, Lz = box
+    with open(path, 'w') as f:
+        f.write(f"""<comment>
+problem   = benchmark fixture
+configure = --prob=hgb -b --eos=isothermal -hdf5
+
+<job>
+problem_id = {PROBLEM_ID}
+
+<output1>
+file_type  = hst
+dt         = {dt / 10}
+
+<output2>
+file_type  = hdf5
+variable   = prim
+dt         = {dt}
+
+<time>
+cfl_number = 0.3
+nlim       = -1
+tlim       = {tlim}
+
+<mesh>
+nx1    = {grid[0]}
+x1min  = {-Lx / 2}
+x1max  = {Lx / 2}
+ix1_bc = shear_periodic
+ox1_bc = shear_periodic
+
+nx2    = {grid[1]}
+x2min  = {-Ly / 2}
+x2max  = {Ly / 2}
+ix2_bc = periodic
+ox2_bc = periodic
+
+nx3    = {grid[2]}
+x3min  = {-Lz / 2}
+x3max  = {Lz / 2}
+ix3_bc = periodic
+ox3_bc = periodic
+
+<meshblock>
+nx1 = {meshblock[0]}
+nx2 = {meshblock[1]}
+nx3 = {meshblock[2]}
+
+<hydro>
+iso_sound_speed = {CS}
+
+<orbital_advection>
+OAorder = 0
+qshear  = {QSHEAR}
+Omega0  = {OMEGA}
+
+<problem>
+nu_iso  = {NU}
+eta_ohm = {ETA}
+""")
+    return path
+
+
+def randomFields(rng: np.random.Generator, shape: Tuple[int, int, int]) -> Dict[str, np.ndarray]:
+    """生成一个时间切片的物理量, (nz, ny, nx) 顺序"""
+    fields = {'rho': 1.0 + 0.1 * rng.standard_normal(shape, dtype=np.float32)}
+    for name in ['vel1', 'vel2', 'vel3', 'Bcc1', 'Bcc2', 'Bcc3']:
+        fields[name] = 0.1 * rng.standard_normal(shape, dtype=np.float32)
+    return fields
+
+
+def writeAthdf(path: str, time: float, cycle: int, fields: Dict[str, np.ndarray],
+               box: Tuple[float, float, float], meshblock: Tuple[int, int, int]) -> None:
+    """按Athena++的HDF5输出格式写出一个athdf文件
+
+    参数:
+        path (str): 文件路径
+        time (float): 模拟时间
+        cycle (int): 时间步数
+        fields (Dict[str, np.ndarray]): 物理量, (nz, ny, nx) 顺序
+        box (Tuple[float, float, float]): 模拟box尺寸 (Lx, Ly, Lz)
+        meshblock (Tuple[int, int, int]): meshblock尺寸 (nx, ny, nz)
+    """
+    import h5py
+
+    nz, ny, nx = fields['rho'].shape
+    mx, my, mz = meshblock
+    bx, by, bz = nx // mx, ny // my, nz // mz
+    nblocks = bx * by * bz
+    # Athena++按z、y、x的顺序对meshblock编号, x变化最快
+    locations = np.array([(i, j, k) for k in range(bz) for j in range(by) for i in range(bx)], dtype=np.int64)
+
+    with h5py.File(path, 'w') as f:
+        f.attrs['Time'] = np.float64(time)
+        f.attrs['NumCycles'] = np.int32(cycle)
+        f.attrs['Coordinates'] = np.bytes_('cartesian')
+        f.attrs['MaxLevel'] = np.int32(0)
+        f.attrs['NumMeshBlocks'] = np.int32(nblocks)
+        f.attrs['MeshBlockSize'] = np.array(meshblock, dtype=np.int32)
+        f.attrs['RootGridSize'] = np.array([nx, ny, nz], dtype=np.int32)
+        for axis, (L, n) in enumerate(zip(box, (nx, ny, nz))):
+            f.attrs[f'RootGridX{axis + 1}'] = np.array([-L / 2, L / 2, 1.0], dtype=np.float32)
+        f.attrs['NumVariables'] = np.array([len(PRIM_VARIABLES), len(B_VARIABLES)], dtype=np.int32)
+        f.attrs['DatasetNames'] = np.array([b'prim', b'B'])
+        f.attrs['VariableNames'] = np.array([v.encode() for v in PRIM_VARIABLES + B_VARIABLES])
+
+        f.create_dataset('Levels', data=np.zeros(nblocks, dtype=np.int32))
+        f.create_dataset('LogicalLocations', data=locations)
+
+        # 各meshblock的面心与体心坐标
+        for axis, (L, n, m) in enumerate(zip(box, (nx, ny, nz), meshblock)):
+            faces = np.linspace(-L / 2, L / 2, n + 1, dtype=np.float32)
+            xf = np.empty((nblocks, m + 1), dtype=np.float32)
+            for b in range(nblocks):
+                start = int(locations[b][axis]) * m
+                xf[b] = faces[start:start + m + 1]
+            f.create_dataset(f'x{axis + 1}f', data=xf)
+            f.create_dataset(f'x{axis + 1}v', data=0.5 * (xf[:, 1:] + xf[:, :-1]))
+
+        for name, variables in (('prim', PRIM_VARIABLES), ('B', B_VARIABLES)):
+            out = f.create_dataset(name, shape=(len(variables), nblocks, mz, my, mx), dtype=np.float32)
+            for v, variable in enumerate(variables):
+                # (nz, ny, nx) -> (bz, mz, by, my, bx, mx) -> (meshblock, mz, my, mx)
+                blocks = fields[variable].reshape(bz, mz, by, my, bx, mx).transpose(0, 2, 4, 1, 3, 5)
+                out[v] = blocks.reshape(nblocks, mz, my, mx)
+
+
+def writeHst(path: str, tlim: float, rows: int, seed: int = 0) -> None:
+    """写出Athena++格式的.hst历史数据文件"""
+    rng = np.random.default_rng(seed)
+    time = np.linspace(0, tlim, rows)
+    data = np.empty((rows, len(HST_COLUMNS)))
+    data[:, 0] = time
+    data[:, 1] = tlim / max(rows - 1, 1)
+    data[:, 2] = 1.0
+    data[:, 3:6] = 1e-3 * rng.standard_normal((rows, 3))
+    # 能量列取增长后饱和的曲线加上扰动, 保证hst.py的对数坐标有意义
+    growth = 1e-2 * (1 - np.exp(-time / max(tlim / 5, 1e-12))) + 1e-6
+    data[:, 6:12] = growth[:, None] * (1 + 0.1 * np.abs(rng.standard_normal((rows, 6))))
+    data[:, 12] = 0.5 * growth * (1 + 0.1 * np.abs(rng.standard_normal(rows)))
+
+    header = ' '.join(f'[{i + 1}]={name}' for i, name in enumerate(HST_COLUMNS))
+    with open(path, 'w') as f:
+        f.write('# Athena++ history data\n')
+        f.write(f'# {header}\n')
+        np.savetxt(f, data, fmt='%.9e')
+
+
+def createCase(caseDir: str, grid: Tuple[int, int, int] = (64, 64, 64), snapshots: int = 10,
+               meshblock: Optional[Tuple[int, int, int]] = None, box: Tuple[float, float, float] = (1.0, 4.0, 1.0),
+               dt: float = 1.0, seed: int = 0, outn: str = 'out2',
+               generator: Optional[Callable[[int], Dict[str, np.ndarray]]] = None) -> str:
+    """生成一个测试case: athinput.hgb、outputs下的athdf与hst文件
+
+    参数:
+        caseDir (str): case目录, 不存在时创建
+        grid (Tuple[int, int, int]): 网格尺寸 (nx, ny, nz)
+        snapshots (int): athdf时间切片个数
+        meshblock (Optional[Tuple[int, int, int]]): meshblock尺寸, 默认每个方向取min(网格, 32)
+        box (Tuple[float, float, float]): 模拟box尺寸 (Lx, Ly, Lz)
+        dt (float): athdf输出的时间间隔
+        seed (int): 随机数种子
+        outn (str): athdf输出的编号
+        generator (Optional[Callable[[int], Dict[str, np.ndarray]]]): 由时间切片编号生成物理量的函数,
+            物理量为 (nz, ny, nx) 顺序, 默认为高斯白噪声(见synth.py的幂律谱数据)
+
+    返回:
+        str: case目录
+    """
+    if meshblock is None:
+        meshblock = tuple(min(n, 32) for n in grid)
+    if any(n % m for n, m in zip(grid, meshblock)):
+        raise ValueError(f"meshblock {meshblock} 不能整除网格 {grid}")
+
+    outputsDir = os.path.join(caseDir, 'outputs')
+    os.makedirs(outputsDir, exist_ok=True)
+    tlim = dt * max(snapshots - 1, 1)
+    writeAthinput(caseDir, grid, meshblock, box, tlim, dt)
+    writeHst(os.path.join(outputsDir, f'{PROBLEM_ID}.hst'), tlim, max(snapshots * 10, 2), seed)
+
+    if generator is None:
+        rng = np.random.default_rng(seed)
+        shape = (grid[2], grid[1], grid[0])
+        generator = lambda i: randomFields(rng, shape)
+    for i in range(snapshots):
+        path = os.path.join(outputsDir, f'{PROBLEM_ID}.{outn}.{i:05d}.athdf')
+        writeAthdf(path, i * dt, i * 100, generator(i), box, meshblock)
+    return caseDir
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='生成Athena++格式的基准测试数据')
+    parser.add_argument('case', help='生成的case目录')
+    parser.add_argument('--grid', type=str, default='64', help='网格尺寸, 例如64或128x256x64(nx x ny x nz)')
+    parser.add_argument('--snapshots', type=int, default=10, help='athdf时间切片个数')
+    parser.add_argument('--meshblock', type=str, help='meshblock尺寸, 格式同--grid, 默认每个方向不超过32')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    try:
+        grid = parseGrid(args.grid)
+        meshblock = parseGrid(args.meshblock) if args.meshblock else None
+        createCase(args.case, grid, args.snapshots, meshblock, seed=args.seed)
+    except ValueError as e:
+        print(f"错误: {e}", flush=True)
+        sys.exit(1)
+    print(f"已生成测试case: {args.case}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
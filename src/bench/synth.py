@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+剪切盒合成数据生成工具, 用于在没有集群的情况下测试能谱、关联函数等分析的正确性与扩展性
+
+主要功能:
+1. 生成具有指定幂律能谱 E(k) ∝ k^(-alpha) (kmin <= k <= kmax) 的无散速度场与磁场,
+   以及同样谱形的密度扰动, 并叠加平均磁场By
+2. 每个时间切片由 (seed, 时间切片编号) 确定随机数, 结果可以完全重复, 与生成顺序无关
+3. 由fixtures.py写出Athena++格式的athdf、hst与athinput.hgb, 参数另存为synth.json,
+   便于对EnergySpectra与Correlation的数值结果做回归测试
+
+波数以能谱球壳的宽度 2π/max(Lx, Ly, Lz) 为单位, 与spectrum.py的球壳编号一致。
+逆变换使用fftbackend的后端, scipy与pyfftw保持单精度, 512^3的网格在笔记本上也可以生成
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+
+import fixtures
+
+# 添加src/post路径, 使用其中的FFT后端
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../post')))
+
+import fftbackend
+
+# 参数文件名
+PARAMS_FILE = 'synth.json'
+
+
+def wavevectors(shape: Tuple[int, int, int], box: Tuple[float, float, float]) -> Tuple[np.ndarray, ...]:
+    """实数FFT输出网格上的波矢分量 (kz, ky, kx), 已广播为可相乘的形状, 单精度"""
+    nz, ny, nx = shape
+    Lx, Ly, Lz = box
+    kz = 2 * np.pi * np.fft.fftfreq(nz, d=Lz / nz)
+    ky = 2 * np.pi * np.fft.fftfreq(ny, d=Ly / ny)
+    kx = 2 * np.pi * np.fft.rfftfreq(nx, d=Lx / nx)
+    return (kz.astype(np.float32)[:, None, None], ky.astype(np.float32)[None, :, None],
+            kx.astype(np.float32)[None, None, :])
+
+
+def powerLawField(rng: np.random.Generator, shape: Tuple[int, int, int], box: Tuple[float, float, float],
+                  alpha: float, kmin: float, kmax: float, ncomp: int = 3, solenoidal: bool = True,
+                  fft=None) -> np.ndarray:
+    """生成零均值、总均方根为1的幂律谱随机场
+
+    三维各向同性场的球壳能谱 E(k) ∝ k^2 |A(k)|^2, 因此每个模式的振幅取 |A(k)| ∝ k^(-(alpha + 2) / 2)
+
+    参数:
+        rng (np.random.Generator): 随机数生成器
+        shape (Tuple[int, int, int]): 网格形状 (nz, ny, nx)
+        box (Tuple[float, float, float]): 模拟box尺寸 (Lx, Ly, Lz)
+        alpha (float): 能谱指数
+        kmin (float): 最小波数, 以2π/max(L)为单位
+        kmax (float): 最大波数, 以2π/max(L)为单位
+        ncomp (int): 分量个数, 矢量场为3(x, y, z), 标量场为1
+        solenoidal (bool): 矢量场是否投影为无散场
+        fft: fftbackend中的FFT后端, 默认为numpy
+
+    返回:
+        np.ndarray: 形状为 (ncomp, nz, ny, nx) 的单精度数组
+    """
+    if fft is None:
+        fft = fftbackend.getBackend('numpy')
+    kz, ky, kx = wavevectors(shape, box)
+    k2 = kz ** 2 + ky ** 2 + kx ** 2
+    shell = np.sqrt(k2) / np.float32(2 * np.pi / max(box))
+    with np.errstate(divide='ignore'):
+        amplitude = np.where((shell >= kmin) & (shell <= kmax), shell ** np.float32(-(alpha + 2) / 2), 0)
+    amplitude = amplitude.astype(np.float32)
+    del shell
+
+    # 由实空间的白噪声做实数FFT得到随机系数, 保证kx = 0与Nyquist平面满足厄米对称,
+    # 否则逆变换时这些平面的功率减半, 低波数处的能谱会偏平
+    coeffs = np.empty((ncomp,) + amplitude.shape, dtype=np.complex64)
+    noise = fft.inputBuffer(tuple(shape), dtype=np.float32)
+    for i in range(ncomp):
+        noise[...] = rng.standard_normal(tuple(shape), dtype=np.float32)
+        coeffs[i] = fft.rfftn(noise, axes=(0, 1, 2))
+        coeffs[i] *= amplitude
+    del amplitude
+
+    if ncomp == 3 and solenoidal:
+        # 去掉平行于k的分量: F -= k (k·F) / k^2
+        k2[0, 0, 0] = 1
+        kdotF = (kx * coeffs[0] + ky * coeffs[1] + kz * coeffs[2]) / k2
+        coeffs[0] -= kx * kdotF
+        coeffs[1] -= ky * kdotF
+        coeffs[2] -= kz * kdotF
+        del kdotF
+
+    field = np.empty((ncomp,) + tuple(shape), dtype=np.float32)
+    for i in range(ncomp):
+        field[i] = fft.irfftn(coeffs[i], shape, axes=(0, 1, 2))
+        field[i] -= field[i].mean()
+    field /= np.sqrt((field.astype(np.float64) ** 2).sum(axis=0).mean())
+    return field
+
+
+def snapshotFields(seed: int, index: int, shape: Tuple[int, int, int], box: Tuple[float, float, float],
+                   params: Dict, fft=None) -> Dict[str, np.ndarray]:
+    """生成一个时间切片的所有物理量, 随机数由 (seed, index) 确定"""
+    rng = np.random.default_rng([seed, index])
+    spectrum = (params['alpha'], params['kmin'], params['kmax'])
+
+    V = powerLawField(rng, shape, box, *spectrum, fft=fft)
+    fields = {f'vel{i + 1}': V[i] * np.float32(params['vrms']) for i in range(3)}
+    del V
+
+    B = powerLawField(rng, shape, box, *spectrum, fft=fft)
+    fields.update({f'Bcc{i + 1}': B[i] * np.float32(params['brms']) for i in range(3)})
+    del B
+    fields['Bcc2'] += np.float32(params['By'])
+
+    rho = powerLawField(rng, shape, box, *spectrum, ncomp=1, fft=fft)[0]
+    fields['rho'] = 1 + np.float32(params['drho']) * rho
+    return fields
+
+
+def createCase(caseDir: str, grid: Tuple[int, int, int] = (64, 64, 64), snapshots: int = 10,
+               meshblock=None, box: Tuple[float, float, float] = (1.0, 4.0, 1.0), dt: float = 1.0,
+               seed: int = 0, alpha: float = 5 / 3, kmin: float = 1.0, kmax: float = float('inf'),
+               vrms: float = 0.1, brms: float = 0.1, By: float = 0.05, drho: float = 0.01,
+               fftName: str = 'auto', outn: str = 'out2') -> str:
+    """生成具有幂律能谱的合成剪切盒case, 参数见parse_args
+
+    返回:
+        str: case目录
+    """
+    params = {'alpha': alpha, 'kmin': kmin, 'kmax': kmax, 'vrms': vrms, 'brms': brms, 'By': By, 'drho': drho}
+    fft = fftbackend.getBackend(fftName)
+    shape = (grid[2], grid[1], grid[0])
+
+    def generator(index: int) -> Dict[str, np.ndarray]:
+        fields = snapshotFields(seed, index, shape, box, params, fft)
+        print(f"   已生成时间切片 {index}", flush=True)
+        return fields
+
+    fixtures.createCase(caseDir, grid, snapshots, meshblock, box, dt, seed, outn, generator)
+
+    record = dict(params, kmax=None if np.isinf(kmax) else kmax, seed=seed, grid=list(grid),
+                  snapshots=snapshots, box=list(box), dt=dt, outn=outn)
+    with open(os.path.join(caseDir, PARAMS_FILE), 'w') as f:
+        json.dump(record, f, indent=2)
+    return caseDir
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='剪切盒合成数据生成工具')
+    parser.add_argument('case', help='生成的case目录')
+    parser.add_argument('--grid', type=str, default='64', help='网格尺寸, 例如64或128x256x64(nx x ny x nz)')
+    parser.add_argument('--snapshots', type=int, default=10, help='athdf时间切片个数')
+    parser.add_argument('--meshblock', type=str, help='meshblock尺寸, 格式同--grid, 默认每个方向不超过32')
+    parser.add_argument('--box', type=str, default='1,4,1', help='box尺寸Lx,Ly,Lz')
+    parser.add_argument('--dt', type=float, default=1.0, help='athdf输出的时间间隔')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    parser.add_argument('--alpha', type=float, default=5 / 3, help='能谱指数, E(k) ∝ k^(-alpha)')
+    parser.add_argument('--kmin', type=float, default=1.0, help='最小波数, 以2π/max(L)为单位')
+    parser.add_argument('--kmax', type=float, default=float('inf'), help='最大波数, 以2π/max(L)为单位')
+    parser.add_argument('--vrms', type=float, default=0.1, help='速度扰动的均方根')
+    parser.add_argument('--brms', type=float, default=0.1, help='磁场扰动的均方根')
+    parser.add_argument('--By', type=float, default=0.05, help='平均磁场By')
+    parser.add_argument('--drho', type=float, default=0.01, help='密度扰动的均方根')
+    parser.add_argument('--fft', type=str, default='auto', help='逆变换使用的FFT后端')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    try:
+        grid = fixtures.parseGrid(args.grid)
+        meshblock = fixtures.parseGrid(args.meshblock) if args.meshblock else None
+        box = tuple(float(L) for L in args.box.split(','))
+        if len(box) != 3:
+            raise ValueError(f"无法解析box尺寸: {args.box}")
+        createCase(args.case, grid, args.snapshots, meshblock, box, args.dt, args.seed, args.alpha,
+                   args.kmin, args.kmax, args.vrms, args.brms, args.By, args.drho, args.fft)
+    except ValueError as e:
+        print(f"错误: {e}", flush=True)
+        sys.exit(1)
+    print(f"已生成合成数据: {args.case}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
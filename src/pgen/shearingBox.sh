@@ -12,6 +12,8 @@ rSolver=${ATHENA_RSOLVER:-"HLLD"} # 默认为HLLD
 wallTimeLimit=${ATHENA_WALL_TIME_LIMIT:-"24"} # 默认为24小时
 inputTemplate=${ATHENA_INPUT_TEMPLATE:-""} # 默认为空
 inputEditor=${ATHENA_INPUT_EDITOR:-"manual"} # 默认为manual
+mbOptimize=${ATHENA_MB_OPTIMIZE:-"No"} # 默认不自动优化meshblock
+packFlag=${ATHENA_PACK:-"No"} # 默认不合并小作业
 
 # 转换为小写，确保匹配正确
 inputEditor=$(echo $inputEditor | tr '[:upper:]' '[:lower:]')
@@ -27,6 +29,8 @@ echo "  • Riemann求解器：$rSolver"
 echo "  • 运行时间限制：$wallTimeLimit 小时"
 echo "  • input文件模板：${inputTemplate:-"内置input"}"
 echo "  • 编辑模式：$inputEditor"
+echo "  • meshblock自动优化：$mbOptimize"
+echo "  • 小作业合并：$packFlag"
 echo "═════════════════════════════════════════"
 echo ""
 
@@ -54,7 +58,7 @@ fi
 
 # 设置精度
 if [ "$FP" == "FP32" ]; then
-    FLOAT_FLAG="-float"
+    FLOAT_FLAG="--float"
 else
     FLOAT_FLAG=""
 fi
@@ -117,6 +121,15 @@ fi
 # 自动提取athinput.hgb文件中的参数
 inputFile="$ATHENAUI_PATH/simulations/shearingBox/$caseDir/athinput.hgb"
 
+# 每个节点的核数，在平台配置中设置
+coresPerNode=${CORES_PER_NODE:-64}
+
+# 如果选择了meshblock自动优化，由decomp.py改写<meshblock>
+if [[ "$mbOptimize" == "Yes" ]]; then
+    python $ATHENAUI_DIR/src/run/decomp.py --input $inputFile --cores-per-node $coresPerNode --fp $FP --calibrate --apply \
+        ${MEM_PER_NODE:+--mem-per-node $MEM_PER_NODE} ${MAX_NODES:+--max-nodes $MAX_NODES} || exit 1
+fi
+
 # 自动提取 <mesh> 中的 nx1, nx2, nx3
 nx1=$(awk '/<mesh>/,/<meshblock>/' $inputFile | grep 'nx1' | awk '{print $3}')
 nx2=$(awk '/<mesh>/,/<meshblock>/' $inputFile | grep 'nx2' | awk '{print $3}')
@@ -133,15 +146,18 @@ echo "Mesh: $nx1 × $nx2 × $nx3"
 echo "MeshBlock: $MBx1 × $MBx2 × $MBx3"
 echo " "
 
+# 检查meshblock能否整除mesh
+if (( nx1 % MBx1 != 0 || nx2 % MBx2 != 0 || nx3 % MBx3 != 0 )); then
+    echo "错误：MeshBlock不能整除Mesh，请修改input文件或开启meshblock自动优化"
+    echo "可用以下命令查看可行的分解方案：python $ATHENAUI_DIR/src/run/decomp.py --input $inputFile"
+    exit 1
+fi
+
 # 计算总核数
 n=$(( (nx1 * nx2 * nx3) / (MBx1 * MBx2 * MBx3) ))
 
-# 计算所需节点数 
-if (( n < 64 )); then # 如果不足64核，也要设置一整个节点
-    N=1 
-else 
-    N=$(( n / 64 )) 
-fi
+# 计算所需节点数，不足一个节点也要设置一整个节点
+N=$(( (n + coresPerNode - 1) / coresPerNode ))
 
 # 输出计算结果
 echo "根据输入文件，将为该模拟分配 $N 个计算节点和 $n 个核心。"
@@ -152,14 +168,18 @@ sleep 2
 # SBATCH设置的是分钟数，同时增加一分钟冗余
 wallTimeLimitInMin=$(( wallTimeLimit * 60 + 1 ))
 
-# 问题配置
-cd $ATHENA_PATH
-python configure.py -b --prob=hgb --flux=${rSolver,,} --eos=${EoS,,} -mpi -hdf5 $FLOAT_FLAG
-
-# 编译，在case目录生成可执行文件
-echo "编译Athena++..."
-make clean
-make -j EXE_DIR=$ATHENAUI_PATH/simulations/shearingBox/$caseDir/
+# 问题配置与编译，编译选项和Athena++源码未变化时直接使用缓存的可执行文件
+MPI_LOAD="$MPI_LOAD" HDF5_LOAD="$HDF5_LOAD" ATHENAUI_PATH="$ATHENAUI_PATH" \
+python $ATHENAUI_DIR/src/run/build.py --athena-path $ATHENA_PATH \
+    --prob hgb --flux ${rSolver,,} --eos ${EoS,,} --mpi --hdf5 $FLOAT_FLAG \
+    --dest $ATHENAUI_PATH/simulations/shearingBox/$caseDir || exit 1
+
+# 记录编译配置，供prf命令按精度和Riemann求解器比较吞吐量
+cat << EOF > $ATHENAUI_PATH/simulations/shearingBox/$caseDir/athena.config
+FP=$FP
+EOS=${EoS,,}
+RSOLVER=${rSolver,,}
+EOF
 
 # 切换到case目录 
 cd $ATHENAUI_PATH/simulations/shearingBox/$caseDir/
@@ -179,32 +199,34 @@ EOF
 # 赋予job.sh可执行权限 
 chmod +x job.sh
 
+# 不足一个节点的case加入待合并队列，与其他小作业共享节点
+if [[ "$packFlag" == "Yes" ]] && (( n < coresPerNode )); then
+    CORES_PER_NODE=$coresPerNode ATHENAUI_PATH=$ATHENAUI_PATH \
+    python $ATHENAUI_DIR/src/run/pack.py add $caseDir --walltime $wallTimeLimit
+    echo " "
+    echo "使用 pak submit 将待合并的case装箱提交，使用 pak status 查看运行状态"
+    echo " "
+    exit 0
+fi
+
 # 提交作业并提取作业ID
 echo " "
 echo "提交作业..."
-output=$(sbatch job.sh)
-jobID=$(echo $output | awk '{print $4}')
+jobID=$(sbatch --parsable job.sh | cut -d ';' -f 1)
+if [ -z "$jobID" ]; then
+    echo "错误：作业提交失败"
+    exit 1
+fi
 
 # 打印作业ID
 echo "已提交Sbatch作业：$jobID"
 
-# 确保slurm输出文件已经创建
-slurmFile="slurm-${jobID}.out"
-
-while [ ! -f "$slurmFile" ]; do
-    sleep 0.1  # 等待文件生成
-done
-
-# 等待1秒钟，等文件多出现几行
-sleep 1
-
-# 清屏
-# clear
-
-# 监控模拟进度
-mon
+# 查询作业状态后立即返回，不再等待slurm输出文件生成
+# 作业如果很快开始运行，最多等待5秒即可看到RUNNING状态
+python $ATHENAUI_DIR/src/run/jobs.py $jobID --wait 5
 
-# 打印提示语，退出后还可以继续监控
+# 打印提示语
 echo " "
-echo "要继续监控模拟进度，只需输入：mon"
+echo "要监控模拟进度，只需输入：mon"
+echo "要查询作业状态，只需输入：jst $jobID"
 echo " "
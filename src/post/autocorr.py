@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+两点自关联函数计算模块, 基于Wiener–Khinchin定理
+
+主要功能:
+1. 速度场与磁场的6个分量放在同一个缓冲区中, 一次实数FFT(rfftn)得到所有分量的 |F|^2
+2. 功率谱在时间窗口内累加, 所有时间切片结束后只做一次逆变换, 得到时间平均的自关联函数
+3. 逆变换后只保留三个主轴方向的截线与过原点的平面切片, 不保存完整的三维自关联函数
+4. 由主轴截线计算各方向的积分关联长度
+
+自关联函数定义为扰动场的 R(r) = <δf(x)·δf(x + r)>, 每个时间切片先减去各分量的体平均;
+内存中只保留一个时间切片的场与累加的功率谱
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+import fftbackend
+import preprocess
+import profiling
+import progress
+from spectrum import FIELDS
+
+# 主轴名称与 (z, y, x) 数组中的轴编号
+AXES = {'x': 2, 'y': 1, 'z': 0}
+
+# 过原点的平面切片: 名称 -> 垂直于平面的轴编号
+PLANES = {'xy': 0, 'xz': 1, 'yz': 2}
+
+
+def accumulatePower(power: Optional[np.ndarray], data: Dict[str, np.ndarray], fft) -> np.ndarray:
+    """对一个时间切片的所有场分量做一次批量FFT, 将每个场的 |F|^2 / N^2 累加到power
+
+    参数:
+        power (Optional[np.ndarray]): 已累加的功率谱, 形状为 (场, nz, ny, nx//2+1), 第一个时间切片时为None
+        data (Dict[str, np.ndarray]): 时间切片的数据, (nz, ny, nx) 顺序
+        fft: fftbackend中的FFT后端
+
+    返回:
+        np.ndarray: 累加后的功率谱
+    """
+    quantities = [q for components in FIELDS.values() for q in components]
+    shape = data[quantities[0]].shape
+    stack = fft.inputBuffer((len(quantities),) + shape)
+    for i, q in enumerate(quantities):
+        stack[i] = data[q]
+        stack[i] -= stack[i].mean()
+    N = stack[0].size
+
+    spectrum = fft.rfftn(stack, axes=(1, 2, 3))
+    squared = spectrum.real ** 2 + spectrum.imag ** 2
+    # (场×分量, ...) -> (场, 分量, ...), 对分量求和
+    squared = squared.reshape((len(FIELDS), -1) + squared.shape[1:]).sum(axis=1)
+    squared /= float(N) ** 2
+
+    if power is None:
+        return squared
+    power += squared
+    return power
+
+
+def integralLength(cut: np.ndarray, dx: float) -> float:
+    """积分关联长度 λ = ∫ R(r) dr / R(0), 积分到R第一次变为负值或半个box处"""
+    if cut[0] == 0:
+        return 0.0
+    r = cut / cut[0]
+    negative = np.nonzero(r < 0)[0]
+    end = negative[0] if len(negative) else len(r)
+    if end < 2:
+        return 0.0
+    # 梯形积分
+    return float((r[:end].sum() - 0.5 * (r[0] + r[end - 1])) * dx)
+
+
+def reduceCorrelation(corr: np.ndarray, box: Tuple[float, float, float]) -> Dict[str, np.ndarray]:
+    """从一个场的三维自关联函数中提取主轴截线、平面切片与关联长度
+
+    参数:
+        corr (np.ndarray): 三维自关联函数, (nz, ny, nx) 顺序, 原点在 [0, 0, 0]
+        box (Tuple[float, float, float]): 模拟box尺寸 (Lx, Ly, Lz)
+
+    返回:
+        Dict[str, np.ndarray]: cut_x/y/z为0到半个box的截线, plane_xy/xz/yz为原点居中的平面切片,
+            length为x、y、z三个方向的积分关联长度
+    """
+    lengths = (box[2], box[1], box[0])
+    result = {}
+    lambdas = []
+    for name, axis in AXES.items():
+        n = corr.shape[axis]
+        index = [0, 0, 0]
+        index[axis] = slice(0, n // 2 + 1)
+        cut = np.array(corr[tuple(index)])
+        result[f'cut_{name}'] = cut
+        lambdas.append(integralLength(cut, lengths[axis] / n))
+    for name, axis in PLANES.items():
+        result[f'plane_{name}'] = np.fft.fftshift(np.take(corr, 0, axis=axis))
+    result['length'] = np.array(lambdas)
+    return result
+
+
+def computeCorrelation(outn: str, t1: Optional[float] = None, t2: Optional[float] = None,
+                       fft=None, stride: Union[int, str] = 1,
+                       maxSnapshots: Optional[int] = None) -> Optional[Dict]:
+    """计算时间范围内时间平均的速度场与磁场自关联函数
+
+    参数:
+        outn (str): 输出文件格式, 例如out2
+        t1 (Optional[float]): 起始时间
+        t2 (Optional[float]): 结束时间
+        fft: fftbackend中的FFT后端, 默认为numpy
+        stride (Union[int, str]): 每stride个时间切片取一个, 为auto时由hst估计的自关联时间确定
+        maxSnapshots (Optional[int]): 最多使用的时间切片数, 在时间范围内均匀抽取
+
+    返回:
+        Optional[Dict]: times、各方向的滞后距离lag_x/y/z, 以及每个场的截线、平面切片与关联长度,
+            键名为 "<场>_<项>", 例如kinetic_cut_x; 如果没有数据则返回None
+    """
+    box = preprocess.getBox(outn)
+    if box is None:
+        return None
+    if fft is None:
+        fft = fftbackend.getBackend('numpy')
+
+    quantities = [q for components in FIELDS.values() for q in components]
+    times: List[float] = []
+    power = None
+    for file, time, data in preprocess.iterSnapshots(outn, t1, t2, quantities, '关联函数', stride, maxSnapshots):
+        shape = tuple(int(n) for n in data[quantities[0]].shape)
+        with profiling.stage('power', time=time):
+            power = accumulatePower(power, data, fft)
+        times.append(time)
+
+    if not times:
+        print(f"错误: 在时间范围 [{t1}, {t2 if t2 is not None else '∞'}] 内未找到有效数据", flush=True)
+        return None
+
+    # 对时间平均的功率谱只做一次逆变换: R(r) = N * irfftn(|F|^2 / N^2)
+    power /= len(times)
+    N = int(np.prod(shape))
+    with profiling.stage('inverse'):
+        corr = fft.irfftn(power, shape, axes=(1, 2, 3)) * N
+
+    result = {'times': np.array(times)}
+    lengths = (box[2], box[1], box[0])
+    for name, axis in AXES.items():
+        n = shape[axis]
+        result[f'lag_{name}'] = np.arange(n // 2 + 1) * (lengths[axis] / n)
+    for i, name in enumerate(FIELDS):
+        for key, value in reduceCorrelation(corr[i], box).items():
+            result[f'{name}_{key}'] = value
+    return result
+
+
+def plotCorrelation(result: Dict, case: str) -> str:
+    """绘制自关联函数的主轴截线与xy平面切片, 并保存数据
+
+    返回:
+        str: 图像文件路径
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    output_dir = os.path.join(os.getcwd(), 'corPlots')
+    os.makedirs(output_dir, exist_ok=True)
+    data_file = os.path.join(output_dir, f'correlation({case}).npz')
+    with progress.artifacts(data_file):
+        np.savez(data_file, **result)
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    for row, name in enumerate(FIELDS):
+        ax = axes[row, 0]
+        for axis, color in (('x', 'tab:blue'), ('y', 'tab:red'), ('z', 'tab:green')):
+            cut = result[f'{name}_cut_{axis}']
+            length = result[f'{name}_length'][list(AXES).index(axis)]
+            ax.plot(result[f'lag_{axis}'], cut / cut[0], color=color, linewidth=2,
+                    label=f'{axis}  λ = {length:.3g}')
+        ax.axhline(0, color='gray', linewidth=0.5)
+        ax.set_xlabel('r')
+        ax.set_ylabel('R(r) / R(0)')
+        ax.set_title(name)
+        ax.legend()
+
+        plane = result[f'{name}_plane_xy']
+        # 平面切片覆盖 [-L/2, L/2)
+        halfLy, halfLx = result['lag_y'][-1], result['lag_x'][-1]
+        image = axes[row, 1].imshow(plane / plane.max(), origin='lower', cmap='RdBu_r', vmin=-1, vmax=1,
+                                    extent=[-halfLx, halfLx, -halfLy, halfLy], aspect='auto')
+        axes[row, 1].set_xlabel('Δx')
+        axes[row, 1].set_ylabel('Δy')
+        axes[row, 1].set_title(f'{name}  Δz = 0')
+        fig.colorbar(image, ax=axes[row, 1])
+
+    times = result['times']
+    fig.suptitle(f'{case}  t = [{times.min()}, {times.max()}]')
+    fig.tight_layout()
+
+    output_file = os.path.join(output_dir, f'correlation({case}).pdf')
+    with progress.artifacts(output_file):
+        fig.savefig(output_file)
+    plt.close(fig)
+    return output_file
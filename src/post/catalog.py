@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+athdf输出文件目录模块, 不用glob遍历整个outputs目录即可得到各输出格式的概况
+
+主要功能:
+1. 用os.scandir只读取文件名, 按输出格式(例如out2)统计文件个数与编号范围, 不对每个文件调用stat
+2. 只读取每个格式第一个与最后一个文件的Time属性, 得到可用的时间范围与最新的输出
+3. 结果缓存在case目录下的.athdf_catalog.json中: outputs目录的修改时间未变时不再列出文件,
+   第一个、最后一个文件的大小与修改时间未变时不再读取它们的时间。缓存不放在outputs目录中,
+   否则写出缓存本身就会改变outputs目录的修改时间
+4. indexFormat: 按需为一个输出格式建立时间切片索引(每个文件的时间)与数据布局(网格、各物理量的dtype),
+   只读取索引中还没有的文件, 供TUI在启动计算之前估计时间范围内的切片数、读取量与内存
+
+在Lustre上有数万个athdf文件时, glob与逐个stat都需要数秒, 而本模块在缓存有效时只需要几次stat
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 目录缓存文件, 位于outputs目录的上一级(case目录)
+CATALOG_FILE = '.athdf_catalog.json'
+
+# 缓存格式的版本, 格式改变时旧缓存自动失效
+CATALOG_VERSION = 1
+
+
+def parseName(name: str) -> Optional[Tuple[str, int]]:
+    """解析athdf文件名 <problem_id>.<outn>.<编号>.athdf
+
+    返回:
+        Optional[Tuple[str, int]]: (输出格式, 编号), 不是athdf输出文件时返回None
+    """
+    parts = name.split('.')
+    if len(parts) < 4 or parts[-1] != 'athdf' or not parts[-2].isdigit():
+        return None
+    return parts[-3], int(parts[-2])
+
+
+def scanFormats(outputsDir: str) -> Dict[str, Dict]:
+    """用os.scandir列出athdf文件名, 按输出格式统计文件个数、编号与第一个、最后一个文件"""
+    formats: Dict[str, Dict] = {}
+    with os.scandir(outputsDir) as it:
+        for entry in it:
+            parsed = parseName(entry.name)
+            if parsed is None:
+                continue
+            outn, number = parsed
+            info = formats.get(outn)
+            if info is None:
+                formats[outn] = {'count': 1, 'first': entry.name, 'last': entry.name,
+                                 'first_number': number, 'last_number': number, 'numbers': [number]}
+                continue
+            info['count'] += 1
+            info['numbers'].append(number)
+            if number < info['first_number']:
+                info['first'], info['first_number'] = entry.name, number
+            if number > info['last_number']:
+                info['last'], info['last_number'] = entry.name, number
+    return formats
+
+
+def fileState(path: str) -> Optional[List[int]]:
+    """文件的大小与修改时间(纳秒), 文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def readTime(path: str) -> Optional[float]:
+    """只读取athdf文件的Time属性, 文件正在写出或已损坏时返回None, 不打印信息(供TUI调用)"""
+    import h5py
+
+    try:
+        with h5py.File(path, 'r') as f:
+            return float(f.attrs['Time'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def readLayout(path: str) -> Optional[Dict]:
+    """读取athdf文件的数据布局: 根网格大小 (nx, ny, nz) 与各物理量的dtype和字节数, 不读取物理量"""
+    import h5py
+
+    try:
+        with h5py.File(path, 'r') as f:
+            names = [n.decode() if isinstance(n, bytes) else n for n in f.attrs['VariableNames']]
+            variables = {}
+            offset = 0
+            for dataset, count in zip(f.attrs['DatasetNames'], f.attrs['NumVariables']):
+                dataset = dataset.decode() if isinstance(dataset, bytes) else dataset
+                dtype = f[dataset].dtype
+                for name in names[offset:offset + int(count)]:
+                    variables[name] = [dtype.name, dtype.itemsize]
+                offset += int(count)
+            return {'grid': [int(n) for n in f.attrs['RootGridSize']], 'variables': variables}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def catalogPath(outputsDir: str) -> str:
+    """outputs目录对应的缓存文件路径"""
+    return os.path.join(os.path.dirname(os.path.abspath(outputsDir)), CATALOG_FILE)
+
+
+def loadCatalog(outputsDir: str) -> Dict:
+    """读取目录缓存, 没有、损坏或版本不同时返回空字典"""
+    path = catalogPath(outputsDir)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return catalog if catalog.get('version') == CATALOG_VERSION else {}
+
+
+def saveCatalog(outputsDir: str, catalog: Dict) -> None:
+    """保存目录缓存, case目录不可写时跳过"""
+    path = catalogPath(outputsDir)
+    # TUI在后台线程中建立索引, 临时文件名按进程与线程区分, 同时保存时不会互相覆盖
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(catalog, f, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def listFormats(outputsDir: str = 'outputs', refresh: bool = False) -> Dict[str, Dict]:
+    """列出outputs目录下的athdf输出格式
+
+    参数:
+        outputsDir (str): outputs目录
+        refresh (bool): 忽略缓存, 重新列出文件并读取时间
+
+    返回:
+        Dict[str, Dict]: 输出格式 -> count(文件个数)、first/last(第一个与最后一个文件名)、
+            first_number/last_number(编号)、t_first/t_last(时间, 无法读取时为None), 按格式名排序
+    """
+    try:
+        dirMtime = os.stat(outputsDir).st_mtime_ns
+    except OSError:
+        return {}
+
+    cached = {} if refresh else loadCatalog(outputsDir)
+    old = cached.get('formats', {})
+    # 先记录目录的修改时间再列出文件, 列出期间新增的文件会使下次调用重新列出
+    if cached.get('dir_mtime') == dirMtime:
+        scanned = {outn: {key: record[key] for key in ('count', 'first', 'last', 'first_number', 'last_number')}
+                   for outn, record in old.items()}
+        for outn, record in old.items():
+            if 'times' in record:
+                scanned[outn]['times'] = record['times']
+    else:
+        try:
+            scanned = scanFormats(outputsDir)
+        except OSError:
+            return {}
+
+    formats: Dict[str, Dict] = {}
+    for outn in sorted(scanned):
+        record = dict(scanned[outn])
+        previous = old.get(outn, {})
+        # 重新列出文件时, 时间切片索引只保留仍然存在的文件
+        numbers = record.pop('numbers', None)
+        if numbers is not None and 'times' in previous:
+            record['times'] = {str(n): previous['times'][str(n)] for n in numbers if str(n) in previous['times']}
+        for key in ('first', 'last'):
+            # 文件名、大小与修改时间都未变时使用缓存的时间, 最后一个文件可能正在写出
+            state = fileState(os.path.join(outputsDir, record[key]))
+            if (previous.get(key) == record[key] and previous.get(f'{key}_state') == state
+                    and previous.get(f't_{key}') is not None):
+                record[f't_{key}'] = previous[f't_{key}']
+            else:
+                record[f't_{key}'] = readTime(os.path.join(outputsDir, record[key]))
+            record[f'{key}_state'] = state
+        # 数据布局按第一个文件的大小与修改时间缓存, repack --fp32或转码后文件名不变但布局可能改变
+        if ('layout' in previous and previous.get('first') == record['first']
+                and previous.get('first_state') == record['first_state']):
+            record['layout'] = previous['layout']
+        # 最后一个文件可能在上次建立索引时仍在写出
+        if 'times' in record:
+            record['times'][str(record['last_number'])] = record['t_last']
+        formats[outn] = record
+
+    catalog = {'version': CATALOG_VERSION, 'dir_mtime': dirMtime, 'formats': formats}
+    if catalog != cached:
+        saveCatalog(outputsDir, catalog)
+    return formats
+
+
+def indexFormat(outputsDir: str, outn: str) -> Optional[Dict]:
+    """为一个输出格式建立时间切片索引与数据布局, 只读取索引中还没有的文件
+
+    第一次调用需要读取该格式每个文件的时间, 之后只读取新增的文件
+
+    返回:
+        Optional[Dict]: listFormats中该格式的记录, 另有times(编号 -> 时间, 编号为字符串, 无法读取时为None)
+            与layout(grid与variables, 见readLayout), 没有该格式时返回None
+    """
+    formats = listFormats(outputsDir)
+    record = formats.get(outn)
+    if record is None:
+        return None
+
+    times = record.get('times', {})
+    layout = record.get('layout')
+    if len(times) == record['count'] and layout is not None:
+        return record
+
+    # 文件名为 <problem_id>.<outn>.<编号>.athdf, 编号至少5位
+    prefix = record['first'][:-len(f".{record['first_number']:05d}.athdf")]
+    if len(times) < record['count']:
+        numbers = sorted(scanFormats(outputsDir).get(outn, {}).get('numbers', []))
+        for number in numbers:
+            if str(number) not in times:
+                times[str(number)] = readTime(os.path.join(outputsDir, f"{prefix}.{number:05d}.athdf"))
+        times = {str(number): times[str(number)] for number in numbers}
+    if layout is None:
+        layout = readLayout(os.path.join(outputsDir, record['first']))
+
+    record['times'] = times
+    record['layout'] = layout
+    catalog = loadCatalog(outputsDir)
+    if outn in catalog.get('formats', {}):
+        catalog['formats'][outn] = record
+        saveCatalog(outputsDir, catalog)
+    return record
+
+
+def formatRange(record: Dict) -> str:
+    """格式化一个输出格式的时间范围, 例如 "t = 0 ~ 500" """
+    t_first, t_last = record.get('t_first'), record.get('t_last')
+    first = '?' if t_first is None else f"{t_first:g}"
+    last = '?' if t_last is None else f"{t_last:g}"
+    return f"t = {first} ~ {last}"
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='athdf输出文件目录')
+    parser.add_argument('outputs', nargs='?', default='outputs', help='outputs目录, 默认为当前目录下的outputs')
+    parser.add_argument('--refresh', action='store_true', help='忽略缓存, 重新列出文件并读取时间')
+    parser.add_argument('--index', action='store_true', help='同时为每个输出格式建立时间切片索引(读取每个文件的时间)')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    formats = listFormats(args.outputs, args.refresh)
+    if not formats:
+        print(f"{args.outputs} 中没有athdf输出文件", flush=True)
+        sys.exit(1)
+    print(f"{'outn':<10}{'files':>8}{'first':>10}{'last':>10}{'t_first':>14}{'t_last':>14}")
+    for outn, r in formats.items():
+        t_first = '?' if r['t_first'] is None else f"{r['t_first']:.6g}"
+        t_last = '?' if r['t_last'] is None else f"{r['t_last']:.6g}"
+        print(f"{outn:<10}{r['count']:>8}{r['first_number']:>10}{r['last_number']:>10}{t_first:>14}{t_last:>14}")
+
+    if args.index:
+        for outn in formats:
+            r = indexFormat(args.outputs, outn)
+            layout = r.get('layout') or {}
+            grid = 'x'.join(str(n) for n in layout.get('grid', [])) or '?'
+            dtypes = sorted({dtype for dtype, _ in layout.get('variables', {}).values()})
+            print(f"{outn}: 已索引 {len(r['times'])} 个文件, 网格 {grid}, dtype {'/'.join(dtypes) or '?'}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+FFT后端模块, 为能谱与两点关联的计算提供可替换的三维实数FFT
+
+主要功能:
+1. numpy: 单线程的np.fft, 作为默认后端
+2. scipy: scipy.fft, 通过workers参数多线程计算
+3. pyfftw: 按 (形状, 数据类型, 变换轴) 缓存FFTW计划, wisdom保存在fftw目录下的一个文件中,
+   输入输出使用对齐的预分配缓冲区, 在时间切片之间重复使用
+4. 基准测试: 报告各后端在不同网格尺寸下的FFT GFLOP/s
+
+所有后端的rfftn返回的数组可能是后端内部的缓冲区, 下一次变换会覆盖其内容,
+调用方需要在下一次变换前用完或复制结果
+"""
+
+import argparse
+import math
+import os
+import pickle
+import sys
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 可选的后端名称
+BACKENDS = ['numpy', 'scipy', 'pyfftw']
+
+
+def defaultWorkers() -> int:
+    """获取可用的CPU核数, srun下为分配给当前任务的核数"""
+    if 'SLURM_CPUS_PER_TASK' in os.environ:
+        return int(os.environ['SLURM_CPUS_PER_TASK'])
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def getWisdomDir() -> str:
+    """获取FFTW wisdom的保存目录"""
+    athenaui_path = os.environ.get('ATHENAUI_PATH',
+                                   os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    return os.path.join(athenaui_path, 'fftw')
+
+
+class NumpyFFT:
+    """基于np.fft的单线程后端"""
+
+    name = 'numpy'
+
+    def __init__(self, workers: int = 1):
+        self.workers = 1
+        self.buffers: Dict[Tuple, np.ndarray] = {}
+
+    def inputBuffer(self, shape: Sequence[int], dtype=np.float64) -> np.ndarray:
+        """获取可重复使用的输入缓冲区, 同一形状与数据类型只分配一次"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        if key not in self.buffers:
+            self.buffers[key] = np.empty(shape, dtype=dtype)
+        return self.buffers[key]
+
+    def rfftn(self, array: np.ndarray, axes: Sequence[int]) -> np.ndarray:
+        """对指定的轴做实数FFT"""
+        return np.fft.rfftn(array, axes=axes)
+
+    def irfftn(self, spectrum: np.ndarray, shape: Sequence[int], axes: Sequence[int]) -> np.ndarray:
+        """实数FFT的逆变换, shape为变换轴上的实数数据长度"""
+        return np.fft.irfftn(spectrum, s=shape, axes=axes)
+
+    def fftn(self, array: np.ndarray, axes: Sequence[int]) -> np.ndarray:
+        """对指定的轴做复数FFT"""
+        return np.fft.fftn(array, axes=axes)
+
+
+class ScipyFFT(NumpyFFT):
+    """基于scipy.fft的多线程后端"""
+
+    name = 'scipy'
+
+    def __init__(self, workers: int = 1):
+        super().__init__()
+        import scipy.fft
+        self.fft = scipy.fft
+        self.workers = workers
+
+    def rfftn(self, array: np.ndarray, axes: Sequence[int]) -> np.ndarray:
+        return self.fft.rfftn(array, axes=axes, workers=self.workers)
+
+    def irfftn(self, spectrum: np.ndarray, shape: Sequence[int], axes: Sequence[int]) -> np.ndarray:
+        return self.fft.irfftn(spectrum, s=shape, axes=axes, workers=self.workers)
+
+    def fftn(self, array: np.ndarray, axes: Sequence[int]) -> np.ndarray:
+        # 输入通常是上一步变换的中间结果, 允许直接覆盖
+        return self.fft.fftn(array, axes=axes, workers=self.workers, overwrite_x=True)
+
+
+class FFTWFFT(NumpyFFT):
+    """基于pyFFTW的后端, 缓存FFTW计划与对齐的缓冲区"""
+
+    name = 'pyfftw'
+
+    def __init__(self, workers: int = 1, planner: str = 'FFTW_MEASURE'):
+        super().__init__()
+        import pyfftw
+        import pyfftw.builders
+        self.pyfftw = pyfftw
+        self.workers = workers
+        self.planner = planner
+        self.plans: Dict[Tuple, object] = {}
+        self.loaded = False
+
+    @staticmethod
+    def wisdomFile() -> str:
+        """wisdom文件, FFTW导出的wisdom包含进程中所有规划的结果, 因此所有网格形状共用一个文件"""
+        return os.path.join(getWisdomDir(), 'fftw.wisdom')
+
+    def loadWisdom(self) -> None:
+        """导入已保存的wisdom, 使规划时间可以忽略
+
+        wisdom以pickle保存, 读取时可以执行任意代码, 因此只导入当前用户所有且其他用户不可写的文件
+        """
+        if self.loaded:
+            return
+        self.loaded = True
+        path = self.wisdomFile()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        if hasattr(os, 'getuid') and (stat.st_uid != os.getuid() or stat.st_mode & 0o022):
+            print(f"警告: {path} 不属于当前用户或可被其他用户写入, 不导入FFTW wisdom", flush=True)
+            return
+        try:
+            with open(path, 'rb') as f:
+                self.pyfftw.import_wisdom(pickle.load(f))
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            pass  # 文件损坏时重新规划, 之后保存时覆盖
+
+    def saveWisdom(self) -> None:
+        """保存wisdom(包括之前导入的内容), 先写临时文件再替换, 目录不可写时跳过"""
+        path = self.wisdomFile()
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(getWisdomDir(), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                pickle.dump(self.pyfftw.export_wisdom(), f)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def inputBuffer(self, shape: Sequence[int], dtype=np.float64) -> np.ndarray:
+        key = (tuple(shape), np.dtype(dtype).str)
+        if key not in self.buffers:
+            self.buffers[key] = self.pyfftw.empty_aligned(shape, dtype=dtype)
+        return self.buffers[key]
+
+    def plan(self, kind: str, array: np.ndarray, axes: Tuple[int, ...], shape: Optional[Tuple[int, ...]] = None):
+        """获取缓存的FFTW计划, 第一次遇到时先导入wisdom再规划"""
+        key = (kind, array.shape, array.dtype.str, axes, shape)
+        if key not in self.plans:
+            self.loadWisdom()
+            builder = getattr(self.pyfftw.builders, kind)
+            options = {'axes': axes, 'threads': self.workers, 'planner_effort': self.planner}
+            if shape is not None:
+                options['s'] = shape
+            self.plans[key] = builder(self.pyfftw.empty_aligned(array.shape, dtype=array.dtype), **options)
+            self.saveWisdom()
+        return self.plans[key]
+
+    def rfftn(self, array: np.ndarray, axes: Sequence[int]) -> np.ndarray:
+        plan = self.plan('rfftn', array, tuple(axes))
+        # 结果写入计划自带的输出缓冲区, 在时间切片之间重复使用
+        return plan(array)
+
+    def irfftn(self, spectrum: np.ndarray, shape: Sequence[int], axes: Sequence[int]) -> np.ndarray:
+        plan = self.plan('irfftn', spectrum, tuple(axes), tuple(shape))
+        return plan(spectrum)
+
+    def fftn(self, array: np.ndarray, axes: Sequence[int]) -> np.ndarray:
+        plan = self.plan('fftn', array, tuple(axes))
+        return plan(array)
+
+
+def getBackend(name: str = 'numpy', workers: Optional[int] = None):
+    """创建FFT后端
+
+    参数:
+        name (str): numpy、scipy、pyfftw, 或auto(依次尝试pyfftw、scipy、numpy)
+        workers (Optional[int]): 线程数, 默认为可用的CPU核数
+
+    返回:
+        FFT后端对象, 指定的后端不可用时退回numpy并给出警告
+    """
+    if workers is None:
+        workers = defaultWorkers()
+    classes = {'numpy': NumpyFFT, 'scipy': ScipyFFT, 'pyfftw': FFTWFFT}
+    candidates = ['pyfftw', 'scipy', 'numpy'] if name == 'auto' else [name]
+    for candidate in candidates:
+        try:
+            return classes[candidate](workers)
+        except ImportError:
+            if name != 'auto':
+                print(f"警告: FFT后端 {candidate} 不可用, 改用numpy", flush=True)
+    return NumpyFFT()
+
+
+def rfftFlops(shape: Sequence[int]) -> float:
+    """实数FFT的名义浮点运算量 2.5 * N * log2(N)"""
+    N = int(np.prod(shape))
+    return 2.5 * N * math.log2(N)
+
+
+def benchmark(backend, n: int, repeat: int = 5) -> float:
+    """测试n^3网格上一个标量场的rfftn速度, 返回GFLOP/s(取最快的一次)"""
+    data = backend.inputBuffer((n, n, n))
+    data[...] = np.random.default_rng(0).standard_normal((n, n, n))
+    backend.rfftn(data, axes=(0, 1, 2))  # 预热, pyfftw在此规划
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.rfftn(data, axes=(0, 1, 2))
+        best = min(best, time.perf_counter() - start)
+    return rfftFlops((n, n, n)) / best / 1e9
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='FFT后端基准测试工具')
+    parser.add_argument('--sizes', type=str, default='64,128,256', help='网格尺寸, 逗号分隔, 例如64,128,256')
+    parser.add_argument('--backends', type=str, default=','.join(BACKENDS), help='参与测试的后端, 逗号分隔')
+    parser.add_argument('--workers', type=int, help='线程数, 默认为可用的CPU核数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个尺寸的重复次数')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    sizes = [int(n) for n in args.sizes.split(',')]
+    workers = args.workers or defaultWorkers()
+
+    backends = []
+    for name in args.backends.split(','):
+        if name not in BACKENDS:
+            print(f"错误: 未知的FFT后端 {name}, 可选: {', '.join(BACKENDS)}", flush=True)
+            sys.exit(1)
+        backend = getBackend(name, workers)
+        if backend.name == name:
+            backends.append(backend)
+
+    print(f"线程数: {workers}")
+    print(f"{'grid':>8}" + ''.join(f"{b.name:>12}" for b in backends) + "   (GFLOP/s)")
+    for n in sizes:
+        print(f"{n:>7}^3" + ''.join(f"{benchmark(b, n, args.repeat):>12.2f}" for b in backends), flush=True)
+
+
+if __name__ == "__main__":
+    main()
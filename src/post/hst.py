@@ -1,68 +1,115 @@
+import argparse
 import os
-import numpy as np # type: ignore
-import matplotlib.pyplot as plt # type: ignore
-
-# 获取当前工作目录
-current_dir = os.getcwd()
-
-# 检查当前目录是否为一个合法的 Athena++ case 目录
-# 一个简单的检查方法是查看是否存在 'outputs' 子目录
-outputs_dir = os.path.join(current_dir, 'outputs')
-if not os.path.isdir(outputs_dir):
-    print(f"错误：当前目录 '{current_dir}' 不是一个有效的 Athena++ case 目录 (缺少 'outputs' 子目录)。")
-    exit(1)
-
-# 获取唯一的 .hst 文件
-hst_files = [f for f in os.listdir(outputs_dir) if f.endswith('.hst')]
-if not hst_files:
-    print(f"错误：在 '{outputs_dir}' 目录下找不到 .hst 文件。")
-    exit(1)
-if len(hst_files) > 1:
-    print(f"警告：在 '{outputs_dir}' 目录下找到多个 .hst 文件，将使用第一个文件：'{hst_files[0]}'")
-
-hst_file = os.path.join(outputs_dir, hst_files[0])
-
-# 读取文件，跳过前两行
-try:
-    data = np.loadtxt(hst_file, skiprows=2)
-except Exception as e:
-    print(f"读取文件 '{hst_file}' 时出错: {e}")
-    exit(1)
-
-# 提取时间数据
-time_data = data[:, 0]  # 第一列是时间
-
-# 提取物理量数据
-var_data_list = data[:, 1:]  # 其余列是物理量
-
-# 获取变量名
-try:
-    with open(hst_file, 'r') as file:
-        lines = file.readlines()
-    header_line = lines[1].strip()  # 第二行为变量名行，去除首尾空格
-    header_items = header_line.strip('# ').split()  # 去除注释符 '#' 并按空格分割
-except Exception as e:
-    print(f"解析文件 '{hst_file}' 头部时出错: {e}")
-    exit(1)
-
-# 提取变量名，跳过时间列的变量名
-var_names = []
-for item in header_items[1:]:  # 跳过第一个元素，即时间列的变量名
-    pos = item.find('=')
-    if pos != -1:
-        var_name = item[pos+1:]
-        var_names.append(var_name)
-
-# 获取当前case目录的名称
-case_name = os.path.basename(current_dir)
-
-# 定义输出目录
-output_dir = os.path.join(current_dir, "hstPlots")
-os.makedirs(output_dir, exist_ok=True)
-
-# 遍历每个物理量并绘图
-for i, var_name in enumerate(var_names):
-    var_data = var_data_list[:, i]
+import sys
+
+import profiling
+
+# numpy与matplotlib只在绘图时导入, --help可以立即返回
+
+def parse_args(argv=None):
+    """解析命令行参数, argv为None时使用sys.argv"""
+    parser = argparse.ArgumentParser(description='历史数据(.hst)绘图工具, 在case目录中运行')
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help='记录各阶段的耗时、读取量与内存并打印汇总表, 指定TRACE时同时写出Chrome trace JSON')
+    return parser.parse_args(argv)
+
+def findHst(current_dir: str) -> str:
+    """查找case目录下的 .hst 文件, 找不到时退出"""
+    # 检查当前目录是否为一个合法的 Athena++ case 目录
+    # 一个简单的检查方法是查看是否存在 'outputs' 子目录
+    outputs_dir = os.path.join(current_dir, 'outputs')
+    if not os.path.isdir(outputs_dir):
+        print(f"错误：当前目录 '{current_dir}' 不是一个有效的 Athena++ case 目录 (缺少 'outputs' 子目录)。")
+        sys.exit(1)
+
+    # 获取唯一的 .hst 文件
+    hst_files = [f for f in os.listdir(outputs_dir) if f.endswith('.hst')]
+    if not hst_files:
+        print(f"错误：在 '{outputs_dir}' 目录下找不到 .hst 文件。")
+        sys.exit(1)
+    if len(hst_files) > 1:
+        print(f"警告：在 '{outputs_dir}' 目录下找到多个 .hst 文件，将使用第一个文件：'{hst_files[0]}'")
+
+    return os.path.join(outputs_dir, hst_files[0])
+
+def readHst(hst_file: str):
+    """读取 .hst 文件, 返回 (时间, 物理量数据, 变量名), 出错时退出"""
+    import numpy as np # type: ignore
+
+    # 读取文件，跳过前两行
+    try:
+        with profiling.stage('read', file=os.path.basename(hst_file)) as s:
+            data = np.loadtxt(hst_file, skiprows=2)
+            s.addBytes(os.path.getsize(hst_file))
+    except Exception as e:
+        print(f"读取文件 '{hst_file}' 时出错: {e}")
+        sys.exit(1)
+
+    # 提取时间数据
+    time_data = data[:, 0]  # 第一列是时间
+
+    # 提取物理量数据
+    var_data_list = data[:, 1:]  # 其余列是物理量
+
+    # 获取变量名
+    try:
+        with open(hst_file, 'r') as file:
+            lines = file.readlines()
+        header_line = lines[1].strip()  # 第二行为变量名行，去除首尾空格
+        header_items = header_line.strip('# ').split()  # 去除注释符 '#' 并按空格分割
+    except Exception as e:
+        print(f"解析文件 '{hst_file}' 头部时出错: {e}")
+        sys.exit(1)
+
+    # 提取变量名，跳过时间列的变量名
+    var_names = []
+    for item in header_items[1:]:  # 跳过第一个元素，即时间列的变量名
+        pos = item.find('=')
+        if pos != -1:
+            var_name = item[pos+1:]
+            var_names.append(var_name)
+
+    return time_data, var_data_list, var_names
+
+def correlationTime(time_data, values):
+    """估计一个物理量涨落的积分自关联时间 τ = Δt * (1/2 + Σ ρ(k)), 求和到ρ第一次变为负值
+
+    hst的时间步长不均匀, 先按步长的中位数插值到均匀时间网格; 样本太少或没有涨落时返回None
+    从restart文件重启后hst中的时间会回退并重复, 只保留每个时间最后写出的一行
+    """
+    import numpy as np # type: ignore
+
+    # 从后往前, 只保留早于其后所有行的行, 即丢弃被重启覆盖的时间段, 剩下的时间严格递增
+    time_data = np.asarray(time_data, dtype=float)[::-1]
+    later = np.concatenate(([np.inf], np.minimum.accumulate(time_data)[:-1]))
+    keep = (time_data < later)[::-1]
+    time_data = time_data[::-1][keep]
+    values = np.asarray(values, dtype=float)[keep]
+
+    if len(time_data) < 16:
+        return None
+    dt = float(np.median(np.diff(time_data)))
+    if dt <= 0:
+        return None
+    grid = np.arange(time_data[0], time_data[-1], dt)
+    fluctuation = np.interp(grid, time_data, values)
+    fluctuation -= fluctuation.mean()
+    if not np.any(fluctuation):
+        return None
+
+    # 补零后用FFT计算自关联函数, 避免周期回绕
+    n = len(fluctuation)
+    spectrum = np.fft.rfft(fluctuation, 2 * n)
+    acf = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2)[:n]
+    acf /= acf[0]
+    negative = np.nonzero(acf < 0)[0]
+    cutoff = negative[0] if len(negative) else n
+    return dt * (0.5 + float(acf[1:cutoff].sum()))
+
+def plotVariable(i: int, var_name: str, time_data, var_data, case_name: str, output_dir: str) -> None:
+    """绘制一个物理量随时间变化的曲线图"""
+    import numpy as np # type: ignore
+    import matplotlib.pyplot as plt # type: ignore
 
     if i == 0:
         # 单轴绘图方案（线性坐标）
@@ -112,7 +159,7 @@ for i, var_name in enumerate(var_names):
 
         # 添加标题并调整位置
         # y参数控制标题到顶部的距离，值越小距离越大
-        fig.suptitle(f'{case_name}', fontsize=14, y=0.97) 
+        fig.suptitle(f'{case_name}', fontsize=14, y=0.97)
         plt.subplots_adjust(bottom=0.10, top=0.92)
         # plt.subplots_adjust(top=0.88)  # 调整上边距，为标题留出空间
         # fig.tight_layout()
@@ -122,4 +169,30 @@ for i, var_name in enumerate(var_names):
         plt.savefig(os.path.join(output_dir, output_file))
         plt.close()
 
-print(f"\nHistory Plots saved.\n")
+def main(argv=None):
+    """主函数, argv为命令行参数列表, 供TUI在同一进程中调用"""
+    args = parse_args(argv)
+    # 由 --profile 参数或环境变量ATHENAUI_PROFILE启用性能剖析
+    profiling.setup(args.profile)
+
+    # 获取当前工作目录
+    current_dir = os.getcwd()
+    hst_file = findHst(current_dir)
+    time_data, var_data_list, var_names = readHst(hst_file)
+
+    # 获取当前case目录的名称
+    case_name = os.path.basename(current_dir)
+
+    # 定义输出目录
+    output_dir = os.path.join(current_dir, "hstPlots")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 遍历每个物理量并绘图
+    for i, var_name in enumerate(var_names):
+        with profiling.stage('plot', var=var_name):
+            plotVariable(i, var_name, time_data, var_data_list[:, i], case_name, output_dir)
+
+    print(f"\nHistory Plots saved.\n")
+
+if __name__ == "__main__":
+    main()
@@ -9,30 +9,54 @@
 2. 提取物理场数据（密度场、速度场、磁场）
 3. 将数据转换为ScalarField和VectorField对象
 4. 构建Turbulence对象
+5. 时间切片抽样: 每stride个取一个, 或最多取均匀分布的N个; stride为auto时由hst估计的自关联时间确定
 """
 
 import sys
 import os
 import glob
-from typing import List, Tuple, Optional, Union
-import numpy as np
+from typing import List, Tuple, Optional, Union, TYPE_CHECKING
 
-# 导入athena_read库
-athena_path = os.environ.get('ATHENA_PATH', '')
-if athena_path:
+import profiling
+import progress
+
+# numpy、athena_read、h5py与PyMRI只在用到时导入, 使 --help 与参数检查不必等待这些库加载
+if TYPE_CHECKING:
+    from pymri import Turbulence
+
+# 已导入的athena_read模块
+_athena_read = None
+
+def athenaRead():
+    """导入athena_read库, 只在第一次调用时导入
+    
+    返回:
+        module: athena_read模块
+        
+    异常:
+        ImportError: 未设置环境变量ATHENA_PATH或无法导入athena_read
+    """
+    global _athena_read
+    if _athena_read is not None:
+        return _athena_read
+    
+    athena_path = os.environ.get('ATHENA_PATH', '')
+    if not athena_path:
+        raise ImportError("未找到环境变量ATHENA_PATH, 无法导入athena_read")
     sys.path.insert(0, os.path.join(athena_path, 'vis/python'))
     try:
         import athena_read
     except ImportError as e:
-        print(f"错误: 无法导入athena_read模块: {e}", flush=True)
-        sys.exit(1)
-else:
-    print("错误: 未找到环境变量ATHENA_PATH, 无法导入athena_read", flush=True)
-    sys.exit(1)
+        raise ImportError(f"无法导入athena_read模块: {e}") from e
+    _athena_read = athena_read
+    return athena_read
 
-# 导入PyMRI库中的数据类型
-from pymri import ScalarField, VectorField, Turbulence
-from pymri.turbulence import avg
+def registerFilters() -> None:
+    """注册hdf5plugin的压缩过滤器, 重排(repack.py)时使用blosc压缩的文件需要它才能读取"""
+    try:
+        import hdf5plugin  # noqa: F401
+    except ImportError:
+        pass
 
 def getOmega() -> Optional[float]:
     """从athinput文件中提取Omega值
@@ -249,22 +273,26 @@ def getBox(outn: str) -> Optional[List[float]]:
     
     # 查找参考文件
     file00000pattern = os.path.join(current_path, 'outputs', f'*.{outn}.00000.athdf')
-    file00000 = glob.glob(file00000pattern)[0]
+    files00000 = glob.glob(file00000pattern)
     
-    if not file00000:
+    if not files00000:
         print(f"错误: 未找到输出文件: {file00000pattern}", flush=True)
         return None
+    file00000 = files00000[0]
     
     try:
-        data = athena_read.athdf(file00000)
-
-        # 提取网格范围
-        x1min, x1max = data['RootGridX1'][:-1].astype(np.float64)
-        x2min, x2max = data['RootGridX2'][:-1].astype(np.float64)
-        x3min, x3max = data['RootGridX3'][:-1].astype(np.float64)
+        import h5py
+        import numpy as np
+        
+        # 只读取网格属性, 不读取物理量, 也不需要athena_read与压缩过滤器
+        with h5py.File(file00000, 'r') as f:
+            # 提取网格范围
+            x1min, x1max = f.attrs['RootGridX1'][:-1].astype(np.float64)
+            x2min, x2max = f.attrs['RootGridX2'][:-1].astype(np.float64)
+            x3min, x3max = f.attrs['RootGridX3'][:-1].astype(np.float64)
 
-        # 提取网格大小
-        Nx, Ny, Nz = data['RootGridSize']
+            # 提取网格大小
+            Nx, Ny, Nz = (int(n) for n in f.attrs['RootGridSize'])
         
         # 计算box尺寸
         Lx = float(x1max - x1min)
@@ -280,33 +308,240 @@ def getBox(outn: str) -> Optional[List[float]]:
         print(f"错误: 读取网格信息时出错: {e}", flush=True)
         return None
 
-def output2turbulence(outn: str, t1: float, t2: Optional[float] = None) -> Optional[Turbulence]:
+def readAthdf(file: str, quantities: Optional[List[str]] = None) -> dict:
+    """读取athdf文件, 重排过的文件直接读取全局数组, 其余文件交给athena_read
+    
+    参数:
+        file (str): athdf文件路径
+        quantities (Optional[List[str]]): 需要读取的物理量, 例如['rho', 'vel1'], 为None时读取全部
+        
+    返回:
+        dict: 与athena_read.athdf相同格式的数据, 物理量的形状为 (nz, ny, nx)
+    """
+    import h5py
+    registerFilters()
+    
+    with h5py.File(file, 'r') as f:
+        if not f.attrs.get('AthenaUIRepacked', False):
+            return athenaRead().athdf(file, quantities=quantities)
+        
+        data = {key: f.attrs[key] for key in ('Time', 'RootGridX1', 'RootGridX2', 'RootGridX3', 'RootGridSize')}
+        
+        # 由DatasetNames与NumVariables确定每个物理量所在的数据集与序号
+        names = [n.decode() if isinstance(n, bytes) else n for n in f.attrs['VariableNames']]
+        datasets = [n.decode() if isinstance(n, bytes) else n for n in f.attrs['DatasetNames']]
+        location = {}
+        offset = 0
+        for dataset, count in zip(datasets, f.attrs['NumVariables']):
+            for index in range(int(count)):
+                location[names[offset + index]] = (dataset, index)
+            offset += int(count)
+        
+        for quantity in (names if quantities is None else quantities):
+            dataset, index = location[quantity]
+            data[quantity] = f[dataset][index, 0]
+    
+    return data
+
+def snapshotTime(file: str) -> Optional[float]:
+    """只读取athdf文件的Time属性, 不读取物理量
+    
+    返回:
+        Optional[float]: 模拟时间, 如果读取失败则返回None
+    """
+    import h5py
+    
+    try:
+        with h5py.File(file, 'r') as f:
+            return float(f.attrs['Time'])
+    except (OSError, KeyError) as e:
+        print(f"警告: 读取文件 {file} 的时间时出错: {e}", flush=True)
+        return None
+
+def parseStride(value: str) -> Union[int, str]:
+    """命令行参数 --stride 的类型: 正整数或auto"""
+    import argparse
+    
+    if value == 'auto':
+        return value
+    try:
+        stride = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"步长必须是正整数或auto: {value}")
+    if stride < 1:
+        raise argparse.ArgumentTypeError(f"步长必须是正整数或auto: {value}")
+    return stride
+
+def parseCount(value: str) -> int:
+    """命令行参数 --max-snapshots 的类型: 正整数"""
+    import argparse
+    
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"时间切片数必须是正整数: {value}")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"时间切片数必须是正整数: {value}")
+    return count
+
+def subsample(selected: list, stride: int = 1, maxSnapshots: Optional[int] = None) -> list:
+    """时间切片抽样: 先每stride个取一个, 超过maxSnapshots个时再取均匀分布的maxSnapshots个(包括首尾)"""
+    selected = selected[::stride]
+    n = len(selected)
+    if maxSnapshots is not None and n > maxSnapshots:
+        if maxSnapshots == 1:
+            return selected[:1]
+        selected = [selected[round(i * (n - 1) / (maxSnapshots - 1))] for i in range(maxSnapshots)]
+    return selected
+
+def autoStride(times: List[float]) -> int:
+    """由hst文件估计湍流能量的积分自关联时间τ, 返回使相邻两个时间切片间隔约2τ的步长
+    
+    参数:
+        times (List[float]): 时间范围内的时间切片, 按时间排序
+        
+    返回:
+        int: 步长, 无法估计时返回1(不抽样)
+    """
+    import numpy as np
+    import hst
+    
+    hst_files = sorted(glob.glob(os.path.join(os.getcwd(), 'outputs', '*.hst')))
+    if len(times) < 2 or not hst_files:
+        print("警告: 未找到hst文件或时间切片不足两个, 不做时间切片抽样", flush=True)
+        return 1
+    
+    with profiling.stage('autocorrelation'):
+        time_data, var_data_list, var_names = hst.readHst(hst_files[0])
+        # 湍流能量: 各方向的动能与磁能之和
+        columns = [i for i, name in enumerate(var_names) if name.endswith('-KE') or name.endswith('-ME')]
+        window = (time_data >= times[0]) & (time_data <= times[-1])
+        tau = None
+        if columns:
+            tau = hst.correlationTime(time_data[window], var_data_list[window][:, columns].sum(axis=1))
+    if tau is None:
+        print("警告: 无法由hst文件估计自关联时间, 不做时间切片抽样", flush=True)
+        return 1
+    
+    spacing = float(np.median(np.diff(times)))
+    stride = max(1, int(np.ceil(2 * tau / spacing))) if spacing > 0 else 1
+    print(f"湍流能量的积分自关联时间 τ = {tau:.4g}, 输出间隔 {spacing:.4g}, 每 {stride} 个时间切片取一个", flush=True)
+    return stride
+
+def iterSnapshots(outn: str, t1: Optional[float] = None, t2: Optional[float] = None,
+                  quantities: Optional[List[str]] = None, label: str = '读取数据',
+                  stride: Union[int, str] = 1, maxSnapshots: Optional[int] = None):
+    """按时间顺序逐个读取时间范围内的输出文件, 每次只在内存中保留一个时间切片
+    
+    迭代期间报告进度(完成的时间切片数、读取速率与剩余时间), 调用者处理完一个时间切片后才计入完成;
+    Ctrl-C在时间切片之间停止迭代并抛出progress.Cancelled
+    
+    参数:
+        outn (str): 输出文件格式, 例如out2
+        t1 (Optional[float]): 起始时间, 如果为None则不设下限
+        t2 (Optional[float]): 结束时间, 如果为None则不设上限
+        quantities (Optional[List[str]]): 需要读取的物理量, 默认为密度、速度与磁场
+        label (str): 进度显示的名称, 例如"能谱"
+        stride (Union[int, str]): 每stride个时间切片取一个, 为auto时由hst估计的自关联时间确定
+        maxSnapshots (Optional[int]): 最多读取的时间切片数, 在时间范围内均匀抽取
+        
+    返回:
+        Iterator[Tuple[str, float, dict]]: (文件路径, 时间, 数据), 物理量保持athdf的 (z, y, x) 顺序
+    """
+    if quantities is None:
+        quantities = ['rho', 'vel1', 'vel2', 'vel3', 'Bcc1', 'Bcc2', 'Bcc3']
+    
+    # 构建文件模式
+    pattern = os.path.join(os.getcwd(), 'outputs', f'*.{outn}.*.athdf')
+    
+    # 获取所有匹配的文件
+    with profiling.stage('glob', outn=outn):
+        outn_files = sorted(glob.glob(pattern))
+    if not outn_files:
+        print(f"错误: 未找到任何形如 {pattern} 的文件", flush=True)
+        return
+    
+    # 先只读取时间, 时间范围外的文件不读取物理量, 同时得到进度的总数
+    selected = []
+    for file in outn_files:
+        with profiling.stage('metadata', file=os.path.basename(file)):
+            time = snapshotTime(file)
+        if time is None or (t1 is not None and time < t1) or (t2 is not None and time > t2):
+            continue
+        selected.append((file, time))
+    
+    # 相邻的时间切片高度相关, 抽样减少读取量而基本不损失统计信息
+    if stride == 'auto':
+        stride = autoStride([time for _, time in selected])
+    if stride != 1 or maxSnapshots is not None:
+        total = len(selected)
+        selected = subsample(selected, stride, maxSnapshots)
+        print(f"时间切片抽样: 从 {total} 个中选取 {len(selected)} 个", flush=True)
+    
+    bar = progress.Progress(label, len(selected))
+    with progress.cancellable():
+        try:
+            for file, time in selected:
+                progress.checkCancelled()
+                name = os.path.basename(file)
+                
+                try:
+                    with profiling.stage('read', file=name, time=time) as s:
+                        data = readAthdf(file, quantities)
+                        nbytes = sum(data[q].nbytes for q in quantities)
+                        s.addBytes(nbytes)
+                except ImportError as e:
+                    print(f"错误: {e}", flush=True)
+                    return
+                except KeyError as e:
+                    print(f"警告: 文件 {file} 中缺少必要的物理量: {e}", flush=True)
+                    bar.update(0, f"跳过 t = {time}")
+                    continue
+                except Exception as e:
+                    print(f"警告: 读取文件 {file} 时出错: {e}", flush=True)
+                    bar.update(0, f"跳过 t = {time}")
+                    continue
+                
+                yield file, time, data
+                bar.update(nbytes, f"t = {time}")
+        finally:
+            bar.close()
+        progress.checkCancelled()
+
+def output2turbulence(outn: str, t1: float, t2: Optional[float] = None,
+                      stride: Union[int, str] = 1, maxSnapshots: Optional[int] = None) -> Optional['Turbulence']:
     """从输出文件中提取所有物理场数据并构建Turbulence对象
     
     参数:
         outn (str): 输出文件格式, 例如out2
         t1 (float): 起始时间
         t2 (Optional[float]): 结束时间, 如果为None则不设上限
+        stride (Union[int, str]): 每stride个时间切片取一个, 为auto时由hst估计的自关联时间确定
+        maxSnapshots (Optional[int]): 最多使用的时间切片数, 在时间范围内均匀抽取
         
     返回:
         Optional[Turbulence]: Turbulence对象, 如果提取失败则返回None
     """
+    import numpy as np
+    from pymri import ScalarField, VectorField, Turbulence
+    
     print("\n正在提取基本参数...", flush=True)
     
-    # 获取box尺寸
-    box = getBox(outn)
+    with profiling.stage('parameters'):
+        # 获取box尺寸
+        box = getBox(outn)
+            
+        # 获取角速度
+        Omega = getOmega()
         
-    # 获取角速度
-    Omega = getOmega()
-    
-    # 获取声速
-    Cs = getCs()
-    
-    # 获取剪切参量q
-    q = getShear()
+        # 获取声速
+        Cs = getCs()
+        
+        # 获取剪切参量q
+        q = getShear()
 
-    # 获取粘性系数和磁扩散系数
-    nu, eta = getDiffusivity()
+        # 获取粘性系数和磁扩散系数
+        nu, eta = getDiffusivity()
 
     print("正在提取目标数据...", flush=True)
         
@@ -314,66 +549,43 @@ def output2turbulence(outn: str, t1: float, t2: Optional[float] = None) -> Optio
     current_path = os.getcwd()
     case = os.path.basename(current_path)
     
-    # 构建文件模式
-    pattern = os.path.join(current_path, 'outputs', f'*.{outn}.*.athdf')
-    
-    # 获取所有匹配的文件
-    outn_files = sorted(glob.glob(pattern))
-    if not outn_files:
-        print(f"错误: 未找到任何形如 {pattern} 的文件", flush=True)
-        return None
-    
     # 存储提取的数据
     rhos : List[ScalarField] = []
     Vs   : List[VectorField] = []
     Bs   : List[VectorField] = []
     times: List[float]       = []
     
-    # 遍历所有输出文件, 提取目标数据
-    for file in outn_files:
-        try:
-            data = athena_read.athdf(file)
-            time = float(data['Time'])
-            
-            # 检查时间是否在范围内
-            if t1 <= time and (t2 is None or time <= t2):
-                try:
-                    # 提取密度场
-                    rho_data = data['rho'].astype(np.float64)
-                    rho_data = np.transpose(rho_data, (2, 1, 0)) # 将数据从 (z, y, x) 转换为 (x, y, z)
-                    rho = ScalarField(rho_data, box)
-                    
-                    # 提取速度场
-                    vx = data['vel1'].astype(np.float64)
-                    vy = data['vel2'].astype(np.float64)
-                    vz = data['vel3'].astype(np.float64)
-                    vx = np.transpose(vx, (2, 1, 0)) # 将数据从 (z, y, x) 转换为 (x, y, z)
-                    vy = np.transpose(vy, (2, 1, 0))
-                    vz = np.transpose(vz, (2, 1, 0))
-                    V = VectorField(vx, vy, vz, box)
-                    
-                    # 提取磁场
-                    Bx = data['Bcc1'].astype(np.float64)
-                    By = data['Bcc2'].astype(np.float64)
-                    Bz = data['Bcc3'].astype(np.float64)
-                    Bx = np.transpose(Bx, (2, 1, 0)) # 将数据从 (z, y, x) 转换为 (x, y, z)
-                    By = np.transpose(By, (2, 1, 0))
-                    Bz = np.transpose(Bz, (2, 1, 0))
-                    B = VectorField(Bx, By, Bz, box)
-                    
-                    # 存储数据
-                    rhos.append(rho)
-                    Vs.append(V)
-                    Bs.append(B)
-                    times.append(time)
-                    
-                except KeyError as e:
-                    print(f"警告: 文件 {file} 中缺少必要的物理量: {e}", flush=True)
-                    continue
-                
-        except Exception as e:
-            print(f"警告: 读取文件 {file} 时出错: {e}", flush=True)
-            continue
+    # 遍历时间范围内的输出文件, 提取目标数据
+    for file, time, data in iterSnapshots(outn, t1, t2, stride=stride, maxSnapshots=maxSnapshots):
+        with profiling.stage('cast', time=time):
+            # 提取密度场
+            rho_data = data['rho'].astype(np.float64)
+            rho_data = np.transpose(rho_data, (2, 1, 0)) # 将数据从 (z, y, x) 转换为 (x, y, z)
+            rho = ScalarField(rho_data, box)
+        
+            # 提取速度场
+            vx = data['vel1'].astype(np.float64)
+            vy = data['vel2'].astype(np.float64)
+            vz = data['vel3'].astype(np.float64)
+            vx = np.transpose(vx, (2, 1, 0)) # 将数据从 (z, y, x) 转换为 (x, y, z)
+            vy = np.transpose(vy, (2, 1, 0))
+            vz = np.transpose(vz, (2, 1, 0))
+            V = VectorField(vx, vy, vz, box)
+        
+            # 提取磁场
+            Bx = data['Bcc1'].astype(np.float64)
+            By = data['Bcc2'].astype(np.float64)
+            Bz = data['Bcc3'].astype(np.float64)
+            Bx = np.transpose(Bx, (2, 1, 0)) # 将数据从 (z, y, x) 转换为 (x, y, z)
+            By = np.transpose(By, (2, 1, 0))
+            Bz = np.transpose(Bz, (2, 1, 0))
+            B = VectorField(Bx, By, Bz, box)
+        
+        # 存储数据
+        rhos.append(rho)
+        Vs.append(V)
+        Bs.append(B)
+        times.append(time)
     
     if not times:
         print(f"错误: 在时间范围 [{t1}, {t2 if t2 is not None else '∞'}] 内未找到有效数据", flush=True)
@@ -383,18 +595,19 @@ def output2turbulence(outn: str, t1: float, t2: Optional[float] = None) -> Optio
     
     # 构建并返回Turbulence对象
     try:
-        turbulence = Turbulence(case  = case, 
-                                rhos  = rhos, 
-                                ps    = None, 
-                                Vs    = Vs, 
-                                Bs    = Bs, 
-                                times = times, 
-                                Omega = Omega, 
-                                q     = q, 
-                                EoS   = 'isothermal', 
-                                Cs    = Cs, 
-                                nu    = nu, 
-                                eta   = eta)
+        with profiling.stage('turbulence'):
+            turbulence = Turbulence(case  = case, 
+                                    rhos  = rhos, 
+                                    ps    = None, 
+                                    Vs    = Vs, 
+                                    Bs    = Bs, 
+                                    times = times, 
+                                    Omega = Omega, 
+                                    q     = q, 
+                                    EoS   = 'isothermal', 
+                                    Cs    = Cs, 
+                                    nu    = nu, 
+                                    eta   = eta)
         return turbulence
     except Exception as e:
         print(f"错误: 构建Turbulence对象时出错: {e}", flush=True)
@@ -407,6 +620,10 @@ def test():
 
     测试命令: 在case目录中调用 python ../../../src/post/preprocess.py
     '''
+    import numpy as np
+    from pymri import ScalarField
+    from pymri.turbulence import avg
+
     outn = 'prim'
     t1 = 50
     t2 = 100
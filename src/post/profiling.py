@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后处理性能剖析模块, 按阶段记录耗时、读取字节数与内存
+
+主要功能:
+1. stage(name, **args) 上下文管理器: 记录一个阶段(例如一个时间切片的读取)的墙钟时间、
+   读取的字节数、结束时的RSS与峰值RSS, 阶段可以嵌套
+2. 程序结束时按阶段名称汇总, 打印次数、总耗时、读取速率与峰值内存
+3. 可选写出Chrome trace格式的JSON, 用chrome://tracing或Perfetto查看每个阶段的时间线
+
+启用方式: 后处理脚本的 --profile [TRACE.json] 参数, 或环境变量ATHENAUI_PROFILE
+(为1时只打印汇总表, 为文件路径时同时写出trace)。未启用时stage返回一个共用的空对象,
+不计时也不分配内存, 开销可以忽略
+"""
+
+import atexit
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# 是否已启用, 以及trace文件路径
+_enabled = False
+_tracePath: Optional[str] = None
+
+# 已结束的阶段: (名称, 开始时间, 耗时, 字节数, RSS, 峰值RSS, 参数)
+_records: List[tuple] = []
+
+# 程序启动(启用剖析)的时刻, trace中的时间以此为零点
+_origin = 0.0
+
+
+def _currentRSS() -> float:
+    """当前RSS(MB), 在没有/proc的系统上返回峰值RSS"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (OSError, ValueError, IndexError):
+        return _peakRSS()
+
+
+def _peakRSS() -> float:
+    """峰值RSS(MB), Linux上ru_maxrss的单位为KB, macOS上为字节"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024**2 if sys.platform == 'darwin' else rss / 1024
+
+
+class _NullStage:
+    """未启用剖析时使用的空阶段"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def addBytes(self, nbytes: int) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """一次阶段记录"""
+
+    __slots__ = ('name', 'args', 'start', 'nbytes')
+
+    def __init__(self, name: str, args: Dict):
+        self.name = name
+        self.args = args
+        self.nbytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _records.append((self.name, self.start - _origin, elapsed, self.nbytes,
+                         _currentRSS(), _peakRSS(), self.args))
+        return False
+
+    def addBytes(self, nbytes: int) -> None:
+        """记录该阶段读取的字节数"""
+        self.nbytes += int(nbytes)
+
+
+def stage(name: str, **args):
+    """记录一个阶段, 用法: with profiling.stage('read', time=t) as s: ...; s.addBytes(n)"""
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, args)
+
+
+def enabled() -> bool:
+    """是否已启用剖析"""
+    return _enabled
+
+
+def enable(trace: Optional[str] = None) -> None:
+    """启用剖析, 程序结束时打印汇总表, trace不为空时写出Chrome trace"""
+    global _enabled, _tracePath, _origin
+    if not _enabled:
+        _origin = time.perf_counter()
+        atexit.register(report)
+    _enabled = True
+    if trace:
+        _tracePath = trace
+
+
+def setup(profile: Optional[str] = None) -> None:
+    """根据 --profile 参数与环境变量ATHENAUI_PROFILE启用剖析
+
+    参数:
+        profile (Optional[str]): --profile 参数的值, None为未指定, 空字符串为只打印汇总表
+    """
+    if profile is None:
+        profile = os.environ.get('ATHENAUI_PROFILE')
+        if profile in (None, '', '0'):
+            return
+        if profile == '1':
+            profile = ''
+    enable(profile or None)
+
+
+def summary() -> List[Dict]:
+    """按阶段名称汇总, 顺序为各阶段第一次出现的顺序"""
+    stats: Dict[str, Dict] = {}
+    for name, start, elapsed, nbytes, rss, peak, args in _records:
+        entry = stats.setdefault(name, {'name': name, 'count': 0, 'total': 0.0, 'max': 0.0,
+                                        'bytes': 0, 'peak_rss_mb': 0.0})
+        entry['count'] += 1
+        entry['total'] += elapsed
+        entry['max'] = max(entry['max'], elapsed)
+        entry['bytes'] += nbytes
+        entry['peak_rss_mb'] = max(entry['peak_rss_mb'], peak)
+    return list(stats.values())
+
+
+def writeTrace(path: str) -> None:
+    """写出Chrome trace格式(完整事件"X")的JSON文件, 时间单位为微秒"""
+    pid = os.getpid()
+    tid = threading.get_ident()
+    events = []
+    for name, start, elapsed, nbytes, rss, peak, args in _records:
+        eventArgs = {key: value if isinstance(value, (int, float, str)) else str(value)
+                     for key, value in args.items()}
+        eventArgs.update({'bytes': nbytes, 'rss_mb': round(rss, 1), 'peak_rss_mb': round(peak, 1)})
+        events.append({'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': elapsed * 1e6,
+                       'pid': pid, 'tid': tid, 'args': eventArgs})
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def report() -> None:
+    """打印汇总表, 并按需写出trace"""
+    if not _records:
+        return
+    print(f"\n性能剖析 (总耗时 {time.perf_counter() - _origin:.2f} s):", flush=True)
+    print(f"{'stage':<20}{'count':>7}{'total(s)':>11}{'mean(s)':>10}{'max(s)':>10}"
+          f"{'read(MB)':>11}{'MB/s':>9}{'peak RSS(MB)':>14}")
+    for entry in summary():
+        mb = entry['bytes'] / 1024**2
+        rate = f"{mb / entry['total']:>9.1f}" if entry['bytes'] and entry['total'] > 0 else f"{'-':>9}"
+        print(f"{entry['name']:<20}{entry['count']:>7}{entry['total']:>11.3f}"
+              f"{entry['total'] / entry['count']:>10.4f}{entry['max']:>10.4f}"
+              f"{mb:>11.1f}{rate}{entry['peak_rss_mb']:>14.1f}")
+    sys.stdout.flush()
+
+    if _tracePath:
+        try:
+            writeTrace(_tracePath)
+            print(f"trace已保存: {_tracePath}", flush=True)
+        except OSError as e:
+            print(f"警告: 无法写出trace文件 {_tracePath}: {e}", flush=True)
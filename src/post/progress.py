@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后处理进度报告与取消模块
+
+主要功能:
+1. Progress: 按时间切片报告进度(已完成/总数)、读取速率与预计剩余时间(ETA),
+   输出为终端时显示单行进度条, 不是终端时(srun、重定向到日志文件)按时间间隔打印日志行
+2. cancellable() 期间第一次Ctrl-C只设置取消标志, 由checkCancelled()在时间切片之间抛出Cancelled,
+   第二次Ctrl-C立即中断
+3. artifacts(*paths): 被取消或出错时删除本次写出的不完整输出文件
+
+显示方式可以由环境变量ATHENAUI_PROGRESS指定: bar、log或off
+"""
+
+import contextlib
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Optional
+
+# 日志行模式下两次输出的最小间隔(秒)
+LOG_INTERVAL = 5.0
+
+# 进度条宽度(字符)
+BAR_WIDTH = 30
+
+# 是否已请求取消
+_cancelRequested = False
+
+
+class Cancelled(KeyboardInterrupt):
+    """用户通过Ctrl-C取消计算, 继承KeyboardInterrupt, 不会被 except Exception 捕获"""
+
+
+def _mode() -> str:
+    """进度显示方式: bar、log或off"""
+    mode = os.environ.get('ATHENAUI_PROGRESS', '').lower()
+    if mode in ('bar', 'log', 'off'):
+        return mode
+    return 'bar' if sys.stdout.isatty() else 'log'
+
+
+def formatDuration(seconds: float) -> str:
+    """格式化时长, 例如 01:23 或 1:02:03"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class Progress:
+    """按时间切片报告进度
+
+    用法:
+        bar = Progress('能谱', total)
+        for ...:
+            ...
+            bar.update(nbytes, f"t = {time}")
+        bar.close()
+    """
+
+    def __init__(self, label: str, total: int, unit: str = '切片'):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.mode = _mode()
+        self.done = 0
+        self.nbytes = 0
+        self.info = ''
+        self.start = time.perf_counter()
+        self._last = None
+        self._drawn = False
+
+    def update(self, nbytes: int = 0, info: str = '') -> None:
+        """完成一个时间切片, nbytes为读取的字节数, info为附加信息(例如当前时间)"""
+        self.done += 1
+        self.nbytes += int(nbytes)
+        self.info = info
+        now = time.perf_counter()
+        if (self.mode == 'bar' or self._last is None or self.done >= self.total
+                or now - self._last >= LOG_INTERVAL):
+            self._last = now
+            self._render(now)
+
+    def line(self, now: Optional[float] = None) -> str:
+        """当前进度的文字描述"""
+        elapsed = (now if now is not None else time.perf_counter()) - self.start
+        rate = self.nbytes / 1024**2 / elapsed if elapsed > 0 else 0.0
+        eta = formatDuration(elapsed / self.done * (self.total - self.done)) if self.done else '--:--'
+        text = (f"{self.label}: {self.done}/{self.total} {self.unit}  {rate:.1f} MB/s  "
+                f"已用 {formatDuration(elapsed)}  剩余 {eta}")
+        return f"{text}  {self.info}" if self.info else text
+
+    def _render(self, now: float) -> None:
+        if self.mode == 'off':
+            return
+        if self.mode == 'log':
+            print(f"   {self.line(now)}", flush=True)
+            return
+        filled = BAR_WIDTH * self.done // max(self.total, 1)
+        bar = '#' * filled + '-' * (BAR_WIDTH - filled)
+        # \033[K 清除行尾残留的旧内容
+        sys.stdout.write(f"\r[{bar}] {self.line(now)}\033[K")
+        sys.stdout.flush()
+        self._drawn = True
+
+    def close(self) -> None:
+        """结束进度条, 使后续输出另起一行"""
+        if self._drawn:
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+            self._drawn = False
+
+
+def _handleInterrupt(signum, frame) -> None:
+    """第一次Ctrl-C请求取消, 第二次立即中断"""
+    global _cancelRequested
+    if _cancelRequested:
+        raise KeyboardInterrupt
+    _cancelRequested = True
+    print("\n正在取消, 将在当前时间切片完成后停止 (再次按Ctrl-C立即中断)", flush=True)
+
+
+@contextlib.contextmanager
+def cancellable():
+    """在此期间Ctrl-C只请求取消, 由checkCancelled()在安全的位置停止; 非主线程中不做处理"""
+    global _cancelRequested
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous = signal.signal(signal.SIGINT, _handleInterrupt)
+    if previous is not _handleInterrupt:
+        _cancelRequested = False
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def cancelRequested() -> bool:
+    """是否已请求取消"""
+    return _cancelRequested
+
+
+def checkCancelled() -> None:
+    """已请求取消时抛出Cancelled"""
+    if _cancelRequested:
+        raise Cancelled()
+
+
+def _mtime(path: str) -> Optional[int]:
+    """文件的修改时间(纳秒), 文件不存在时返回None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+@contextlib.contextmanager
+def artifacts(*paths: str):
+    """写出输出文件, 被取消或出错时删除其中本次新建或修改过的文件, 避免留下不完整的结果"""
+    before = {path: _mtime(path) for path in paths}
+    try:
+        yield
+    except BaseException:
+        for path in paths:
+            mtime = _mtime(path)
+            if mtime is not None and mtime != before[path]:
+                try:
+                    os.remove(path)
+                    print(f"已删除不完整的输出文件: {path}", flush=True)
+                except OSError:
+                    pass
+        raise
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+athdf重排模块, 将按meshblock存储的athdf输出重写为全局数组布局
+
+Athena++的athdf按 (变量, meshblock, nz, ny, nx) 存储, 读取时需要逐个meshblock拼接。
+重排后的文件仍是合法的athdf: 只有一个覆盖整个网格的meshblock, athena_read可以直接读取,
+preprocess.readAthdf则直接按变量读取全局数组, 不再需要拼接
+
+主要功能:
+1. 将所有meshblock拼接为全局数组, 按z方向的薄片分块(chunk), 适合读取整个变量或z方向切片
+2. 可选无损压缩: gzip、lzf, 或安装hdf5plugin时使用blosc
+3. 可选以单精度(FP32)存储
+4. 原地替换文件, 文件名不变, 后处理脚本的文件匹配规则无需修改
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+
+import retention
+
+# 重排文件的标记属性
+REPACKED_ATTR = 'AthenaUIRepacked'
+
+# 默认的分块大小(MB)
+DEFAULT_CHUNK_MB = 4
+
+
+def compressionOptions(compression: Optional[str], level: int) -> Optional[Dict]:
+    """生成h5py的压缩参数, blosc需要hdf5plugin, 不可用时返回None"""
+    if compression is None:
+        return {}
+    if compression == 'gzip':
+        return {'compression': 'gzip', 'compression_opts': level, 'shuffle': True}
+    if compression == 'lzf':
+        return {'compression': 'lzf', 'shuffle': True}
+    try:
+        import hdf5plugin
+    except ImportError:
+        print("错误: 使用blosc压缩需要安装hdf5plugin", flush=True)
+        return None
+    return dict(hdf5plugin.Blosc(cname='lz4', clevel=level, shuffle=hdf5plugin.Blosc.SHUFFLE))
+
+
+def slabDepth(nz: int, ny: int, nx: int, itemsize: int, chunkBytes: int) -> int:
+    """选择分块在z方向的厚度: 不超过chunkBytes且能整除nz的最大厚度"""
+    depth = max(min(chunkBytes // max(ny * nx * itemsize, 1), nz), 1)
+    while nz % depth != 0:
+        depth -= 1
+    return depth
+
+
+def isRepacked(path: str) -> bool:
+    """判断athdf文件是否已经重排"""
+    import h5py
+    with h5py.File(path, 'r') as f:
+        return bool(f.attrs.get(REPACKED_ATTR, False))
+
+
+def repackFile(path: str, fp32: bool = False, compression: Optional[str] = None,
+               level: int = 4, chunkMB: float = DEFAULT_CHUNK_MB) -> Optional[int]:
+    """将athdf文件重排为单个meshblock的全局数组布局
+
+    参数:
+        path (str): athdf文件路径
+        fp32 (bool): 是否以单精度存储物理量
+        compression (Optional[str]): 压缩方式, gzip、lzf或blosc, 为None时不压缩
+        level (int): 压缩等级
+        chunkMB (float): 每个分块的目标大小(MB)
+
+    返回:
+        Optional[int]: 重排后的文件大小(字节), 如果无法重排则返回None
+    """
+    import h5py
+
+    options = compressionOptions(compression, level)
+    if options is None:
+        return None
+
+    tmp = os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + '.tmp')
+    with h5py.File(path, 'r') as src:
+        if src.attrs.get(REPACKED_ATTR, False):
+            return os.path.getsize(path)
+
+        levels = src['Levels'][:]
+        if np.any(levels != levels[0]):
+            print(f"警告: {path} 使用了网格加密, 无法重排", flush=True)
+            return None
+
+        mbSize = [int(n) for n in src.attrs['MeshBlockSize']]          # (nx, ny, nz)
+        rootSize = [int(n) for n in src.attrs['RootGridSize']]         # (Nx, Ny, Nz)
+        locations = src['LogicalLocations'][:]                         # (meshblock, 3)
+        nblocks = len(locations)
+
+        try:
+            with h5py.File(tmp, 'w') as dst:
+                for key, value in src.attrs.items():
+                    dst.attrs[key] = value
+                dst.attrs['NumMeshBlocks'] = 1
+                dst.attrs['MeshBlockSize'] = np.array(rootSize, dtype=src.attrs['MeshBlockSize'].dtype)
+                dst.attrs[REPACKED_ATTR] = True
+                if fp32 or compression:
+                    dst.attrs[retention.TRANSCODED_ATTR] = True
+
+                dst.create_dataset('Levels', data=levels[:1])
+                dst.create_dataset('LogicalLocations', data=np.zeros((1, 3), dtype=locations.dtype))
+
+                # 坐标: 由各meshblock的坐标拼接为全局坐标
+                for axis in range(3):
+                    for kind, extra in (('f', 1), ('v', 0)):
+                        name = f'x{axis + 1}{kind}'
+                        if name not in src:
+                            continue
+                        coords = src[name][:]
+                        full = np.empty(rootSize[axis] + extra, dtype=coords.dtype)
+                        for b in range(nblocks):
+                            start = int(locations[b][axis]) * mbSize[axis]
+                            full[start:start + mbSize[axis] + extra] = coords[b]
+                        dst.create_dataset(name, data=full[np.newaxis])
+
+                # 物理量: 每次只拼接一层meshblock(z方向厚度为一个meshblock), 整块写入
+                nx, ny, nz = rootSize
+                layers: Dict[int, list] = {}
+                for b in range(nblocks):
+                    layers.setdefault(int(locations[b][2]), []).append(b)
+
+                for name in src.attrs['DatasetNames']:
+                    name = name.decode() if isinstance(name, bytes) else name
+                    dataset = src[name]
+                    dtype = np.float32 if fp32 and dataset.dtype == np.float64 else dataset.dtype
+                    depth = slabDepth(mbSize[2], ny, nx, np.dtype(dtype).itemsize, int(chunkMB * 1024 * 1024))
+                    out = dst.create_dataset(name, shape=(dataset.shape[0], 1, nz, ny, nx), dtype=dtype,
+                                             chunks=(1, 1, depth, ny, nx), **options)
+                    for key, value in dataset.attrs.items():
+                        out.attrs[key] = value
+
+                    for i in range(dataset.shape[0]):
+                        for k, blocks in sorted(layers.items()):
+                            slab = np.empty((mbSize[2], ny, nx), dtype=dtype)
+                            for b in blocks:
+                                x0 = int(locations[b][0]) * mbSize[0]
+                                y0 = int(locations[b][1]) * mbSize[1]
+                                slab[:, y0:y0 + mbSize[1], x0:x0 + mbSize[0]] = dataset[i, b]
+                            out[i, 0, k * mbSize[2]:(k + 1) * mbSize[2]] = slab
+        except BaseException:
+            # 重排失败或被中断时删除不完整的临时文件, 原文件保持不变
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='athdf重排工具')
+    parser.add_argument('--outn', type=str, help='输出文件格式, 默认为所有athdf输出')
+    parser.add_argument('--t1', type=float, help='开始时间')
+    parser.add_argument('--t2', type=float, help='结束时间')
+    parser.add_argument('--fp32', action='store_true', help='以单精度存储物理量')
+    parser.add_argument('--compress', choices=['gzip', 'lzf', 'blosc'], help='无损压缩方式')
+    parser.add_argument('--level', type=int, default=4, help='压缩等级')
+    parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_MB, help='每个分块的目标大小(MB)')
+    parser.add_argument('--dry-run', action='store_true', help='只列出将要重排的文件')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    outputsDir = os.path.join(os.getcwd(), 'outputs')
+    if not os.path.isdir(outputsDir):
+        print(f"错误: 未找到outputs目录: {outputsDir}", flush=True)
+        sys.exit(1)
+
+    before = after = count = 0
+    for outn, files in sorted(retention.listDumps(outputsDir).items()):
+        if args.outn and outn != args.outn:
+            continue
+        # 最新的文件可能仍在写入, 不做重排
+        for dump in files[:-1]:
+            time = retention.dumpTime(dump['path'])
+            if time is None or (args.t1 is not None and time < args.t1) or (args.t2 is not None and time > args.t2):
+                continue
+            if isRepacked(dump['path']):
+                continue
+
+            name = os.path.basename(dump['path'])
+            if args.dry_run:
+                print(f"   重排 {name} ({retention.formatBytes(dump['size'])})", flush=True)
+                count += 1
+                continue
+
+            size = os.path.getsize(dump['path'])
+            try:
+                result = repackFile(dump['path'], args.fp32, args.compress, args.level, args.chunk_mb)
+            except (OSError, KeyError, ValueError) as e:
+                print(f"警告: 重排 {name} 时出错: {e}", flush=True)
+                continue
+            if result is None:
+                continue
+            print(f"   已重排 {name}: {retention.formatBytes(size)} -> {retention.formatBytes(result)}", flush=True)
+            before += size
+            after += result
+            count += 1
+
+    if args.dry_run:
+        print(f"\n将重排 {count} 个文件", flush=True)
+    else:
+        print(f"\n已重排 {count} 个文件: {retention.formatBytes(before)} -> {retention.formatBytes(after)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
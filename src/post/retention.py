@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+输出文件保留策略模块, 用于控制case的outputs目录大小
+
+主要功能:
+1. 稀疏化: 时间早于T的athdf输出只保留每k个中的一个
+2. 只保留最新的M个restart文件
+3. 将保留下来的较早athdf输出转为单精度(FP32)或按meshblock分块压缩的HDF5
+4. --dry-run时只报告将删除或转换的文件与预计释放的空间
+
+为保证后处理脚本可用, 每种输出的第一个文件(00000, preprocess.getBox依赖它)与
+最新的文件(可能仍在写入)始终保留; 删除athdf时一并删除对应的.xdmf文件,
+删除restart文件后刷新restart文件目录(.rst_catalog.json)
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+# 添加src/run路径, 用于读取restart文件目录与case路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../run')))
+
+import checkpoint
+import perf
+import preprocess
+
+# athdf输出文件名: "problem.out2.00010.athdf", 输出格式也可以是命名的file_id(例如prim), 与catalog.parseName一致
+ATHDF_NAME = re.compile(r'^(.+)\.([^.]+)\.(\d+)\.athdf$')
+
+# 已转换文件的标记属性, 避免重复转换
+TRANSCODED_ATTR = 'AthenaUITranscoded'
+
+
+def formatBytes(size: float) -> str:
+    """将字节数格式化为便于阅读的字符串"""
+    return checkpoint.formatSize(size)
+
+
+def listDumps(outputsDir: str) -> Dict[str, List[Dict]]:
+    """按输出格式列出athdf文件, 每种输出按编号排序
+
+    返回:
+        Dict[str, List[Dict]]: {outn: [{path, index, size}]}
+    """
+    dumps: Dict[str, List[Dict]] = {}
+    with os.scandir(outputsDir) as it:
+        for entry in it:
+            match = ATHDF_NAME.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            size = entry.stat().st_size
+            xdmf = entry.path + '.xdmf'
+            if os.path.isfile(xdmf):
+                size += os.path.getsize(xdmf)
+            dumps.setdefault(match.group(2), []).append(
+                {'path': entry.path, 'index': int(match.group(3)), 'size': size})
+    for files in dumps.values():
+        files.sort(key=lambda d: d['index'])
+    return dumps
+
+
+def dumpTime(path: str) -> Optional[float]:
+    """读取athdf文件的模拟时间(只读取文件属性)"""
+    import h5py
+    try:
+        with h5py.File(path, 'r') as f:
+            return float(f.attrs['Time'])
+    except (OSError, KeyError) as e:
+        print(f"警告: 无法读取 {path} 的时间: {e}", flush=True)
+        return None
+
+
+def isTranscoded(path: str) -> bool:
+    """判断athdf文件是否已经转换过"""
+    import h5py
+    with h5py.File(path, 'r') as f:
+        return bool(f.attrs.get(TRANSCODED_ATTR, False))
+
+
+def transcode(path: str, fp32: bool, compression: Optional[str], level: int = 4) -> int:
+    """转换athdf文件, 保持Athena++的meshblock布局, athena_read可直接读取
+
+    参数:
+        path (str): athdf文件路径
+        fp32 (bool): 是否将双精度的物理量转为单精度
+        compression (Optional[str]): 压缩方式, gzip或lzf, 为None时不压缩
+        level (int): gzip压缩等级
+
+    返回:
+        int: 转换后的文件大小(字节)
+    """
+    import h5py
+    import numpy as np
+
+    # repack.py --compress blosc 重排的文件需要hdf5plugin的过滤器才能读取
+    preprocess.registerFilters()
+
+    tmp = os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + '.tmp')
+    options = {}
+    if compression:
+        options = {'compression': compression, 'shuffle': True}
+        if compression == 'gzip':
+            options['compression_opts'] = level
+
+    try:
+        with h5py.File(path, 'r') as src, h5py.File(tmp, 'w') as dst:
+            for key, value in src.attrs.items():
+                dst.attrs[key] = value
+            for name, dataset in src.items():
+                # 物理量的形状为 (变量, meshblock, nz, ny, nx), 坐标等其余数据集原样复制
+                if dataset.ndim != 5:
+                    src.copy(dataset, dst, name=name)
+                    continue
+                dtype = np.float32 if fp32 and dataset.dtype == np.float64 else dataset.dtype
+                # 沿用已有的分块方式(例如repack.py重排后的文件), 否则每个meshblock一个分块
+                out = dst.create_dataset(name, shape=dataset.shape, dtype=dtype,
+                                         chunks=dataset.chunks or (1, 1) + dataset.shape[2:], **options)
+                for key, value in dataset.attrs.items():
+                    out.attrs[key] = value
+                # 按变量逐个复制, 避免一次读入整个文件
+                for i in range(dataset.shape[0]):
+                    out[i] = dataset[i].astype(dtype)
+            dst.attrs[TRANSCODED_ATTR] = True
+    except BaseException:
+        # 转换失败或被中断时删除不完整的临时文件, 原文件保持不变
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def planCase(outputsDir: str, every: int, before: Optional[float], keepRst: Optional[int],
+             transcodeBefore: Optional[float]) -> Dict[str, List[Dict]]:
+    """根据保留策略确定要删除与转换的文件
+
+    参数:
+        outputsDir (str): outputs目录
+        every (int): 时间早于before的athdf输出每every个保留一个, 为1时不稀疏化
+        before (Optional[float]): 稀疏化的时间上限, 为None时对所有输出稀疏化
+        keepRst (Optional[int]): 保留的restart文件个数, 为None时不删除restart文件
+        transcodeBefore (Optional[float]): 时间早于该值的athdf输出需要转换, 为None时不转换
+
+    返回:
+        Dict[str, List[Dict]]: {'delete': [...], 'transcode': [...]}
+    """
+    delete: List[Dict] = []
+    convert: List[Dict] = []
+
+    for outn, files in sorted(listDumps(outputsDir).items()):
+        # 第一个文件与最新的文件始终保留
+        for dump in files[1:-1]:
+            needTime = (every > 1 and before is not None) or transcodeBefore is not None
+            time = dumpTime(dump['path']) if needTime else None
+            if needTime and time is None:
+                continue
+            if every > 1 and dump['index'] % every != 0 and (before is None or time < before):
+                delete.append(dump)
+            elif transcodeBefore is not None and time < transcodeBefore and not isTranscoded(dump['path']):
+                convert.append(dump)
+
+    if keepRst is not None:
+        restarts = checkpoint.listRestarts(outputsDir)
+        for restart in restarts[:max(len(restarts) - keepRst, 0)]:
+            delete.append({'path': restart['path'], 'size': restart['size']})
+
+    return {'delete': delete, 'transcode': convert}
+
+
+def applyPlan(outputsDir: str, plan: Dict[str, List[Dict]], fp32: bool,
+              compression: Optional[str], level: int) -> int:
+    """执行保留策略, 返回实际释放的字节数"""
+    reclaimed = 0
+    for item in plan['delete']:
+        for path in (item['path'], item['path'] + '.xdmf'):
+            if os.path.isfile(path):
+                os.remove(path)
+        reclaimed += item['size']
+
+    for item in plan['transcode']:
+        before = os.path.getsize(item['path'])
+        try:
+            after = transcode(item['path'], fp32, compression, level)
+        except (OSError, ValueError) as e:
+            print(f"警告: 转换 {item['path']} 时出错: {e}", flush=True)
+            continue
+        reclaimed += before - after
+        print(f"   已转换 {os.path.basename(item['path'])}: {formatBytes(before)} -> {formatBytes(after)}", flush=True)
+
+    # 刷新restart文件目录, 移除已删除的restart文件
+    checkpoint.listRestarts(outputsDir)
+    return reclaimed
+
+
+def estimateTranscode(items: List[Dict], fp32: bool) -> int:
+    """估计转换释放的字节数: 双精度转单精度时数据量减半, 压缩率无法预先估计"""
+    return sum(item['size'] // 2 for item in items) if fp32 else 0
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='输出文件保留策略工具')
+    parser.add_argument('cases', nargs='*', help='case名称, 默认为当前目录')
+    parser.add_argument('--all', action='store_true', help='处理simulations/shearingBox下的所有case')
+    parser.add_argument('--every', type=int, default=1, help='时间早于--before的athdf输出每k个保留一个')
+    parser.add_argument('--before', type=float, help='稀疏化的时间上限, 默认对所有输出稀疏化')
+    parser.add_argument('--keep-rst', type=int, help='只保留最新的M个restart文件')
+    parser.add_argument('--fp32', action='store_true', help='将较早的athdf输出转为单精度')
+    parser.add_argument('--compress', choices=['gzip', 'lzf'], help='将较早的athdf输出按meshblock分块压缩')
+    parser.add_argument('--level', type=int, default=4, help='gzip压缩等级')
+    parser.add_argument('--transcode-before', type=float,
+                        help='转换时间早于该值的athdf输出, 默认与--before相同')
+    parser.add_argument('--dry-run', action='store_true', help='只报告将删除或转换的文件与预计释放的空间')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    if args.every < 1:
+        print("错误: --every必须为正整数", flush=True)
+        sys.exit(1)
+    if args.keep_rst is not None and args.keep_rst < 1:
+        print("错误: --keep-rst至少为1, 否则将无法继续运行", flush=True)
+        sys.exit(1)
+
+    transcodeBefore = None
+    if args.fp32 or args.compress:
+        transcodeBefore = args.transcode_before if args.transcode_before is not None else args.before
+        if transcodeBefore is None:
+            transcodeBefore = float('inf')
+
+    if args.all:
+        simulationsDir = perf.getSimulationsDir()
+        caseDirs = sorted(os.path.join(simulationsDir, case) for case in os.listdir(simulationsDir)
+                          if os.path.isdir(os.path.join(simulationsDir, case, 'outputs')))
+    elif args.cases:
+        caseDirs = [os.path.join(perf.getSimulationsDir(), case) for case in args.cases]
+    else:
+        caseDirs = [os.getcwd()]
+
+    total = 0
+    for caseDir in caseDirs:
+        outputsDir = os.path.join(caseDir, 'outputs')
+        if not os.path.isdir(outputsDir):
+            print(f"错误: {caseDir} 中没有outputs目录", flush=True)
+            continue
+
+        plan = planCase(outputsDir, args.every, args.before, args.keep_rst, transcodeBefore)
+        deleteBytes = sum(item['size'] for item in plan['delete'])
+        print(f"{os.path.basename(caseDir)}: 删除 {len(plan['delete'])} 个文件 ({formatBytes(deleteBytes)}), "
+              f"转换 {len(plan['transcode'])} 个文件", flush=True)
+
+        if args.dry_run:
+            for item in plan['delete']:
+                print(f"   删除 {os.path.basename(item['path'])} ({formatBytes(item['size'])})")
+            for item in plan['transcode']:
+                print(f"   转换 {os.path.basename(item['path'])} ({formatBytes(item['size'])})")
+            total += deleteBytes + estimateTranscode(plan['transcode'], args.fp32)
+        else:
+            total += applyPlan(outputsDir, plan, args.fp32, args.compress, args.level)
+
+    if args.dry_run:
+        note = ", 不含压缩节省的空间" if args.compress else ""
+        print(f"\n预计释放: {formatBytes(total)}{note}", flush=True)
+    else:
+        print(f"\n已释放: {formatBytes(total)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
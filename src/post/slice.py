@@ -6,32 +6,50 @@ import os
 pymri_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../PyMRI'))
 sys.path.insert(0, pymri_path)
 
-from pymri import *
+# PyMRI、numpy与matplotlib的导入较慢, 只在计算时导入, --help与参数检查可以立即返回
 import preprocess
+import profiling
+import progress
 
-def parse_args():
-    """解析命令行参数"""
+def parse_args(argv=None):
+    """解析命令行参数, argv为None时使用sys.argv"""
     parser = argparse.ArgumentParser(description='切片图绘制工具')
     parser.add_argument('--outn', type=str, required=True, help='输出文件格式')
     parser.add_argument('--t1', type=float, help='开始时间')
     parser.add_argument('--t2', type=float, help='结束时间')
-    return parser.parse_args()
+    parser.add_argument('--stride', type=preprocess.parseStride, default=1,
+                        help='每stride个时间切片取一个, auto为由hst文件估计的自关联时间确定步长')
+    parser.add_argument('--max-snapshots', type=preprocess.parseCount,
+                        help='最多使用的时间切片数, 在时间范围内均匀抽取')
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help='记录各阶段的耗时、读取量与内存并打印汇总表, 指定TRACE时同时写出Chrome trace JSON')
+    args = parser.parse_args(argv)
+    if args.t1 is not None and args.t2 is not None and args.t1 > args.t2:
+        parser.error(f"开始时间 {args.t1} 大于结束时间 {args.t2}")
+    return args
 
-def main():
-    """主函数"""
+def main(argv=None):
+    """主函数, argv为命令行参数列表, 供TUI在同一进程中调用"""
     # 解析命令行参数
-    args = parse_args()
+    args = parse_args(argv)
+    profiling.setup(args.profile)
     
     try:
+        from pymri import plot2dslice
+        
         # 从输出文件中提取湍流场数据
-        turbulence = preprocess.output2turbulence(args.outn, args.t1, args.t2)
+        turbulence = preprocess.output2turbulence(args.outn, args.t1, args.t2, args.stride, args.max_snapshots)
         
         # 绘制切片图
         print("正在绘制切片图...", flush=True)
-        plot2dslice(turbulence)
+        with profiling.stage('plot'):
+            plot2dslice(turbulence)
         
         print("绘制完成", flush=True)
         
+    except progress.Cancelled:
+        print("已取消", flush=True)
+        sys.exit(130)
     except Exception as e:
         print(f"绘制过程中发生错误：{e}")
         sys.exit(1)
@@ -73,6 +73,12 @@ if [ -n "$PYTHON_LOAD" ]; then
     eval "$PYTHON_LOAD"
 fi
 
+# repack.py --compress blosc 重排的文件需要hdf5plugin的过滤器, 通过HDF5_PLUGIN_PATH让athena_read与plot_slice.py也能读取
+PLUGIN_PATH=$(python -c "import hdf5plugin; print(hdf5plugin.PLUGIN_PATH)" 2>/dev/null)
+if [ -n "$PLUGIN_PATH" ]; then
+    export HDF5_PLUGIN_PATH="$PLUGIN_PATH${HDF5_PLUGIN_PATH:+:$HDF5_PLUGIN_PATH}"
+fi
+
 for file in outputs/*.${OUTPUT_FORMAT}.*.athdf; do
     echo "处理 $(basename $file) 中..."
     
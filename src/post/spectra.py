@@ -6,34 +6,82 @@ import os
 pymri_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../PyMRI'))
 sys.path.insert(0, pymri_path)
 
-from pymri import *
+# PyMRI、numpy与matplotlib的导入较慢, 只在计算时导入, --help与参数检查可以立即返回
 import preprocess
+import profiling
+import progress
 
-def parse_args():
-    """解析命令行参数"""
+def parse_args(argv=None):
+    """解析命令行参数, argv为None时使用sys.argv"""
     parser = argparse.ArgumentParser(description='湍流能谱计算工具')
     parser.add_argument('--outn', type=str, required=True, help='输出文件格式')
     parser.add_argument('--t1', type=float, help='开始时间')
     parser.add_argument('--t2', type=float, help='结束时间')
-    return parser.parse_args()
+    parser.add_argument('--stride', type=preprocess.parseStride, default=1,
+                        help='每stride个时间切片取一个, auto为由hst文件估计的自关联时间确定步长')
+    parser.add_argument('--max-snapshots', type=preprocess.parseCount,
+                        help='最多使用的时间切片数, 在时间范围内均匀抽取')
+    parser.add_argument('--engine', type=str, choices=['pymri', 'athenaui'], default='pymri',
+                        help='能谱计算引擎: pymri为PyMRI的EnergySpectra, athenaui为预计算球壳编号的向量化分箱')
+    parser.add_argument('--fft', type=str, choices=['numpy', 'scipy', 'pyfftw', 'auto'], default='numpy',
+                        help='athenaui引擎使用的FFT后端, auto依次尝试pyfftw、scipy、numpy')
+    parser.add_argument('--workers', type=int, help='FFT线程数, 默认为可用的CPU核数')
+    parser.add_argument('--remap', action='store_true',
+                        help='athenaui引擎在剪切坐标下计算能谱, 消除剪切周期边界在kx方向造成的展宽')
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help='记录各阶段的耗时、读取量与内存并打印汇总表, 指定TRACE时同时写出Chrome trace JSON')
+    args = parser.parse_args(argv)
+    if args.t1 is not None and args.t2 is not None and args.t1 > args.t2:
+        parser.error(f"开始时间 {args.t1} 大于结束时间 {args.t2}")
+    return args
 
-def main():
-    """主函数"""
+def main(argv=None):
+    """主函数, argv为命令行参数列表, 供TUI在同一进程中调用"""
     # 解析命令行参数
-    args = parse_args()
+    args = parse_args(argv)
+    profiling.setup(args.profile)
     
     try:
+        if args.engine == 'athenaui':
+            import fftbackend
+            import spectrum
+            
+            fft = fftbackend.getBackend(args.fft, args.workers)
+            print(f"FFT后端: {fft.name}, 线程数: {fft.workers}", flush=True)
+            if args.remap:
+                print("使用剪切坐标重映射", flush=True)
+            
+            # 逐个时间切片计算能谱, 不构建Turbulence对象
+            print("正在计算能谱...", flush=True)
+            result = spectrum.computeSpectra(args.outn, args.t1, args.t2, fft, args.remap,
+                                            args.stride, args.max_snapshots)
+            if result is None:
+                sys.exit(1)
+            
+            print("计算完成, 正在绘制能谱...", flush=True)
+            with profiling.stage('plot'):
+                output_file = spectrum.plotSpectra(result, os.path.basename(os.getcwd()))
+            print(f"能谱已保存: {output_file}", flush=True)
+            return
+        
+        from pymri import EnergySpectra
+        
         # 从输出文件中提取湍流场数据
-        turbulence = preprocess.output2turbulence(args.outn, args.t1, args.t2)
+        turbulence = preprocess.output2turbulence(args.outn, args.t1, args.t2, args.stride, args.max_snapshots)
         
         # 计算磁场能谱
         print("正在计算能谱...", flush=True)
-        spc = EnergySpectra(turbulence)
+        with profiling.stage('EnergySpectra'):
+            spc = EnergySpectra(turbulence)
         
         # 绘制能谱
         print("计算完成, 正在绘制能谱...", flush=True)
-        spc.plot()
+        with profiling.stage('plot'):
+            spc.plot()
         
+    except progress.Cancelled:
+        print("已取消", flush=True)
+        sys.exit(130)
     except Exception as e:
         print(f"计算过程中发生错误：{e}")
         sys.exit(1)
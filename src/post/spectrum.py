@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+能谱计算模块, 对球壳平均能谱做向量化的分箱
+
+主要功能:
+1. 对每个 (box, 网格) 只计算一次波数球壳编号与每个球壳的模式数, 并缓存
+2. 对一个矢量场的三个分量一次完成实数FFT(rfftn), 内存约为复数FFT的一半,
+   FFT由fftbackend提供的后端计算, 输入缓冲区在时间切片之间重复使用
+3. 用np.bincount按球壳编号累加功率谱, 不再对每个时间切片、每个分量重复计算|k|
+4. 可选的剪切重映射: 在傅里叶空间乘以与时间有关的相位, 得到剪切坐标下的能谱
+5. 逐个时间切片读取数据, 内存中只保留一个时间切片
+
+与PyMRI的EnergySpectra不同, 本模块直接使用preprocess.iterSnapshots读取的 (z, y, x) 数组,
+不需要构建Turbulence对象
+"""
+
+import functools
+import os
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+import fftbackend
+import preprocess
+import profiling
+import progress
+
+# 需要计算能谱的矢量场: 名称 -> athdf中三个分量的变量名
+FIELDS = {
+    'kinetic':  ('vel1', 'vel2', 'vel3'),
+    'magnetic': ('Bcc1', 'Bcc2', 'Bcc3'),
+}
+
+
+@functools.lru_cache(maxsize=4)
+def shellIndex(box: Tuple[float, float, float], shape: Tuple[int, int, int],
+               halfAxis: int = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """计算实数FFT输出中每个模式所属的波数球壳
+
+    参数:
+        box (Tuple[float, float, float]): 模拟box尺寸 (Lx, Ly, Lz)
+        shape (Tuple[int, int, int]): 数据形状, 与athdf相同的 (nz, ny, nx) 顺序
+        halfAxis (int): 实数FFT只保留一半模式的轴, 2为x(rfftn), 1为y(剪切重映射)
+
+    返回:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            index: 与FFT输出形状相同的球壳编号, 例如rfftn时为 (nz, ny, nx//2+1)
+            counts: 每个球壳包含的模式数(计入实数FFT省略的共轭模式)
+            k: 每个球壳的中心波数
+    """
+    lengths = (box[2], box[1], box[0])
+    ks = []
+    for axis, (n, L) in enumerate(zip(shape, lengths)):
+        freq = np.fft.rfftfreq(n, d=L / n) if axis == halfAxis else np.fft.fftfreq(n, d=L / n)
+        ks.append(2 * np.pi * freq)
+    kz, ky, kx = ks
+
+    # 球壳宽度取最长边对应的基波数
+    dk = 2 * np.pi / max(box)
+    kmag = np.sqrt(kz[:, None, None] ** 2 + ky[None, :, None] ** 2 + kx[None, None, :] ** 2)
+    index = np.rint(kmag / dk).astype(np.intp)
+    del kmag
+
+    counts = foldHalfSpectrum(index, np.ones(index.shape), index.max() + 1, shape[halfAxis], halfAxis)
+    k = np.arange(len(counts)) * dk
+    return index, counts, k
+
+
+def foldHalfSpectrum(index: np.ndarray, power: np.ndarray, nshell: int, n: int, axis: int = 2) -> np.ndarray:
+    """按球壳累加实数FFT输出的功率, 计入被省略的共轭模式
+
+    实数FFT只保留axis方向上k >= 0的一半模式, 除k = 0与Nyquist平面外每个模式代表一对共轭模式,
+    因此先整体累加两倍, 再减去k = 0与Nyquist平面多算的部分, 不需要额外的权重数组
+
+    参数:
+        n (int): axis方向上实数数据的长度, 为偶数时存在Nyquist平面
+        axis (int): 只保留一半模式的轴
+    """
+    total = 2 * np.bincount(index.ravel(), weights=power.ravel(), minlength=nshell)
+    planes = [0, -1] if n % 2 == 0 else [0]
+    for plane in planes:
+        i = np.take(index, plane, axis=axis)
+        p = np.take(power, plane, axis=axis)
+        total -= np.bincount(i.ravel(), weights=p.ravel(), minlength=nshell)
+    return total
+
+
+class ShearRemap:
+    """剪切周期场的傅里叶空间重映射
+
+    剪切盒中的场满足 f(x + Lx, y, z) = f(x, y + qΩLx t, z), 在x方向上不是周期的。
+    在剪切坐标 y' = y + qΩt x 下场是周期的, 对应到y方向的傅里叶分量只差一个相位:
+    g(x, ky) = f(x, ky) exp(-i ky qΩt x)。因此先对y做实数FFT, 乘以相位后再对x、z做FFT,
+    得到剪切坐标下的波矢 (kx', ky, kz), 与实验室系波矢的关系为 kx = kx' + qΩt ky
+
+    场每经过 T = Ly / (qΩ Lx) 重新变为周期的, 时间先约化到 [-T/2, T/2),
+    使相位与kx'的偏移都最小; ky·x表在同一 (box, 网格) 的所有时间切片之间共用
+    """
+
+    def __init__(self, box: Tuple[float, float, float], shape: Tuple[int, int, int], q: float, Omega: float):
+        Lx, Ly, _ = box
+        _, ny, nx = shape
+        self.shear = q * Omega
+        self.period = Ly / (self.shear * Lx) if self.shear != 0 else float('inf')
+
+        # 以box中心为原点的x方向格点中心, 原点只影响与功率谱无关的整体相位
+        x = (np.arange(nx) + 0.5) * (Lx / nx) - Lx / 2
+        ky = 2 * np.pi * np.fft.rfftfreq(ny, d=Ly / ny)
+        self.kyx = ky[:, None] * x[None, :]   # (ny//2+1, nx)
+
+    def reducedTime(self, time: float) -> float:
+        """将时间约化到 [-T/2, T/2)"""
+        if not np.isfinite(self.period):
+            return time
+        return (time + self.period / 2) % self.period - self.period / 2
+
+    def phase(self, time: float) -> np.ndarray:
+        """该时刻的重映射相位 exp(-i ky qΩt x), 形状为 (ny//2+1, nx)"""
+        return np.exp(-1j * self.shear * self.reducedTime(time) * self.kyx)
+
+
+def fieldPower(components: List[np.ndarray], fft=None, remap: Optional[ShearRemap] = None,
+               time: float = 0.0) -> np.ndarray:
+    """对矢量场的所有分量一次完成FFT, 返回各分量功率之和 |F|^2 / N^2
+
+    参数:
+        components (List[np.ndarray]): 矢量场的三个分量, (nz, ny, nx) 顺序
+        fft: fftbackend中的FFT后端, 默认为numpy
+        remap (Optional[ShearRemap]): 剪切重映射, 为None时直接做rfftn(只保留kx >= 0)
+        time (float): 时间切片的模拟时间, 用于计算重映射相位
+    """
+    if fft is None:
+        fft = fftbackend.getBackend('numpy')
+    stack = fft.inputBuffer((len(components),) + components[0].shape)
+    for i, component in enumerate(components):
+        stack[i] = component
+    N = stack[0].size
+
+    if remap is None:
+        spectrum = fft.rfftn(stack, axes=(1, 2, 3))
+    else:
+        # 先对y做实数FFT, 在原数组上乘以相位, 再对z、x做复数FFT, 只保留ky >= 0
+        spectrum = fft.rfftn(stack, axes=(2,))
+        spectrum *= remap.phase(time)[None, None, :, :]
+        spectrum = fft.fftn(spectrum, axes=(1, 3))
+
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).sum(axis=0)
+    power /= float(N) ** 2
+    return power
+
+
+def shellSpectrum(components: List[np.ndarray], box: Tuple[float, float, float], fft=None,
+                  remap: Optional[ShearRemap] = None, time: float = 0.0) -> np.ndarray:
+    """计算矢量场的球壳能谱 E(k) = 0.5 * sum_{|k|属于球壳} |F(k)|^2 / N^2
+
+    参数:
+        components (List[np.ndarray]): 矢量场的三个分量, (nz, ny, nx) 顺序
+        box (Tuple[float, float, float]): 模拟box尺寸 (Lx, Ly, Lz)
+        fft: fftbackend中的FFT后端, 默认为numpy
+        remap (Optional[ShearRemap]): 剪切重映射, 使用时按剪切坐标下的波矢分箱
+        time (float): 时间切片的模拟时间
+
+    返回:
+        np.ndarray: 各球壳的能量, 对所有球壳求和等于 0.5 * <|f|^2>
+    """
+    shape = components[0].shape
+    halfAxis = 2 if remap is None else 1
+    index, counts, k = shellIndex(tuple(box), tuple(shape), halfAxis)
+    power = fieldPower(components, fft, remap, time)
+    return 0.5 * foldHalfSpectrum(index, power, len(k), shape[halfAxis], halfAxis)
+
+
+def computeSpectra(outn: str, t1: Optional[float] = None, t2: Optional[float] = None,
+                   fft=None, remap: bool = False, stride: Union[int, str] = 1,
+                   maxSnapshots: Optional[int] = None) -> Optional[Dict]:
+    """计算时间范围内各时间切片的动能谱与磁能谱
+
+    参数:
+        outn (str): 输出文件格式, 例如out2
+        t1 (Optional[float]): 起始时间
+        t2 (Optional[float]): 结束时间
+        fft: fftbackend中的FFT后端, 默认为numpy
+        remap (bool): 是否做剪切重映射, 按剪切坐标下的波矢计算能谱
+        stride (Union[int, str]): 每stride个时间切片取一个, 为auto时由hst估计的自关联时间确定
+        maxSnapshots (Optional[int]): 最多使用的时间切片数, 在时间范围内均匀抽取
+
+    返回:
+        Optional[Dict]: k、counts、times以及每个场的能谱 (时间切片, 球壳), 如果没有数据则返回None
+    """
+    box = preprocess.getBox(outn)
+    if box is None:
+        return None
+
+    shear = None
+    if remap:
+        q = preprocess.getShear()
+        Omega = preprocess.getOmega()
+        if q is None or Omega is None:
+            return None
+
+    quantities = [q for components in FIELDS.values() for q in components]
+    times: List[float] = []
+    spectra: Dict[str, List[np.ndarray]] = {name: [] for name in FIELDS}
+    for file, time, data in preprocess.iterSnapshots(outn, t1, t2, quantities, '能谱', stride, maxSnapshots):
+        shape = tuple(int(n) for n in data[quantities[0]].shape)
+        if remap and shear is None:
+            shear = ShearRemap(tuple(box), shape, q, Omega)
+        for name, components in FIELDS.items():
+            with profiling.stage('spectrum', field=name, time=time):
+                spectra[name].append(shellSpectrum([data[c] for c in components], box, fft, shear, time))
+        times.append(time)
+
+    if not times:
+        print(f"错误: 在时间范围 [{t1}, {t2 if t2 is not None else '∞'}] 内未找到有效数据", flush=True)
+        return None
+
+    _, counts, k = shellIndex(tuple(box), shape, 2 if shear is None else 1)
+    result = {'k': k, 'counts': counts, 'times': np.array(times), 'remap': remap}
+    for name in FIELDS:
+        result[name] = np.array(spectra[name])
+    return result
+
+
+def plotSpectra(result: Dict, case: str) -> str:
+    """绘制时间平均的动能谱与磁能谱, 并保存能谱数据
+
+    返回:
+        str: 图像文件路径
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    output_dir = os.path.join(os.getcwd(), 'spcPlots')
+    os.makedirs(output_dir, exist_ok=True)
+    data_file = os.path.join(output_dir, f'spectra({case}).npz')
+    with progress.artifacts(data_file):
+        np.savez(data_file, **result)
+
+    # 跳过k = 0的平均场
+    k = result['k'][1:]
+    plt.figure(figsize=(8, 6))
+    for name, color in (('kinetic', 'tab:blue'), ('magnetic', 'tab:red')):
+        plt.loglog(k, result[name].mean(axis=0)[1:], color=color, linewidth=2, label=name)
+    plt.xlabel('k')
+    plt.ylabel('E(k)')
+    times = result['times']
+    plt.title(f'{case}  t = [{times.min()}, {times.max()}]')
+    plt.legend()
+
+    output_file = os.path.join(output_dir, f'spectra({case}).pdf')
+    with progress.artifacts(output_file):
+        plt.savefig(output_file)
+    plt.close()
+    return output_file
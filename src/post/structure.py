@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结构函数与增量统计计算工具
+
+主要功能:
+1. 计算速度场与磁场增量的结构函数 S_p(ℓ) = <|δf(ℓ)|^p>, 以及纵向增量 δf·ℓ̂ 的结构函数与PDF
+2. axis模式: 沿x、y、z轴的整数格点位移, 样本数不超过预算时直接用数组平移计算全部格点对
+3. random模式: 在对数分布的距离区间内随机抽取各向同性的格点对, 用于任意方向的间隔
+4. 计算量由每个间隔、每个时间切片的样本预算决定, 与网格大小无关, 随机数种子保证结果可重复
+5. 误差估计: 每个间隔的样本随机打乱后分为若干批, 由批平均的标准差给出标准误差
+
+y、z方向为周期边界, 位移跨越边界时取周期像; x方向为剪切周期边界, 只使用不跨越x边界的格点对
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import preprocess
+import profiling
+import progress
+from spectrum import FIELDS
+
+# axis模式的方向名称与 (z, y, x) 数组中的轴编号
+AXES = {'x': 2, 'y': 1, 'z': 0}
+
+# 归一化纵向增量PDF的分箱: δf_L / σ 在 [-PDF_RANGE, PDF_RANGE] 内
+PDF_RANGE = 10.0
+PDF_BINS = 100
+
+
+def axisLags(n: int, nlags: int) -> np.ndarray:
+    """沿一个轴的格点位移: 1到n/2之间对数分布的整数, 去除重复"""
+    return np.unique(np.rint(np.geomspace(1, max(n // 2, 1), nlags)).astype(int))
+
+
+def samplePairs(rng: np.random.Generator, shape: Tuple[int, int, int], offset: Sequence[int],
+                budget: int) -> Tuple[np.ndarray, np.ndarray]:
+    """抽取间隔为offset的格点对, 返回两组展平的格点编号
+
+    参数:
+        rng (np.random.Generator): 随机数生成器
+        shape (Tuple[int, int, int]): 网格形状 (nz, ny, nx)
+        offset (Sequence[int]): 每个格点对的位移, 形状为 (3,) 或 (3, 样本数), (z, y, x) 顺序
+        budget (int): 样本数
+
+    返回:
+        Tuple[np.ndarray, np.ndarray]: 起点与终点的展平编号
+    """
+    offset = [np.asarray(o) for o in offset]
+    start = []
+    end = []
+    for axis, n in enumerate(shape):
+        o = offset[axis]
+        if axis == 2:
+            # x方向不跨越剪切周期边界: 起点限制在 [max(0, -o), n - max(0, o)) 内
+            lo = np.maximum(0, -o)
+            hi = n - np.maximum(0, o)
+            i = lo + (rng.random(budget) * (hi - lo)).astype(np.intp)
+            start.append(i)
+            end.append(i + o)
+        else:
+            i = rng.integers(0, n, budget)
+            start.append(i)
+            end.append((i + o) % n)
+    return np.ravel_multi_index(start, shape), np.ravel_multi_index(end, shape)
+
+
+def shiftIncrements(field: np.ndarray, axis: int, lag: int) -> np.ndarray:
+    """用数组平移计算沿一个轴的全部增量, 返回形状为 (3, 格点对数) 的数组"""
+    if axis == 2:
+        delta = field[..., lag:] - field[..., :-lag]
+    else:
+        delta = np.roll(field, -lag, axis=axis + 1) - field
+    return delta.reshape(3, -1)
+
+
+class Accumulator:
+    """按批累加一个方向上各间隔的结构函数与纵向增量的PDF
+
+    数组平移得到的增量按格点顺序排列, 连续的一段是相邻的z层, 场在空间上相关, 直接切分时各批不独立,
+    批平均的标准差不能作为误差; 因此先用随机排列把样本分配到各批, 打乱使用单独的随机数生成器,
+    不影响格点对的抽样
+    """
+
+    def __init__(self, nlags: int, orders: Sequence[int], seed: int = 0):
+        self.orders = np.asarray(orders, dtype=float)
+        self.rng = np.random.default_rng(seed)
+        self.batches: List[List[np.ndarray]] = [[] for _ in range(nlags)]
+        self.longBatches: List[List[np.ndarray]] = [[] for _ in range(nlags)]
+        self.pdf = np.zeros((nlags, PDF_BINS))
+        self.edges = np.linspace(-PDF_RANGE, PDF_RANGE, PDF_BINS + 1)
+
+    def add(self, lag: int, delta: np.ndarray, unit: np.ndarray, nbatch: int) -> None:
+        """加入一组增量
+
+        参数:
+            lag (int): 间隔编号
+            delta (np.ndarray): 增量, 形状为 (3, 样本数), 分量为 (x, y, z) 顺序
+            unit (np.ndarray): 间隔方向的单位矢量, 形状为 (3,) 或 (3, 样本数)
+            nbatch (int): 分批数, 样本随机分配到各批
+        """
+        magnitude = np.sqrt((delta ** 2).sum(axis=0))
+        longitudinal = (delta * (unit if unit.ndim == 2 else unit[:, None])).sum(axis=0)
+        order = self.rng.permutation(len(magnitude))
+        for values, batches in ((magnitude, self.batches[lag]), (np.abs(longitudinal), self.longBatches[lag])):
+            for chunk in np.array_split(values[order], nbatch):
+                if len(chunk):
+                    batches.append((chunk[None, :] ** self.orders[:, None]).mean(axis=1))
+
+        sigma = longitudinal.std()
+        if sigma > 0:
+            self.pdf[lag] += np.histogram(longitudinal / sigma, bins=self.edges)[0]
+
+    @staticmethod
+    def reduce(batches: List[List[np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        """由批平均得到结构函数与标准误差, 形状均为 (间隔, 阶数)"""
+        values = []
+        errors = []
+        for lag in batches:
+            lag = np.array(lag)
+            values.append(lag.mean(axis=0))
+            errors.append(lag.std(axis=0, ddof=1) / np.sqrt(len(lag)) if len(lag) > 1 else np.zeros(lag.shape[1]))
+        return np.array(values), np.array(errors)
+
+    def result(self) -> Dict[str, np.ndarray]:
+        S, Serr = self.reduce(self.batches)
+        SL, SLerr = self.reduce(self.longBatches)
+        width = self.edges[1] - self.edges[0]
+        total = self.pdf.sum(axis=1, keepdims=True)
+        pdf = np.divide(self.pdf, total * width, out=np.zeros_like(self.pdf), where=total > 0)
+        return {'S': S, 'S_err': Serr, 'SL': SL, 'SL_err': SLerr, 'pdf': pdf}
+
+
+def randomSeparations(rng: np.random.Generator, lo: float, hi: float, dx: np.ndarray,
+                      budget: int) -> Tuple[np.ndarray, np.ndarray]:
+    """在 [lo, hi) 内按对数均匀分布抽取各向同性的间隔矢量, 并取整到格点
+
+    返回:
+        Tuple[np.ndarray, np.ndarray]: 格点位移 (3, 样本数) 与间隔矢量 (3, 样本数), 均为 (x, y, z) 顺序,
+            位移为零的样本已去除
+    """
+    r = np.exp(rng.uniform(np.log(lo), np.log(hi), budget))
+    direction = rng.standard_normal((3, budget))
+    direction /= np.sqrt((direction ** 2).sum(axis=0))
+    offset = np.rint(r * direction / dx[:, None]).astype(np.intp)
+    keep = np.any(offset != 0, axis=0)
+    offset = offset[:, keep]
+    return offset, offset * dx[:, None]
+
+
+def computeStructure(outn: str, t1: Optional[float] = None, t2: Optional[float] = None,
+                     mode: str = 'axis', orders: Sequence[int] = (1, 2, 3, 4, 5, 6),
+                     nlags: int = 16, budget: int = 2 ** 18, seed: int = 0,
+                     nbatch: int = 16, stride: Union[int, str] = 1,
+                     maxSnapshots: Optional[int] = None) -> Optional[Dict]:
+    """计算时间范围内速度场与磁场的结构函数与纵向增量PDF
+
+    参数:
+        outn (str): 输出文件格式, 例如out2
+        t1 (Optional[float]): 起始时间
+        t2 (Optional[float]): 结束时间
+        mode (str): axis为沿坐标轴的位移, random为随机方向的格点对
+        orders (Sequence[int]): 结构函数的阶数
+        nlags (int): 间隔个数
+        budget (int): 每个间隔、每个时间切片的样本数
+        seed (int): 随机数种子
+        nbatch (int): 每个间隔、每个时间切片的分批数(样本随机分配到各批), 用于误差估计
+        stride (Union[int, str]): 每stride个时间切片取一个, 为auto时由hst估计的自关联时间确定
+        maxSnapshots (Optional[int]): 最多使用的时间切片数, 在时间范围内均匀抽取
+
+    返回:
+        Optional[Dict]: times、orders、pdf_edges, 以及每个方向的间隔lag_<方向>与每个场的结构函数,
+            键名为 "<场>_<方向>_<项>", 例如kinetic_x_S; 如果没有数据则返回None
+    """
+    box = preprocess.getBox(outn)
+    if box is None:
+        return None
+
+    rng = np.random.default_rng(seed)
+    quantities = [q for components in FIELDS.values() for q in components]
+    times: List[float] = []
+    accumulators: Dict[str, Dict[str, Accumulator]] = {}
+    lags: Dict[str, np.ndarray] = {}
+    for file, time, data in preprocess.iterSnapshots(outn, t1, t2, quantities, '结构函数', stride, maxSnapshots):
+        shape = tuple(int(n) for n in data[quantities[0]].shape)
+        # 格点间距, (x, y, z) 顺序
+        dx = np.array([box[0] / shape[2], box[1] / shape[1], box[2] / shape[0]])
+
+        if not lags:
+            if mode == 'axis':
+                for name, axis in AXES.items():
+                    lags[name] = axisLags(shape[axis], nlags)
+            else:
+                # 间隔区间的上限为最短边的一半, 保证x方向总有不跨越边界的格点对
+                edges = np.geomspace(dx.min(), min(box) / 2, nlags + 1)
+                lags['r'] = edges
+            accumulators = {name: {direction: Accumulator(len(lag) if mode == 'axis' else nlags, orders, seed)
+                                   for direction, lag in lags.items()} for name in FIELDS}
+
+        for name, components in FIELDS.items():
+            with profiling.stage('increments', field=name, time=time):
+                field = np.stack([data[c] for c in components])      # (分量x/y/z, nz, ny, nx)
+                flat = field.reshape(3, -1)
+                if mode == 'axis':
+                    for direction, axis in AXES.items():
+                        unit = np.zeros(3)
+                        unit[2 - axis] = 1.0
+                        n = shape[axis]
+                        for j, lag in enumerate(lags[direction]):
+                            pairs = field[0].size if axis != 2 else field[0].size // n * (n - lag)
+                            if pairs <= budget:
+                                delta = shiftIncrements(field, axis, int(lag))
+                            else:
+                                offset = [0, 0, 0]
+                                offset[axis] = int(lag)
+                                i1, i2 = samplePairs(rng, shape, offset, budget)
+                                delta = flat[:, i2] - flat[:, i1]
+                            accumulators[name][direction].add(j, delta, unit, nbatch)
+                else:
+                    edges = lags['r']
+                    for j in range(nlags):
+                        offset, separation = randomSeparations(rng, edges[j], edges[j + 1], dx, budget)
+                        i1, i2 = samplePairs(rng, shape, offset[::-1], offset.shape[1])
+                        delta = flat[:, i2] - flat[:, i1]
+                        unit = separation / np.sqrt((separation ** 2).sum(axis=0))
+                        accumulators[name]['r'].add(j, delta, unit, nbatch)
+
+        times.append(time)
+
+    if not times:
+        print(f"错误: 在时间范围 [{t1}, {t2 if t2 is not None else '∞'}] 内未找到有效数据", flush=True)
+        return None
+
+    result = {'times': np.array(times), 'orders': np.asarray(orders),
+              'pdf_edges': np.linspace(-PDF_RANGE, PDF_RANGE, PDF_BINS + 1)}
+    for direction, lag in lags.items():
+        if mode == 'axis':
+            spacing = dx[2 - AXES[direction]]
+            result[f'lag_{direction}'] = lag * spacing
+        else:
+            # 每个区间的代表间隔取几何中点
+            result['lag_r'] = np.sqrt(lag[:-1] * lag[1:])
+    for name in FIELDS:
+        for direction, accumulator in accumulators[name].items():
+            for key, value in accumulator.result().items():
+                result[f'{name}_{direction}_{key}'] = value
+    return result
+
+
+def plotStructure(result: Dict, case: str) -> str:
+    """绘制结构函数与最小、最大间隔处的纵向增量PDF, 并保存数据
+
+    返回:
+        str: 图像文件路径
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    output_dir = os.path.join(os.getcwd(), 'sfnPlots')
+    os.makedirs(output_dir, exist_ok=True)
+    data_file = os.path.join(output_dir, f'structure({case}).npz')
+    with progress.artifacts(data_file):
+        np.savez(data_file, **result)
+
+    directions = [key[len('lag_'):] for key in result if key.startswith('lag_')]
+    styles = ['-', '--', ':']
+    orders = result['orders']
+    centers = 0.5 * (result['pdf_edges'][1:] + result['pdf_edges'][:-1])
+    colors = plt.cm.viridis(np.linspace(0, 0.9, len(orders)))
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    for row, name in enumerate(FIELDS):
+        ax = axes[row, 0]
+        for direction, style in zip(directions, styles):
+            lag = result[f'lag_{direction}']
+            S = result[f'{name}_{direction}_S']
+            err = result[f'{name}_{direction}_S_err']
+            for k, p in enumerate(orders):
+                label = f'p = {p}' if direction == directions[0] else None
+                ax.errorbar(lag, S[:, k], yerr=err[:, k], color=colors[k], linestyle=style, label=label)
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('ℓ')
+        ax.set_ylabel('S_p(ℓ)')
+        ax.set_title(f"{name}  ({', '.join(f'{d}: {s}' for d, s in zip(directions, styles))})")
+        ax.legend()
+
+        ax = axes[row, 1]
+        direction = directions[0]
+        pdf = result[f'{name}_{direction}_pdf']
+        lag = result[f'lag_{direction}']
+        for j, color in ((0, 'tab:blue'), (len(lag) - 1, 'tab:red')):
+            ax.semilogy(centers, np.where(pdf[j] > 0, pdf[j], np.nan), color=color, label=f'ℓ = {lag[j]:.3g}')
+        ax.semilogy(centers, np.exp(-centers ** 2 / 2) / np.sqrt(2 * np.pi), color='gray', linestyle='--',
+                    label='Gaussian')
+        ax.set_xlabel('δf_L / σ')
+        ax.set_ylabel('PDF')
+        ax.set_title(f'{name}  {direction}')
+        ax.legend()
+
+    times = result['times']
+    fig.suptitle(f'{case}  t = [{times.min()}, {times.max()}]')
+    fig.tight_layout()
+
+    output_file = os.path.join(output_dir, f'structure({case}).pdf')
+    with progress.artifacts(output_file):
+        fig.savefig(output_file)
+    plt.close(fig)
+    return output_file
+
+
+def parse_args(argv=None):
+    """解析命令行参数, argv为None时使用sys.argv"""
+    parser = argparse.ArgumentParser(description='结构函数与增量统计计算工具')
+    parser.add_argument('--outn', type=str, required=True, help='输出文件格式')
+    parser.add_argument('--t1', type=float, help='开始时间')
+    parser.add_argument('--t2', type=float, help='结束时间')
+    parser.add_argument('--stride', type=preprocess.parseStride, default=1,
+                        help='每stride个时间切片取一个, auto为由hst文件估计的自关联时间确定步长')
+    parser.add_argument('--max-snapshots', type=preprocess.parseCount,
+                        help='最多使用的时间切片数, 在时间范围内均匀抽取')
+    parser.add_argument('--mode', type=str, choices=['axis', 'random'], default='axis',
+                        help='axis为沿x、y、z轴的位移, random为随机方向的格点对')
+    parser.add_argument('--orders', type=str, default='1,2,3,4,5,6', help='结构函数的阶数, 逗号分隔')
+    parser.add_argument('--nlags', type=int, default=16, help='间隔个数')
+    parser.add_argument('--budget', type=int, default=2 ** 18, help='每个间隔、每个时间切片的样本数')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    parser.add_argument('--batches', type=int, default=16, help='误差估计的分批数')
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help='记录各阶段的耗时、读取量与内存并打印汇总表, 指定TRACE时同时写出Chrome trace JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """主函数, argv为命令行参数列表, 供TUI在同一进程中调用"""
+    args = parse_args(argv)
+    profiling.setup(args.profile)
+
+    try:
+        orders = [int(p) for p in args.orders.split(',')]
+    except ValueError:
+        print(f"错误: 无法解析阶数 {args.orders}", flush=True)
+        sys.exit(1)
+    if args.budget < args.batches or args.nlags < 1:
+        print("错误: --budget不能小于--batches, --nlags至少为1", flush=True)
+        sys.exit(1)
+
+    try:
+        print(f"正在计算结构函数 (模式: {args.mode}, 样本预算: {args.budget}, 种子: {args.seed})...", flush=True)
+        result = computeStructure(args.outn, args.t1, args.t2, args.mode, orders,
+                                  args.nlags, args.budget, args.seed, args.batches,
+                                  args.stride, args.max_snapshots)
+        if result is None:
+            sys.exit(1)
+
+        print("计算完成, 正在绘制结构函数...", flush=True)
+        with profiling.stage('plot'):
+            output_file = plotStructure(result, os.path.basename(os.getcwd()))
+        print(f"结构函数已保存: {output_file}", flush=True)
+
+    except progress.Cancelled:
+        print("已取消", flush=True)
+        sys.exit(130)
+    except Exception as e:
+        print(f"计算过程中发生错误：{e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
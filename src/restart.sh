@@ -12,27 +12,31 @@ if [ ! -d "outputs" ] || [ ! -f "athinput.hgb" ]; then
     exit 1
 fi
 
-# 检查outputs目录中是否有restart文件
-if [ ! -f $(ls outputs/*.final.rst 2>/dev/null | head -n 1) ]; then
+# 获取脚本所在目录
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )"
+
+# 获取AthenaUI根目录 (脚本在src/目录下)
+ATHENAUI_DIR="$( cd "$SCRIPT_DIR/.." &> /dev/null && pwd )"
+
+# 选择restart文件：优先使用rst界面中选择的检查点，否则使用模拟时间最新的restart文件
+# (由restart文件头中的time/ncycle判断，包括final和周期输出的restart文件)
+RESTART_FILE=${ATHENA_RESTART_FILE:-}
+if [ -z "$RESTART_FILE" ]; then
+    RESTART_FILE=$(python $ATHENAUI_DIR/src/run/checkpoint.py outputs --latest | tail -n 1)
+fi
+
+# 检查restart文件是否存在
+if [ -z "$RESTART_FILE" ] || [ ! -f "$RESTART_FILE" ]; then
     echo "Error: Restart file not found in 'outputs' directory."
     echo "Please ensure the simulation has been run and a .rst file has been generated."
     exit 1
 fi
-
-# 获取最新的restart文件
-RESTART_FILE=$(ls -t outputs/*.final.rst | head -n 1)
 echo "Restart file found: $RESTART_FILE"
 
 # -------设置时间限制-----------------------------------------------------
 # 从环境变量读取时间上限
 wallTimeLimit=${ATHENA_WALL_TIME_LIMIT:-24}
 
-# 获取脚本所在目录
-SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )"
-
-# 获取AthenaUI根目录 (脚本在src/目录下)
-ATHENAUI_DIR="$( cd "$SCRIPT_DIR/.." &> /dev/null && pwd )"
-
 # source current.user文件获取配置，使用绝对路径
 source "$ATHENAUI_DIR/user/current.user"
 
@@ -61,15 +65,19 @@ echo "Mesh: $nx1 * $nx2 * $nx3"
 echo "MeshBlock: $MBx1 * $MBx2 * $MBx3"
 echo " "
 
+# 检查meshblock能否整除mesh
+if (( nx1 % MBx1 != 0 || nx2 % MBx2 != 0 || nx3 % MBx3 != 0 )); then
+    echo "Error: MeshBlock does not evenly divide Mesh."
+    echo "Run 'python $ATHENAUI_DIR/src/run/decomp.py' to list valid decompositions."
+    exit 1
+fi
+
 # 计算总核数
 n=$(( (nx1 * nx2 * nx3) / (MBx1 * MBx2 * MBx3) ))
 
-# 计算所需节点数 
-if (( n < 64 )); then # 如果不足64核，也要设置一整个节点
-    N=1 
-else 
-    N=$(( n / 64 )) 
-fi
+# 计算所需节点数，不足一个节点也要设置一整个节点
+coresPerNode=${CORES_PER_NODE:-64}
+N=$(( (n + coresPerNode - 1) / coresPerNode ))
 
 # 输出计算结果
 echo "According to the input file, $N compute node(s) and $n cores will be assigned for the simulation."
@@ -102,6 +110,27 @@ if [ "$NEW_OUTPUT_FLAG" = "1" ]; then
     fi
 fi
 
+# 自动续算：由chain.py提交作业，第一个作业从选定的restart文件开始，之后的作业自动选择最新的restart文件，
+# 并以afterok依赖提交下一个作业，直到模拟时间达到tlim
+chainLinks=${ATHENA_CHAIN_LINKS:-0}
+if [ "$chainLinks" -gt 0 ]; then
+    CHAIN_ARGS="--nodes $N --cores $n --walltime $wallTimeLimit --links $chainLinks --restart $RESTART_FILE"
+    if [ -n "$TLIM_PARAM" ]; then
+        CHAIN_ARGS="$CHAIN_ARGS --tlim ${ATHENA_TLIM}"
+    fi
+    if [ "$NEW_OUTPUT_FLAG" = "1" ]; then
+        CHAIN_ARGS="$CHAIN_ARGS --input athinput.new"
+    fi
+
+    USERNAME=$USERNAME python $ATHENAUI_DIR/src/run/chain.py start $CHAIN_ARGS || exit 1
+
+    echo " "
+    echo "To monitor the simulation progress, simply enter: mon"
+    echo "To check the restart chain, simply enter: python $ATHENAUI_DIR/src/run/chain.py status"
+    echo " "
+    exit 0
+fi
+
 # 预设作业名
 jobName=$USERNAME
 
@@ -140,23 +169,20 @@ fi
 chmod +x job.sh
 
 # 提交作业并提取作业ID
-output=$(sbatch job.sh)
-jobID=$(echo $output | awk '{print $4}')
+jobID=$(sbatch --parsable job.sh | cut -d ';' -f 1)
+if [ -z "$jobID" ]; then
+    echo "Error: Job submission failed."
+    exit 1
+fi
 
 # 打印作业ID
 echo "Submitted batch job $jobID"
 
-# 确保 slurm 输出文件已经创建
-slurmFile="slurm-${jobID}.out"
-
-while [ ! -f "$slurmFile" ]; do
-    sleep 0.1  # 等待文件生成
-done
-
-# 等待1秒钟，等文件多出现几行
-sleep 1
+# 查询作业状态后立即返回，不再等待slurm输出文件生成
+python $ATHENAUI_DIR/src/run/jobs.py $jobID --wait 5
 
 # 打印提示语，退出后还可以继续监控
 echo " "
 echo "To monitor the simulation progress, simply enter: mon"
+echo "To check the job state, simply enter: jst $jobID"
 echo " "
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+athinput文件读写模块
+
+主要功能:
+1. 按<block>解析athinput文件中的参数
+2. 提取mesh与meshblock尺寸
+3. 在保留注释与格式的前提下修改参数值
+"""
+
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+# 参数行: "key = value  # comment"
+PARAM_LINE = re.compile(r'^(\s*)([A-Za-z0-9_]+)(\s*=\s*)([^#]*?)(\s*)(#.*)?$')
+
+
+def readInput(path: str) -> Optional[Dict[str, Dict[str, str]]]:
+    """读取athinput文件, 返回 {block: {key: value}}
+
+    参数:
+        path (str): athinput文件路径
+
+    返回:
+        Optional[Dict[str, Dict[str, str]]]: 参数字典, 如果读取失败则返回None
+    """
+    if not os.path.isfile(path):
+        print(f"错误: 无法找到athinput文件: {path}", flush=True)
+        return None
+
+    with open(path, 'r') as f:
+        return parseInput(f)
+
+
+def parseInput(lines: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """按<block>解析参数文本, 返回 {block: {key: value}}
+
+    参数:
+        lines (Iterable[str]): 参数文本的各行, 也可以是restart文件头中的参数文本
+    """
+    params: Dict[str, Dict[str, str]] = OrderedDict()
+    block = None
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('<') and stripped.endswith('>'):
+            block = stripped[1:-1]
+            params.setdefault(block, OrderedDict())
+            continue
+        if block is None or not stripped or stripped.startswith('#'):
+            continue
+        match = PARAM_LINE.match(line.rstrip('\n'))
+        if match:
+            params[block][match.group(2)] = match.group(4).strip()
+
+    return params
+
+
+def getMesh(params: Dict[str, Dict[str, str]]) -> List[int]:
+    """提取<mesh>中的网格尺寸 [nx1, nx2, nx3]"""
+    mesh = params.get('mesh', {})
+    return [int(mesh.get(f'nx{i}', 1)) for i in (1, 2, 3)]
+
+
+def getMeshBlock(params: Dict[str, Dict[str, str]]) -> List[int]:
+    """提取<meshblock>中的网格块尺寸 [nx1, nx2, nx3], 未设置时与mesh相同"""
+    mesh = getMesh(params)
+    meshblock = params.get('meshblock', {})
+    return [int(meshblock.get(f'nx{i}', mesh[i - 1])) for i in (1, 2, 3)]
+
+
+def setParams(path: str, updates: Dict[str, Dict[str, str]]) -> None:
+    """修改athinput文件中的参数值, 保留原有注释与对齐方式
+
+    参数:
+        path (str): athinput文件路径
+        updates (Dict[str, Dict[str, str]]): {block: {key: value}},
+            文件中不存在的参数会追加到对应block末尾, 不存在的block会追加到文件末尾
+    """
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    pending = OrderedDict((block, OrderedDict(values)) for block, values in updates.items())
+    output: List[str] = []
+    block = None
+
+    def appendMissing(block):
+        # 把当前block中尚未出现的参数追加到block末尾(末尾空行之前)
+        if block not in pending:
+            return
+        trailing = []
+        while output and not output[-1].strip():
+            trailing.append(output.pop())
+        for key, value in pending.pop(block).items():
+            output.append(f"{key:<11}= {value}\n")
+        output.extend(trailing)
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('<') and stripped.endswith('>'):
+            appendMissing(block)
+            block = stripped[1:-1]
+            output.append(line)
+            continue
+
+        match = PARAM_LINE.match(line.rstrip('\n'))
+        if block in pending and match and match.group(2) in pending[block]:
+            value = str(pending[block].pop(match.group(2)))
+            indent, key, sep, old, space, comment = match.groups()
+            if comment:
+                # 尽量保持注释所在列不变
+                space = ' ' * max(1, len(old) + len(space) - len(value))
+                output.append(f"{indent}{key}{sep}{value}{space}{comment}\n")
+            else:
+                output.append(f"{indent}{key}{sep}{value}\n")
+            continue
+
+        output.append(line)
+
+    appendMissing(block)
+
+    for block, values in pending.items():
+        output.append(f"\n<{block}>\n")
+        for key, value in values.items():
+            output.append(f"{key:<11}= {value}\n")
+
+    with open(path, 'w') as f:
+        f.writelines(output)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Athena++编译缓存模块, 避免在编译选项不变时重复编译
+
+主要功能:
+1. 由configure参数(prob, flux, eos, mpi, hdf5, float)与Athena++源码版本计算缓存键
+2. 每个缓存键保留一个编译好的athena可执行文件
+3. 将缓存的可执行文件硬链接(或复制)到case目录, 仅在缓存键变化时重新编译
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# 缓存中每个编译结果的描述文件
+BUILD_INFO = 'build.json'
+
+# 会影响编译结果的环境模块配置
+ENV_KEYS = ['MPI_LOAD', 'HDF5_LOAD']
+
+
+def getCacheDir() -> str:
+    """获取编译缓存目录"""
+    athenaui_path = os.environ.get('ATHENAUI_PATH',
+                                   os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    return os.path.join(athenaui_path, 'builds')
+
+
+def configureArgs(options: Dict) -> List[str]:
+    """由编译选项生成configure.py参数, 与shearingBox.sh原有的调用方式一致"""
+    args = [f"--prob={options['prob']}", f"--flux={options['flux']}", f"--eos={options['eos']}"]
+    if options.get('mpi'):
+        args.append('-mpi')
+    if options.get('hdf5'):
+        args.append('-hdf5')
+    if options.get('float'):
+        args.append('-float')
+    return args
+
+
+def sourceRevision(athenaPath: str) -> str:
+    """获取Athena++源码版本: git提交号加上未提交修改的摘要
+
+    不是git仓库时, 以src目录下所有文件的路径、大小与修改时间作为版本
+    """
+    try:
+        head = subprocess.run(['git', '-C', athenaPath, 'rev-parse', 'HEAD'],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        diff = subprocess.run(['git', '-C', athenaPath, 'diff', 'HEAD', '--', 'src'],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        revision = head.stdout.decode().strip()
+        if diff.stdout:
+            revision += '+' + hashlib.sha1(diff.stdout).hexdigest()[:12]
+        return revision
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(os.path.join(athenaPath, 'src')):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return 'tree-' + digest.hexdigest()[:12]
+
+
+def buildKey(options: Dict, revision: str) -> str:
+    """计算缓存键: configure参数、源码版本与编译环境的摘要"""
+    payload = {
+        'configure': configureArgs(options),
+        'revision':  revision,
+        'env':       {key: os.environ.get(key, '') for key in ENV_KEYS},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def runBuild(options: Dict, athenaPath: str, exeDir: str) -> bool:
+    """调用configure.py与make编译Athena++, 可执行文件输出到exeDir"""
+    print(f"编译Athena++: configure.py {' '.join(configureArgs(options))}", flush=True)
+    commands = [
+        [sys.executable, 'configure.py', '-b'] + configureArgs(options),
+        ['make', 'clean'],
+        ['make', '-j', f"EXE_DIR={exeDir}/"],
+    ]
+    for command in commands:
+        if subprocess.run(command, cwd=athenaPath).returncode != 0:
+            print(f"错误: 编译命令执行失败: {' '.join(command)}", flush=True)
+            return False
+    return True
+
+
+def getBinary(options: Dict, athenaPath: str, force: bool = False) -> Optional[str]:
+    """获取与编译选项对应的athena可执行文件, 缓存中没有时重新编译
+
+    参数:
+        options (Dict): 编译选项
+        athenaPath (str): Athena++源码路径
+        force (bool): 是否忽略已有缓存强制重新编译
+
+    返回:
+        Optional[str]: 缓存中的可执行文件路径, 如果编译失败则返回None
+    """
+    cacheDir = getCacheDir()
+    os.makedirs(cacheDir, exist_ok=True)
+
+    revision = sourceRevision(athenaPath)
+    key = buildKey(options, revision)
+    buildDir = os.path.join(cacheDir, key)
+    binary = os.path.join(buildDir, 'athena')
+
+    # Athena++的编译目录是共享的, 同一时间只允许一个编译进程
+    with open(os.path.join(cacheDir, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        if os.path.isfile(binary) and not force:
+            print(f"使用已缓存的Athena++编译结果: {key}", flush=True)
+            return binary
+
+        os.makedirs(buildDir, exist_ok=True)
+        if not runBuild(options, athenaPath, buildDir) or not os.path.isfile(binary):
+            shutil.rmtree(buildDir, ignore_errors=True)
+            return None
+
+        with open(os.path.join(buildDir, BUILD_INFO), 'w') as f:
+            json.dump({'options': options, 'configure': configureArgs(options), 'revision': revision,
+                       'env': {k: os.environ.get(k, '') for k in ENV_KEYS}}, f, indent=2)
+        print(f"编译完成, 已缓存为: {key}", flush=True)
+        return binary
+
+
+def install(binary: str, caseDir: str) -> str:
+    """将可执行文件硬链接到case目录, 跨文件系统时改为复制"""
+    target = os.path.join(caseDir, 'athena')
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(binary, target)
+    except OSError:
+        shutil.copy2(binary, target)
+    return target
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Athena++编译缓存工具')
+    parser.add_argument('--prob', type=str, default='hgb', help='问题生成器')
+    parser.add_argument('--flux', type=str, default='hlld', help='Riemann求解器')
+    parser.add_argument('--eos', type=str, default='isothermal', help='状态方程')
+    parser.add_argument('--mpi', action='store_true', help='启用MPI')
+    parser.add_argument('--hdf5', action='store_true', help='启用HDF5输出')
+    parser.add_argument('--float', action='store_true', help='使用单精度(FP32)')
+    parser.add_argument('--dest', type=str, help='目标case目录, 可执行文件将链接到该目录')
+    parser.add_argument('--force', action='store_true', help='忽略缓存强制重新编译')
+    parser.add_argument('--athena-path', type=str, default=os.environ.get('ATHENA_PATH', ''),
+                        help='Athena++源码路径, 默认为环境变量ATHENA_PATH')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    athenaPath = args.athena_path
+    if not athenaPath:
+        print("错误: 未指定Athena++源码路径(--athena-path或环境变量ATHENA_PATH)", flush=True)
+        sys.exit(1)
+
+    options = {
+        'prob':  args.prob,
+        'flux':  args.flux.lower(),
+        'eos':   args.eos.lower(),
+        'mpi':   args.mpi,
+        'hdf5':  args.hdf5,
+        'float': args.float,
+    }
+
+    binary = getBinary(options, athenaPath, args.force)
+    if binary is None:
+        sys.exit(1)
+
+    if args.dest:
+        target = install(binary, args.dest)
+        print(f"可执行文件: {target}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+自动续算模块, 在运行时间上限到达后自动提交后续作业, 直到模拟时间达到tlim
+
+每个作业(一环)开始运行时:
+1. 选择restart文件: 第一环可以指定, 之后的环使用模拟时间最新的restart文件(final或周期输出)
+2. 模拟时间已达到tlim, 或者上一环没有任何进展时停止续算
+3. 以--dependency=afterok提交下一环, 使其在本环运行期间排队
+4. 运行Athena++, 结束后若已达到tlim或运行失败则取消下一环
+
+续算状态记录在case目录下的chain.json中
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+import checkpoint
+import slurm
+
+# 续算状态文件, 位于case目录下
+CHAIN_FILE = 'chain.json'
+
+# 续算作业脚本, 位于case目录下
+CHAIN_SCRIPT = 'chain.sh'
+
+# 判断模拟时间是否达到tlim时的相对误差
+TLIM_TOLERANCE = 1e-10
+
+
+def loadChain(caseDir: str) -> Optional[Dict]:
+    """读取续算状态, 没有时返回None"""
+    path = os.path.join(caseDir, CHAIN_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def saveChain(caseDir: str, chain: Dict) -> None:
+    """保存续算状态"""
+    path = os.path.join(caseDir, CHAIN_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(chain, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def reachedTlim(restart: Dict, tlim: Optional[float]) -> bool:
+    """判断restart文件对应的模拟时间是否已达到tlim"""
+    if tlim is None:
+        return False
+    return restart['time'] >= tlim - TLIM_TOLERANCE * max(abs(tlim), 1.0)
+
+
+def writeChainScript(caseDir: str, chain: Dict, username: str) -> str:
+    """生成续算作业脚本, 每一环都提交同一个脚本"""
+    script = os.path.join(caseDir, CHAIN_SCRIPT)
+    slurm.writeJobScript(script, [
+        ('-J', username),
+        ('-N', chain['nodes']),
+        ('-n', chain['cores']),
+        ('-t', chain['walltime'] * 60 + 1),
+    ], [
+        f'cd "{os.path.abspath(caseDir)}"',
+        f'python {os.path.abspath(__file__)} link',
+    ])
+    return script
+
+
+def start(caseDir: str, nodes: int, cores: int, walltime: int, links: int,
+          tlim: Optional[float], inputFile: Optional[str], username: str,
+          restartFile: Optional[str] = None) -> Optional[str]:
+    """开始自动续算, 提交第一环
+
+    参数:
+        caseDir (str): case目录
+        nodes (int): 节点数
+        cores (int): 核数
+        walltime (int): 每一环的运行时间上限(小时)
+        links (int): 最多运行的环数
+        tlim (Optional[float]): 新的模拟终止时间, 为None时使用restart文件中的tlim
+        inputFile (Optional[str]): 第一环使用的athinput.new文件, 之后的环沿用restart文件中的参数
+        username (str): 作业名
+        restartFile (Optional[str]): 第一环使用的restart文件, 为None时使用模拟时间最新的restart文件
+
+    返回:
+        Optional[str]: 第一环的作业ID, 如果提交失败则返回None
+    """
+    previous = loadChain(caseDir)
+    if previous is not None and previous.get('successor'):
+        state = slurm.jobState(previous['successor'])['state']
+        if state in slurm.PENDING_STATES or state == 'RUNNING':
+            print(f"错误: 该case已有续算作业 {previous['successor']} ({state}), "
+                  f"如需重新开始请先执行 scancel {previous['successor']}", flush=True)
+            return None
+
+    chain = {
+        'nodes':     nodes,
+        'cores':     cores,
+        'walltime':  walltime,
+        'maxLinks':  links,
+        'tlim':      tlim,
+        'input':     inputFile,
+        'restart':   restartFile,
+        'state':     'queued',
+        'successor': None,
+        'links':     [],
+    }
+    script = writeChainScript(caseDir, chain, username)
+    jobID = slurm.submit(script, cwd=caseDir)
+    if jobID is None:
+        return None
+
+    chain['successor'] = jobID
+    saveChain(caseDir, chain)
+    print(f"Submitted batch job {jobID}", flush=True)
+    print(f"自动续算已开始, 最多运行 {links} 个 {walltime} 小时的作业", flush=True)
+    return jobID
+
+
+def stop(caseDir: str, chain: Dict, state: str, message: str) -> None:
+    """结束续算, 取消已提交的下一环"""
+    if chain.get('successor') and chain['successor'] != os.environ.get('SLURM_JOB_ID'):
+        slurm.cancel(chain['successor'])
+    chain['successor'] = None
+    chain['state'] = state
+    saveChain(caseDir, chain)
+    print(f"自动续算结束: {message}", flush=True)
+
+
+def link(caseDir: str) -> int:
+    """在作业中运行一环, 返回Athena++的退出码"""
+    chain = loadChain(caseDir)
+    if chain is None:
+        print(f"错误: 未找到续算状态文件 {CHAIN_FILE}", flush=True)
+        return 1
+
+    jobID = os.environ.get('SLURM_JOB_ID', '')
+    chain['successor'] = None
+
+    index = len(chain['links'])
+    if index == 0 and chain.get('restart'):
+        # 第一环使用指定的restart文件
+        restart = checkpoint.restartInfo(os.path.join(caseDir, chain['restart']))
+    else:
+        restart = checkpoint.latestRestart(os.path.join(caseDir, 'outputs'))
+    if restart is None:
+        stop(caseDir, chain, 'failed', "outputs目录中没有restart文件")
+        return 1
+
+    tlim = chain['tlim'] if chain['tlim'] is not None else restart['tlim']
+    if reachedTlim(restart, tlim):
+        stop(caseDir, chain, 'done', f"模拟时间 {restart['time']} 已达到tlim={tlim}")
+        return 0
+
+    if chain['links'] and restart['ncycle'] <= chain['links'][-1]['ncycle']:
+        stop(caseDir, chain, 'stopped', f"上一环没有写出新的restart文件(ncycle={restart['ncycle']})")
+        return 1
+
+    # 先提交下一环, 使其在本环运行期间排队
+    if index + 1 < chain['maxLinks']:
+        script = os.path.join(caseDir, CHAIN_SCRIPT)
+        chain['successor'] = slurm.submit(script, [f'--dependency=afterok:{jobID}'], cwd=caseDir)
+        if chain['successor']:
+            print(f"已提交下一环作业 {chain['successor']}", flush=True)
+        else:
+            print("警告: 下一环作业提交失败, 本环结束后续算将停止", flush=True)
+
+    chain['state'] = 'running'
+    chain['links'].append({
+        'jobID':   jobID,
+        'restart': os.path.relpath(restart['path'], caseDir),
+        'time':    restart['time'],
+        'ncycle':  restart['ncycle'],
+        'started': time.time(),
+    })
+    saveChain(caseDir, chain)
+
+    command = ['srun', 'athena', '-r', os.path.relpath(restart['path'], caseDir)]
+    # athinput.new只在第一环使用, 之后的环沿用restart文件中的参数
+    if index == 0 and chain['input']:
+        command += ['-i', chain['input']]
+    command += ['-d', 'outputs', '-t', f"{chain['walltime']}:00:00"]
+    if chain['tlim'] is not None:
+        command.append(f"time/tlim={chain['tlim']}")
+
+    print(f"第 {index + 1}/{chain['maxLinks']} 环: 从 {restart['path']} "
+          f"(time={restart['time']}, ncycle={restart['ncycle']}) 继续运行", flush=True)
+    code = subprocess.run(command, cwd=caseDir).returncode
+
+    chain = loadChain(caseDir)
+    chain['links'][-1]['finished'] = time.time()
+    chain['links'][-1]['code'] = code
+
+    latest = checkpoint.latestRestart(os.path.join(caseDir, 'outputs'))
+    if code != 0:
+        stop(caseDir, chain, 'failed', f"Athena++退出码为 {code}")
+    elif latest is not None and reachedTlim(latest, tlim):
+        stop(caseDir, chain, 'done', f"模拟时间 {latest['time']} 已达到tlim={tlim}")
+    elif not chain['successor']:
+        stop(caseDir, chain, 'stopped', f"已运行 {index + 1} 环, 未达到tlim")
+    else:
+        saveChain(caseDir, chain)
+    return code
+
+
+def printStatus(caseDir: str) -> None:
+    """打印续算状态"""
+    chain = loadChain(caseDir)
+    if chain is None:
+        print("该case没有自动续算记录", flush=True)
+        return
+
+    print(f"状态: {chain['state']}  已运行: {len(chain['links'])}/{chain['maxLinks']} 环"
+          f"  tlim: {chain['tlim'] if chain['tlim'] is not None else '沿用restart文件'}")
+    if chain.get('successor'):
+        print(f"下一环作业: {chain['successor']} ({slurm.jobState(chain['successor'])['state']})")
+    print(f"{'jobID':>10}{'time':>14}{'ncycle':>12}{'hours':>8}{'code':>6}  restart")
+    for entry in chain['links']:
+        hours = f"{(entry['finished'] - entry['started']) / 3600:.2f}" if 'finished' in entry else '-'
+        code = str(entry.get('code', '-'))
+        print(f"{entry['jobID']:>10}{entry['time']:>14.6g}{entry['ncycle']:>12}{hours:>8}{code:>6}  {entry['restart']}")
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Athena++自动续算工具')
+    parser.add_argument('--case', type=str, default='.', help='case目录, 默认为当前目录')
+    subparsers = parser.add_subparsers(dest='command')
+
+    begin = subparsers.add_parser('start', help='开始自动续算, 提交第一环')
+    begin.add_argument('--nodes', type=int, required=True, help='节点数')
+    begin.add_argument('--cores', type=int, required=True, help='核数')
+    begin.add_argument('--walltime', type=int, default=24, help='每一环的运行时间上限(小时)')
+    begin.add_argument('--links', type=int, default=10, help='最多运行的环数')
+    begin.add_argument('--tlim', type=float, help='新的模拟终止时间, 默认沿用restart文件中的tlim')
+    begin.add_argument('--input', type=str, help='第一环使用的athinput.new文件')
+    begin.add_argument('--restart', type=str, help='第一环使用的restart文件, 默认为模拟时间最新的restart文件')
+
+    subparsers.add_parser('link', help='在作业中运行一环(由chain.sh调用)')
+    subparsers.add_parser('status', help='查看续算状态')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    caseDir = os.path.abspath(args.case)
+
+    if args.command == 'start':
+        if args.links < 1:
+            print("错误: 续算环数必须为正整数", flush=True)
+            sys.exit(1)
+        username = os.environ.get('USERNAME', 'chain')
+        if start(caseDir, args.nodes, args.cores, args.walltime, args.links,
+                 args.tlim, args.input, username, args.restart) is None:
+            sys.exit(1)
+    elif args.command == 'link':
+        sys.exit(link(caseDir))
+    else:
+        printStatus(caseDir)
+
+
+if __name__ == "__main__":
+    main()
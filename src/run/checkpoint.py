@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Athena++ restart文件模块, 只读取文件头而不加载整个restart文件
+
+Athena++的restart文件以参数文本开头(以<par_end>结尾), 之后才是网格数据。
+写出restart文件时time/time、time/ncycle会被更新为当前值, 因此只需读取文件头
+即可得到检查点对应的模拟时间与步数
+
+主要功能:
+1. 读取restart文件头中的参数
+2. 维护outputs目录下所有restart文件(周期输出与final)的目录, 缓存在.rst_catalog.json中,
+   只重新读取新增或修改过的文件
+3. 找到模拟时间最新的restart文件
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+import athinput
+
+# restart文件目录的缓存文件, 位于outputs目录下
+CATALOG_FILE = '.rst_catalog.json'
+
+# 参数文本的结束标记
+PAR_END = b'<par_end>'
+
+# 每次读取的字节数, 参数文本通常只有几KB
+CHUNK_SIZE = 64 * 1024
+
+# 参数文本的最大长度, 超过时认为文件已损坏
+MAX_HEADER_SIZE = 16 * 1024 * 1024
+
+
+def readHeader(path: str) -> Optional[Dict[str, Dict[str, str]]]:
+    """读取restart文件头中的参数
+
+    参数:
+        path (str): restart文件路径
+
+    返回:
+        Optional[Dict[str, Dict[str, str]]]: 与athinput.readInput相同格式的参数,
+            如果文件不存在或没有参数文本则返回None
+    """
+    header = b''
+    try:
+        with open(path, 'rb') as f:
+            while PAR_END not in header:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk or len(header) > MAX_HEADER_SIZE:
+                    print(f"错误: {path} 不是有效的restart文件", flush=True)
+                    return None
+                header += chunk
+    except OSError as e:
+        print(f"错误: 无法读取restart文件 {path}: {e}", flush=True)
+        return None
+
+    text = header[:header.index(PAR_END)].decode(errors='replace')
+    return athinput.parseInput(text.splitlines())
+
+
+def restartInfo(path: str) -> Optional[Dict]:
+    """读取restart文件对应的模拟时间、步数与终止时间
+
+    返回:
+        Optional[Dict]: path、time、ncycle、tlim, 如果无法读取则返回None
+    """
+    params = readHeader(path)
+    if params is None:
+        return None
+    timeBlock = params.get('time', {})
+    try:
+        return {
+            'path':   path,
+            'time':   float(timeBlock.get('time', 0)),
+            'ncycle': int(timeBlock.get('ncycle', 0)),
+            'tlim':   float(timeBlock['tlim']) if 'tlim' in timeBlock else None,
+        }
+    except ValueError:
+        print(f"错误: {path} 的时间参数格式不正确", flush=True)
+        return None
+
+
+def loadCatalog(outputsDir: str) -> Dict[str, Dict]:
+    """读取restart文件目录缓存, 没有或损坏时返回空字典"""
+    path = os.path.join(outputsDir, CATALOG_FILE)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveCatalog(outputsDir: str, entries: Dict[str, Dict]) -> None:
+    """保存restart文件目录缓存, outputs目录不可写时跳过"""
+    path = os.path.join(outputsDir, CATALOG_FILE)
+    try:
+        with open(path + '.tmp', 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
+
+
+def listRestarts(outputsDir: str) -> List[Dict]:
+    """列出outputs目录下的所有restart文件, 按模拟时间排序
+
+    文件大小与修改时间未变的restart文件直接使用缓存中的时间与步数
+
+    返回:
+        List[Dict]: 每个restart文件的path、time、ncycle、tlim、size
+    """
+    if not os.path.isdir(outputsDir):
+        return []
+
+    cached = loadCatalog(outputsDir)
+    entries: Dict[str, Dict] = {}
+    with os.scandir(outputsDir) as it:
+        for entry in it:
+            if not entry.name.endswith('.rst') or not entry.is_file():
+                continue
+            stat = entry.stat()
+            record = cached.get(entry.name)
+            if record is None or record['size'] != stat.st_size or record['mtime'] != stat.st_mtime_ns:
+                info = restartInfo(entry.path)
+                if info is None:
+                    continue
+                record = {'time': info['time'], 'ncycle': info['ncycle'], 'tlim': info['tlim'],
+                          'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+            entries[entry.name] = record
+
+    if entries != cached:
+        saveCatalog(outputsDir, entries)
+
+    restarts = [dict(record, path=os.path.join(outputsDir, name)) for name, record in entries.items()]
+    # 同一时刻的周期输出与final文件内容相同, 排序时final排在后面
+    restarts.sort(key=lambda r: (r['ncycle'], r['time'], r['path'].endswith('.final.rst')))
+    return restarts
+
+
+def latestRestart(outputsDir: str) -> Optional[Dict]:
+    """找到模拟时间最新的restart文件, 没有时返回None"""
+    restarts = listRestarts(outputsDir)
+    return restarts[-1] if restarts else None
+
+
+def formatSize(size: int) -> str:
+    """将字节数格式化为便于阅读的字符串"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Athena++ restart文件目录')
+    parser.add_argument('outputs', nargs='?', default='outputs', help='outputs目录, 默认为当前目录下的outputs')
+    parser.add_argument('--latest', action='store_true', help='只输出模拟时间最新的restart文件路径')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    restarts = listRestarts(args.outputs)
+    if args.latest:
+        if not restarts:
+            sys.exit(1)
+        print(restarts[-1]['path'])
+        return
+
+    if not restarts:
+        print(f"{args.outputs} 中没有restart文件", flush=True)
+        return
+    print(f"{'#':>4}  {'file':<32}{'time':>14}{'ncycle':>12}{'size':>12}")
+    for i, r in enumerate(restarts):
+        print(f"{i:>4}  {os.path.basename(r['path']):<32}{r['time']:>14.6g}{r['ncycle']:>12}{formatSize(r['size']):>12}")
+
+
+if __name__ == "__main__":
+    main()
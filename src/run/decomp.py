@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+meshblock分解规划模块, 用于为run/rst作业选择网格块尺寸与节点数
+
+主要功能:
+1. 枚举能整除mesh的所有meshblock尺寸
+2. 按节点核数与内存预算筛选可行方案
+3. 以ghost zone面积/体积比估计每个方案的计算开销, 可用perf.json中的实测吞吐量校准
+4. 给出最优的<meshblock>设置与节点数, 并可直接写回athinput文件
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import athinput
+import perf
+
+# Athena++默认的ghost zone层数
+NGHOST = 2
+
+# 每个网格单元(含ghost zone)存储的实数个数估计:
+# 守恒量/原始量及其多步积分寄存器、面心磁场、电场、通量与重构临时数组
+VALUES_PER_CELL = 60
+
+# 未校准时ghost zone相对内部网格的计算开销系数
+DEFAULT_ALPHA = 1.0
+
+
+def divisors(n: int) -> List[int]:
+    """返回n的所有正因数(升序)"""
+    return [d for d in range(1, n + 1) if n % d == 0]
+
+
+def ghostOverhead(meshblock: List[int]) -> float:
+    """计算meshblock的ghost zone开销: (含ghost的网格数 - 内部网格数) / 内部网格数
+
+    nx=1的维度(二维模拟)不计ghost zone
+    """
+    interior = 1
+    total = 1
+    for nx in meshblock:
+        interior *= nx
+        total *= nx + 2 * NGHOST if nx > 1 else 1
+    return (total - interior) / interior
+
+
+def memoryPerRank(meshblock: List[int], FP: str = 'FP64') -> float:
+    """估计单个meshblock(单个进程)所需内存, 单位GB"""
+    cells = 1
+    for nx in meshblock:
+        cells *= nx + 2 * NGHOST if nx > 1 else 1
+    bytesPerValue = 4 if FP == 'FP32' else 8
+    return cells * VALUES_PER_CELL * bytesPerValue / 1024**3
+
+
+def calibrate(records: List[Dict]) -> Tuple[Optional[float], float]:
+    """用实测单核吞吐量校准开销模型 1/r = (1 + alpha * overhead) / r0
+
+    参数:
+        records (List[Dict]): perf.json中的运行记录
+
+    返回:
+        Tuple[Optional[float], float]: (r0, alpha), 无可用记录时r0为None
+    """
+    points = [(ghostOverhead(r['meshblock']), r['zcsPerCore'])
+              for r in records if r.get('zcsPerCore') and all(r['meshblock'])]
+    if not points:
+        return None, DEFAULT_ALPHA
+
+    # 只有一种开销时无法拟合alpha, 沿用默认值
+    overheads = {round(ovh, 6) for ovh, _ in points}
+    if len(overheads) < 2:
+        r0 = sum(r * (1 + DEFAULT_ALPHA * ovh) for ovh, r in points) / len(points)
+        return r0, DEFAULT_ALPHA
+
+    # 最小二乘拟合 1/r = a + b * overhead
+    n = len(points)
+    xs = [ovh for ovh, _ in points]
+    ys = [1 / r for _, r in points]
+    xMean = sum(xs) / n
+    yMean = sum(ys) / n
+    b = sum((x - xMean) * (y - yMean) for x, y in zip(xs, ys)) / sum((x - xMean)**2 for x in xs)
+    a = yMean - b * xMean
+    if a <= 0 or b < 0:
+        # 数据噪声过大时拟合结果没有物理意义
+        r0 = sum(r * (1 + DEFAULT_ALPHA * ovh) for ovh, r in points) / len(points)
+        return r0, DEFAULT_ALPHA
+    return 1 / a, b / a
+
+
+def plan(mesh: List[int], coresPerNode: int, memPerNode: Optional[float] = None,
+         maxNodes: Optional[int] = None, FP: str = 'FP64', alpha: float = DEFAULT_ALPHA,
+         r0: Optional[float] = None, objective: str = 'time') -> List[Dict]:
+    """枚举并排序所有可行的meshblock分解方案
+
+    参数:
+        mesh (List[int]): 网格尺寸 [nx1, nx2, nx3]
+        coresPerNode (int): 每个节点的核数
+        memPerNode (Optional[float]): 每个节点的内存预算(GB), 为None时不限制
+        maxNodes (Optional[int]): 最多可用节点数, 为None时不限制
+        FP (str): 量化精度, FP64或FP32
+        alpha (float): ghost zone开销系数
+        r0 (Optional[float]): 无ghost开销时的单核吞吐量(zone-cycles/s), 仅用于估计绝对时间
+        objective (str): time为按单步耗时排序, cost为按核时消耗排序
+
+    返回:
+        List[Dict]: 按目标从优到劣排列的方案, 开销相同时优先x1方向更长的meshblock(内存连续方向)
+    """
+    choices = []
+    for nx in mesh:
+        if nx == 1:
+            choices.append([1])
+        else:
+            # meshblock每个方向至少要容纳两侧的ghost zone
+            choices.append([d for d in divisors(nx) if d >= 2 * NGHOST])
+
+    options = []
+    for mb1 in choices[0]:
+        for mb2 in choices[1]:
+            for mb3 in choices[2]:
+                meshblock = [mb1, mb2, mb3]
+                cores = (mesh[0] // mb1) * (mesh[1] // mb2) * (mesh[2] // mb3)
+                nodes = math.ceil(cores / coresPerNode)
+                if maxNodes is not None and nodes > maxNodes:
+                    continue
+
+                memory = memoryPerRank(meshblock, FP)
+                ranksPerNode = min(cores, coresPerNode)
+                if memPerNode is not None and memory * ranksPerNode > memPerNode:
+                    continue
+
+                overhead = ghostOverhead(meshblock)
+                # 每个进程一个meshblock, 单步耗时正比于含开销的网格数
+                cycleCost = mb1 * mb2 * mb3 * (1 + alpha * overhead)
+                options.append({
+                    'meshblock': meshblock,
+                    'cores':     cores,
+                    'nodes':     nodes,
+                    'fill':      cores / (nodes * coresPerNode),
+                    'overhead':  overhead,
+                    'memory':    memory * ranksPerNode,
+                    'cycleTime': cycleCost / r0 if r0 else None,
+                    'cycleCost': cycleCost,
+                    'coreCost':  cycleCost * nodes * coresPerNode,
+                })
+
+    if objective == 'cost':
+        options.sort(key=lambda o: (o['coreCost'], o['cycleCost'], -o['meshblock'][0]))
+    else:
+        options.sort(key=lambda o: (o['cycleCost'], o['nodes'], -o['meshblock'][0]))
+    return options
+
+
+def loadRecords() -> List[Dict]:
+    """读取所有case的perf.json记录, 用于校准开销模型"""
+    records: List[Dict] = []
+    for perfFile in glob.glob(os.path.join(perf.getSimulationsDir(), '*', perf.PERF_FILE)):
+        try:
+            with open(perfFile, 'r') as f:
+                records.extend(json.load(f))
+        except ValueError:
+            continue
+    return records
+
+
+def meshblockBlock(meshblock: List[int]) -> str:
+    """生成athinput中的<meshblock>文本"""
+    lines = ['<meshblock>']
+    for i, nx in enumerate(meshblock, start=1):
+        lines.append(f"nx{i}        = {nx}")
+    return '\n'.join(lines)
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='meshblock分解规划工具')
+    parser.add_argument('--input', type=str, default='athinput.hgb', help='athinput文件路径')
+    parser.add_argument('--cores-per-node', type=int,
+                        default=int(os.environ.get('CORES_PER_NODE', 64)), help='每个节点的核数')
+    parser.add_argument('--mem-per-node', type=float,
+                        default=float(os.environ['MEM_PER_NODE']) if os.environ.get('MEM_PER_NODE') else None,
+                        help='每个节点的内存预算(GB)')
+    parser.add_argument('--max-nodes', type=int,
+                        default=int(os.environ['MAX_NODES']) if os.environ.get('MAX_NODES') else None,
+                        help='最多可用节点数, 默认为当前meshblock对应的节点数')
+    parser.add_argument('--fp', choices=['FP64', 'FP32'], default='FP64', help='量化精度')
+    parser.add_argument('--objective', choices=['time', 'cost'], default='time',
+                        help='time: 单步耗时最短; cost: 核时消耗最少')
+    parser.add_argument('--calibrate', action='store_true', help='用perf.json中的实测吞吐量校准开销模型')
+    parser.add_argument('--top', type=int, default=10, help='显示的方案个数')
+    parser.add_argument('--apply', action='store_true', help='将最优方案写回athinput文件')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    params = athinput.readInput(args.input)
+    if params is None:
+        sys.exit(1)
+    mesh = athinput.getMesh(params)
+    current = athinput.getMeshBlock(params)
+
+    # 默认不超过当前分解所占用的节点数
+    maxNodes = args.max_nodes
+    if maxNodes is None:
+        cores = 1
+        for nx, mb in zip(mesh, current):
+            cores *= max(nx // mb, 1)
+        maxNodes = math.ceil(cores / args.cores_per_node)
+
+    r0, alpha = None, DEFAULT_ALPHA
+    if args.calibrate:
+        r0, alpha = calibrate(loadRecords())
+        if r0 is None:
+            print("警告: 没有可用的perf记录, 使用未校准的开销模型", flush=True)
+        else:
+            print(f"校准结果: r0 = {r0:.3e} zone-cycles/s/core, alpha = {alpha:.3f}", flush=True)
+
+    options = plan(mesh, args.cores_per_node, args.mem_per_node, maxNodes,
+                   args.fp, alpha, r0, args.objective)
+    if not options:
+        print(f"错误: Mesh {mesh[0]} × {mesh[1]} × {mesh[2]} 在当前节点与内存限制下没有可行的meshblock分解",
+              flush=True)
+        sys.exit(1)
+
+    print(f"\nMesh: {mesh[0]} × {mesh[1]} × {mesh[2]}    当前MeshBlock: {current[0]} × {current[1]} × {current[2]}")
+    print(f"{'meshblock':>14}{'cores':>8}{'nodes':>7}{'fill':>7}{'ghost':>8}{'mem/node':>10}{'cycle':>12}")
+    for option in options[:args.top]:
+        meshblock = 'x'.join(str(nx) for nx in option['meshblock'])
+        cycle = f"{option['cycleTime']:.3e}s" if option['cycleTime'] else f"{option['cycleCost']:.3e}"
+        marker = ' *' if option['meshblock'] == current else ''
+        print(f"{meshblock:>14}{option['cores']:>8}{option['nodes']:>7}{option['fill']:>7.0%}"
+              f"{option['overhead']:>8.2f}{option['memory']:>9.1f}G{cycle:>12}{marker}")
+
+    best = options[0]
+    print(f"\n推荐方案: {best['nodes']} 个节点, {best['cores']} 个核心\n")
+    print(meshblockBlock(best['meshblock']))
+    print("")
+
+    if args.apply:
+        athinput.setParams(args.input, {'meshblock': {f'nx{i}': nx for i, nx in enumerate(best['meshblock'], start=1)}})
+        print(f"已将推荐的meshblock写入 {args.input}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+作业状态查询模块, 代替提交作业后循环等待slurm输出文件的做法
+
+主要功能:
+1. 查询作业状态、排队原因、排队位置与预计开始时间
+2. 可选地以指数退避的间隔短暂等待作业开始, 然后立即返回
+"""
+
+import argparse
+import getpass
+import sys
+
+import slurm
+
+
+def describe(jobID: str, status: dict) -> str:
+    """生成作业状态的说明文字"""
+    state = status['state']
+    text = f"作业 {jobID}: {state}"
+    if state in slurm.PENDING_STATES:
+        if status['reason']:
+            text += f" ({status['reason']})"
+        position = slurm.queuePosition(jobID, status['partition'])
+        if position is not None:
+            text += f", 分区 {status['partition']} 排队位置 {position[0]}/{position[1]}"
+        if status['start'] and status['start'] not in ('N/A', 'Unknown'):
+            text += f", 预计开始时间 {status['start']}"
+    return text
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='作业状态查询工具')
+    parser.add_argument('jobs', nargs='*', help='作业ID, 默认为当前用户的所有作业')
+    parser.add_argument('--wait', type=float, default=0,
+                        help='最多等待作业开始的秒数, 查询间隔按指数增长, 默认不等待')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    jobIDs = args.jobs
+    if not jobIDs:
+        output = slurm.run('squeue', ['-h', '-u', getpass.getuser(), '-o', '%i'])
+        if output is None:
+            print("错误: 无法调用squeue", flush=True)
+            sys.exit(1)
+        jobIDs = output.split()
+        if not jobIDs:
+            print("当前没有排队或运行中的作业", flush=True)
+            return
+
+    for jobID in jobIDs:
+        status = slurm.waitForStart(jobID, args.wait)
+        print(describe(jobID, status), flush=True)
+
+
+if __name__ == "__main__":
+    main()
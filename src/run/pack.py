@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+小作业合并模块, 把多个不足一个节点的case放进同一个节点分配中运行
+
+主要功能:
+1. 将核数少于一个节点的case标记为待合并(pack.pending)
+2. 按核数对待合并的case做装箱(first-fit decreasing), 每个箱子对应一个整节点
+3. 为每个节点生成一个作业脚本, 用srun --exclusive并发运行其中的case, 每个作业步按核数分得分配的内存
+4. 通过每个case目录下的pack.status分别跟踪运行状态, 作业被终止后由trap或squeue/sacct标记为失败
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import athinput
+import perf
+import slurm
+
+# 待合并标记文件, 位于case目录下
+PENDING_FILE = 'pack.pending'
+
+# 运行状态文件, 位于case目录下, 内容为 "状态 作业ID [退出码]"
+STATUS_FILE = 'pack.status'
+
+# 合并作业脚本所在目录(位于simulations/shearingBox下)
+PACK_DIR = '.packs'
+
+
+def caseCores(caseDir: str) -> int:
+    """由athinput.hgb计算case所需核数(每个核一个meshblock)"""
+    params = athinput.readInput(os.path.join(caseDir, 'athinput.hgb'))
+    if params is None:
+        return 0
+    cores = 1
+    for nx, mb in zip(athinput.getMesh(params), athinput.getMeshBlock(params)):
+        cores *= nx // mb
+    return cores
+
+
+def addPending(caseDir: str, walltime: int, coresPerNode: int) -> bool:
+    """将case标记为待合并
+
+    返回:
+        bool: 是否标记成功, 核数不少于一个节点的case不需要合并
+    """
+    cores = caseCores(caseDir)
+    if cores == 0:
+        return False
+    if cores >= coresPerNode:
+        print(f"警告: {os.path.basename(caseDir)} 需要 {cores} 个核心, 不少于一个节点, 无需合并", flush=True)
+        return False
+
+    with open(os.path.join(caseDir, PENDING_FILE), 'w') as f:
+        json.dump({'cores': cores, 'walltime': walltime, 'created': time.time()}, f)
+    print(f"已加入待合并队列: {os.path.basename(caseDir)} ({cores} 个核心)", flush=True)
+    return True
+
+
+def loadPending(simulationsDir: str) -> List[Dict]:
+    """读取所有待合并的case"""
+    pending = []
+    for marker in sorted(glob.glob(os.path.join(simulationsDir, '*', PENDING_FILE))):
+        with open(marker, 'r') as f:
+            entry = json.load(f)
+        entry['caseDir'] = os.path.dirname(marker)
+        pending.append(entry)
+    return pending
+
+
+def binPack(entries: List[Dict], capacity: int) -> List[List[Dict]]:
+    """按核数装箱(first-fit decreasing), 每个箱子的容量为一个节点的核数"""
+    bins: List[List[Dict]] = []
+    loads: List[int] = []
+    for entry in sorted(entries, key=lambda e: -e['cores']):
+        for i, load in enumerate(loads):
+            if load + entry['cores'] <= capacity:
+                bins[i].append(entry)
+                loads[i] += entry['cores']
+                break
+        else:
+            bins.append([entry])
+            loads.append(entry['cores'])
+    return bins
+
+
+def writePackScript(script: str, entries: List[Dict], username: str) -> None:
+    """生成在一个节点上并发运行多个case的作业脚本"""
+    cores = sum(e['cores'] for e in entries)
+    walltime = max(e['walltime'] for e in entries)
+
+    caseDirs = ' '.join(f'"{e["caseDir"]}"' for e in entries)
+    commands = [
+        '# 内存是可分配资源时, 不指定内存的作业步会占用整个分配的内存, 其余case的作业步只能排队;',
+        '# 按核数把分配的内存分给各作业步, 集群不按内存分配时两个变量都不存在, 不加内存选项',
+        'if [ -n "$SLURM_MEM_PER_CPU" ]; then',
+        '    STEP_MEM="--mem-per-cpu=$SLURM_MEM_PER_CPU"',
+        'elif [ -n "$SLURM_MEM_PER_NODE" ]; then',
+        '    STEP_MEM="--mem-per-cpu=$(( SLURM_MEM_PER_NODE / SLURM_NTASKS ))"',
+        'fi',
+        '',
+        '# 作业到达时间限制被终止时, 把仍在运行的case标记为失败, 否则pack.status会一直停在running',
+        'on_term() {',
+        f'    for dir in {caseDirs}; do',
+        f'        if grep -qE "^(queued|running) " "$dir/{STATUS_FILE}" 2>/dev/null; then',
+        f'            echo "failed $SLURM_JOB_ID timeout" > "$dir/{STATUS_FILE}"',
+        '        fi',
+        '    done',
+        '    exit 1',
+        '}',
+        'trap on_term TERM',
+        '',
+        '# 在case目录中运行一个case, 并把状态写入pack.status',
+        'run_case() {',
+        '    cd "$1" || return',
+        f'    echo "running $SLURM_JOB_ID" > {STATUS_FILE}',
+        '    srun --exclusive -N 1 -n $2 $STEP_MEM athena -i athinput.hgb -d outputs -t $3:00:00 \\',
+        '        > "slurm-${SLURM_JOB_ID}.out" 2>&1',
+        '    code=$?',
+        '    if [ $code -eq 0 ]; then',
+        f'        echo "done $SLURM_JOB_ID" > {STATUS_FILE}',
+        '    else',
+        f'        echo "failed $SLURM_JOB_ID $code" > {STATUS_FILE}',
+        '    fi',
+        '}',
+        '',
+    ]
+    for e in entries:
+        commands.append(f'run_case "{e["caseDir"]}" {e["cores"]} {e["walltime"]} &')
+    commands.append('wait')
+
+    slurm.writeJobScript(script, [
+        ('-J', username),
+        ('-N', 1),
+        ('-n', cores),
+        ('-t', walltime * 60 + 1),
+        ('-o', os.path.join(os.path.dirname(script), 'slurm-%j.out')),
+    ], commands)
+
+
+def submitPending(simulationsDir: str, coresPerNode: int, username: str, dryRun: bool = False,
+                  extra: Optional[List[Dict]] = None) -> List[str]:
+    """将所有待合并的case装箱并提交
+
+    参数:
+        extra (Optional[List[Dict]]): 没有写入pack.pending标记、只在内存中参与装箱的case(caseDir、cores、walltime),
+            供sweep.py --dry-run预览装箱结果, 只能与dryRun一起使用
+
+    返回:
+        List[str]: 提交的作业ID
+    """
+    pending = loadPending(simulationsDir) + (extra or [])
+    if not pending:
+        print("没有待合并的case", flush=True)
+        return []
+
+    packDir = os.path.join(simulationsDir, PACK_DIR)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+
+    jobIDs = []
+    for k, entries in enumerate(binPack(pending, coresPerNode)):
+        names = ', '.join(os.path.basename(e['caseDir']) for e in entries)
+        used = sum(e['cores'] for e in entries)
+
+        # 预览时不生成作业脚本
+        if dryRun:
+            print(f"节点 {k}: {used}/{coresPerNode} 核心: {names}", flush=True)
+            continue
+
+        os.makedirs(packDir, exist_ok=True)
+        script = os.path.join(packDir, f'pack-{stamp}-{k}.sh')
+        writePackScript(script, entries, username)
+        jobID = slurm.submit(script, cwd=packDir)
+        if jobID is None:
+            continue
+        for e in entries:
+            with open(os.path.join(e['caseDir'], STATUS_FILE), 'w') as f:
+                f.write(f"queued {jobID}\n")
+            os.remove(os.path.join(e['caseDir'], PENDING_FILE))
+        print(f"已提交合并作业 {jobID}: {used}/{coresPerNode} 核心: {names}", flush=True)
+        jobIDs.append(jobID)
+    return jobIDs
+
+
+def printStatus(simulationsDir: str) -> None:
+    """打印所有参与合并的case的运行状态
+
+    状态为queued或running但作业已经结束时(例如节点故障, 作业脚本来不及更新pack.status),
+    由squeue/sacct查询的作业状态改为failed并写回pack.status
+    """
+    rows = [(os.path.basename(e['caseDir']), 'pending', '-') for e in loadPending(simulationsDir)]
+    for statusFile in sorted(glob.glob(os.path.join(simulationsDir, '*', STATUS_FILE))):
+        with open(statusFile, 'r') as f:
+            fields = f.read().split()
+        if len(fields) >= 2 and fields[0] in ('queued', 'running'):
+            jobState = slurm.jobState(fields[1])['state']
+            if jobState not in slurm.PENDING_STATES | {'RUNNING', 'COMPLETING', 'SUSPENDED', 'UNKNOWN'}:
+                fields = ['failed', fields[1], jobState]
+                with open(statusFile, 'w') as f:
+                    f.write(' '.join(fields) + '\n')
+        state = fields[0] if fields else 'unknown'
+        if state == 'failed' and len(fields) > 2:
+            state = f"failed({fields[2]})"
+        rows.append((os.path.basename(os.path.dirname(statusFile)), state, fields[1] if len(fields) > 1 else '-'))
+
+    if not rows:
+        print("没有参与合并的case", flush=True)
+        return
+    print(f"{'case':<40}{'state':<14}{'jobID':>10}")
+    for case, state, jobID in rows:
+        print(f"{case[:39]:<40}{state:<14}{jobID:>10}")
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='小作业合并工具')
+    subparsers = parser.add_subparsers(dest='command')
+
+    add = subparsers.add_parser('add', help='将case加入待合并队列')
+    add.add_argument('cases', nargs='+', help='case名称')
+    add.add_argument('--walltime', type=int, default=24, help='运行时间限制(小时)')
+
+    submit = subparsers.add_parser('submit', help='装箱并提交所有待合并的case')
+    submit.add_argument('--dry-run', action='store_true', help='只显示装箱结果, 不提交')
+
+    subparsers.add_parser('status', help='查看各case的运行状态')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    simulationsDir = perf.getSimulationsDir()
+    coresPerNode = int(os.environ.get('CORES_PER_NODE', 64))
+    username = os.environ.get('USERNAME', 'pack')
+
+    if args.command == 'add':
+        ok = True
+        for case in args.cases:
+            caseDir = os.path.join(simulationsDir, case)
+            if not os.path.isfile(os.path.join(caseDir, 'athena')):
+                print(f"错误: case {case} 中没有athena可执行文件", flush=True)
+                ok = False
+                continue
+            ok = addPending(caseDir, args.walltime, coresPerNode) and ok
+        if not ok:
+            sys.exit(1)
+    elif args.command == 'submit':
+        submitPending(simulationsDir, coresPerNode, username, args.dry_run)
+    else:
+        printStatus(simulationsDir)
+
+
+if __name__ == "__main__":
+    main()
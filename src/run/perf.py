@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能统计模块, 用于从Athena++运行日志中提取计算吞吐量
+
+主要功能:
+1. 解析slurm-*.out中的cycle/time/dt行与结束时的zone-cycles统计
+2. 将每次运行的吞吐量记录保存到case目录下的perf.json
+3. 按case、meshblock尺寸、量化精度、Riemann求解器比较吞吐量
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+import athinput
+
+# 性能记录文件名, 位于case目录下
+PERF_FILE = 'perf.json'
+
+# shearingBox.sh写入的编译配置文件名, 位于case目录下
+CONFIG_FILE = 'athena.config'
+
+# Athena++标准输出中的关键行
+CYCLE_LINE = re.compile(r'cycle=(\d+)\s+time=([0-9.eE+-]+)\s+dt=([0-9.eE+-]+)')
+TERMINATE_LINE = re.compile(r'Terminating on (.+)')
+SUMMARY_LINES = {
+    'zoneCycles': re.compile(r'zone-cycles\s*=\s*([0-9.eE+-]+)'),
+    'cpuTime':    re.compile(r'cpu time used\s*=\s*([0-9.eE+-]+)'),
+    'zcs':        re.compile(r'zone-cycles/cpu_second\s*=\s*([0-9.eE+-]+)'),
+    'ompTime':    re.compile(r'omp wtime used\s*=\s*([0-9.eE+-]+)'),
+    'zcsOmp':     re.compile(r'zone-cycles/omp_wsecond\s*=\s*([0-9.eE+-]+)'),
+}
+
+# 比较吞吐量时可用的分组方式
+GROUP_KEYS = {
+    'case':      lambda r: r['case'],
+    'meshblock': lambda r: 'x'.join(str(n) for n in r['meshblock']),
+    'fp':        lambda r: r['FP'],
+    'rsolver':   lambda r: r['rSolver'],
+}
+
+
+def getSimulationsDir() -> str:
+    """获取剪切盒模拟case所在目录"""
+    athenaui_path = os.environ.get('ATHENAUI_PATH',
+                                   os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    return os.path.join(athenaui_path, 'simulations', 'shearingBox')
+
+
+def readConfig(caseDir: str) -> Dict[str, str]:
+    """读取case目录下的编译配置(量化精度、状态方程、Riemann求解器)
+
+    返回:
+        Dict[str, str]: 编译配置, 缺失的项记为unknown
+    """
+    config = {'FP': 'unknown', 'EoS': 'unknown', 'rSolver': 'unknown'}
+    path = os.path.join(caseDir, CONFIG_FILE)
+    if not os.path.isfile(path):
+        return config
+
+    keys = {'FP': 'FP', 'EOS': 'EoS', 'RSOLVER': 'rSolver'}
+    with open(path, 'r') as f:
+        for line in f:
+            if '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            if key.strip() in keys:
+                config[keys[key.strip()]] = value.strip()
+    return config
+
+
+def parseLog(logFile: str) -> Optional[Dict]:
+    """解析一个Athena++运行日志
+
+    参数:
+        logFile (str): slurm-*.out文件路径
+
+    返回:
+        Optional[Dict]: 运行记录, 如果日志中没有任何cycle行则返回None
+    """
+    firstCycle = None
+    lastCycle = None
+    tStart = None
+    tEnd = None
+    dtSum = 0.0
+    nCycleLines = 0
+    record: Dict = {key: None for key in SUMMARY_LINES}
+    record['terminated'] = None
+
+    with open(logFile, 'r', errors='replace') as f:
+        for line in f:
+            match = CYCLE_LINE.search(line)
+            if match:
+                cycle, time, dt = int(match.group(1)), float(match.group(2)), float(match.group(3))
+                if firstCycle is None:
+                    firstCycle, tStart = cycle, time
+                lastCycle, tEnd = cycle, time
+                dtSum += dt
+                nCycleLines += 1
+                continue
+
+            match = TERMINATE_LINE.search(line)
+            if match:
+                record['terminated'] = match.group(1).strip()
+                continue
+
+            for key, pattern in SUMMARY_LINES.items():
+                match = pattern.search(line)
+                if match:
+                    record[key] = float(match.group(1))
+                    break
+
+    if firstCycle is None:
+        return None
+
+    record.update({
+        'file':       os.path.basename(logFile),
+        'jobID':      os.path.basename(logFile)[len('slurm-'):-len('.out')],
+        'mtime':      os.path.getmtime(logFile),
+        'firstCycle': firstCycle,
+        'lastCycle':  lastCycle,
+        'cycles':     lastCycle - firstCycle,
+        'tStart':     tStart,
+        'tEnd':       tEnd,
+        'dtMean':     dtSum / nCycleLines,
+    })
+    return record
+
+
+def collect(caseDir: str) -> List[Dict]:
+    """解析case目录下所有slurm日志, 更新并返回perf.json中的运行记录
+
+    已解析且之后未再修改的日志不会重复解析
+    """
+    caseDir = os.path.abspath(caseDir)
+    perfFile = os.path.join(caseDir, PERF_FILE)
+
+    records: Dict[str, Dict] = {}
+    if os.path.isfile(perfFile):
+        try:
+            with open(perfFile, 'r') as f:
+                records = {r['file']: r for r in json.load(f)}
+        except (ValueError, KeyError) as e:
+            print(f"警告: 无法读取 {perfFile}, 将重新解析全部日志: {e}", flush=True)
+
+    params = None
+    config = None
+    for logFile in glob.glob(os.path.join(caseDir, 'slurm-*.out')):
+        name = os.path.basename(logFile)
+        # 结束统计已存在的记录不会再变化
+        old = records.get(name)
+        if old is not None and old['zcs'] is not None and old['mtime'] >= os.path.getmtime(logFile):
+            continue
+
+        record = parseLog(logFile)
+        if record is None:
+            continue
+
+        if params is None:
+            params = athinput.readInput(os.path.join(caseDir, 'athinput.hgb')) or {}
+            config = readConfig(caseDir)
+
+        mesh = athinput.getMesh(params) if params else [0, 0, 0]
+        meshblock = athinput.getMeshBlock(params) if params else [0, 0, 0]
+        nBlocks = 1
+        for nx, mb in zip(mesh, meshblock):
+            nBlocks *= nx // mb if mb else 0
+
+        record.update(config)
+        record['case'] = os.path.basename(caseDir)
+        record['mesh'] = mesh
+        record['meshblock'] = meshblock
+        # 每个核心分配一个meshblock
+        record['cores'] = nBlocks
+        record['zcsPerCore'] = record['zcs'] / nBlocks if record['zcs'] and nBlocks else None
+        records[name] = record
+
+    result = sorted(records.values(), key=lambda r: r['mtime'])
+    if result:
+        with open(perfFile, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    return result
+
+
+def printRecords(records: List[Dict]) -> None:
+    """逐条打印运行记录"""
+    header = f"{'case':<20}{'jobID':>10}{'cores':>7}{'meshblock':>14}{'FP':>6}{'rSolver':>9}" \
+             f"{'cycles':>10}{'zone-cycles/s':>15}{'per core':>12}"
+    print(header)
+    print('-' * len(header))
+    for r in records:
+        zcs = f"{r['zcs']:.3e}" if r['zcs'] else '-'
+        perCore = f"{r['zcsPerCore']:.3e}" if r['zcsPerCore'] else '-'
+        meshblock = 'x'.join(str(n) for n in r['meshblock'])
+        print(f"{r['case'][:19]:<20}{r['jobID']:>10}{r['cores']:>7}{meshblock:>14}{r['FP']:>6}"
+              f"{r['rSolver']:>9}{r['cycles']:>10}{zcs:>15}{perCore:>12}")
+
+
+def compare(records: List[Dict], by: str) -> None:
+    """按指定方式分组比较单核吞吐量, 从快到慢排列"""
+    groups: Dict[str, List[float]] = {}
+    for r in records:
+        if r['zcsPerCore']:
+            groups.setdefault(GROUP_KEYS[by](r), []).append(r['zcsPerCore'])
+
+    if not groups:
+        print("没有已完成的运行记录可供比较", flush=True)
+        return
+
+    ranked = sorted(groups.items(), key=lambda item: -sum(item[1]) / len(item[1]))
+    best = sum(ranked[0][1]) / len(ranked[0][1])
+
+    print(f"\n按 {by} 分组的单核吞吐量 (zone-cycles/cpu_second/core):")
+    print(f"{by:<20}{'runs':>6}{'mean':>12}{'min':>12}{'max':>12}{'relative':>10}")
+    for key, values in ranked:
+        mean = sum(values) / len(values)
+        print(f"{key[:19]:<20}{len(values):>6}{mean:>12.3e}{min(values):>12.3e}"
+              f"{max(values):>12.3e}{mean / best:>10.2f}")
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Athena++运行吞吐量统计工具')
+    parser.add_argument('cases', nargs='*', help='要比较的case名称, 默认为当前case目录')
+    parser.add_argument('--all', action='store_true', help='比较simulations/shearingBox下的所有case')
+    parser.add_argument('--by', choices=sorted(GROUP_KEYS), default='meshblock',
+                        help='吞吐量比较的分组方式, 默认为meshblock')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    simulationsDir = getSimulationsDir()
+    if args.all:
+        caseDirs = sorted(d for d in glob.glob(os.path.join(simulationsDir, '*'))
+                          if os.path.isfile(os.path.join(d, 'athinput.hgb')))
+    elif args.cases:
+        caseDirs = [os.path.join(simulationsDir, case) for case in args.cases]
+    else:
+        caseDirs = [os.getcwd()]
+
+    records: List[Dict] = []
+    for caseDir in caseDirs:
+        if not os.path.isdir(caseDir):
+            print(f"错误: case目录不存在: {caseDir}", flush=True)
+            sys.exit(1)
+        records.extend(collect(caseDir))
+
+    if not records:
+        print("错误: 未找到包含cycle信息的slurm输出文件", flush=True)
+        sys.exit(1)
+
+    printRecords(records)
+    if len(caseDirs) > 1 or len(records) > 1:
+        compare(records, args.by)
+
+
+if __name__ == "__main__":
+    main()
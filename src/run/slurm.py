@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Slurm作业提交与查询模块
+
+主要功能:
+1. 生成作业脚本
+2. 通过sbatch --parsable提交作业并返回作业ID
+3. 通过squeue/sacct查询作业状态与排队位置, 以指数退避的间隔等待作业开始
+
+调度器命令可通过环境变量ATHENAUI_SBATCH、ATHENAUI_SQUEUE、ATHENAUI_SACCT、ATHENAUI_SCANCEL替换,
+便于用假的调度器脚本测试
+"""
+
+import os
+import shlex
+import subprocess
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 仍在排队的作业状态
+PENDING_STATES = {'PENDING', 'CONFIGURING', 'REQUEUED', 'RESIZING'}
+
+
+def schedulerCommand(name: str) -> List[str]:
+    """获取调度器命令, 例如ATHENAUI_SBATCH可替换sbatch"""
+    return shlex.split(os.environ.get(f'ATHENAUI_{name.upper()}', name))
+
+
+def writeJobScript(path: str, directives: Sequence[Tuple[str, object]], commands: Sequence[str]) -> None:
+    """生成作业脚本
+
+    参数:
+        path (str): 作业脚本路径
+        directives (Sequence[Tuple[str, object]]): #SBATCH选项, 例如 [('-N', 1), ('-n', 64)]
+        commands (Sequence[str]): 作业中依次执行的命令
+    """
+    lines = ['#!/bin/bash', '']
+    for flag, value in directives:
+        lines.append(f"#SBATCH {flag} {value}")
+    lines.append('')
+    lines.extend(commands)
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.chmod(path, 0o755)
+
+
+def submit(script: str, options: Sequence[str] = (), cwd: Optional[str] = None) -> Optional[str]:
+    """提交作业脚本
+
+    参数:
+        script (str): 作业脚本路径
+        options (Sequence[str]): 额外的sbatch参数, 例如 ['--dependency=afterok:123']
+        cwd (Optional[str]): 提交作业时的工作目录, slurm输出文件默认写在该目录
+
+    返回:
+        Optional[str]: 作业ID, 如果提交失败则返回None
+    """
+    command = schedulerCommand('sbatch') + ['--parsable'] + list(options) + [script]
+    try:
+        result = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        print(f"错误: 无法调用sbatch: {e}", flush=True)
+        return None
+
+    if result.returncode != 0:
+        print(f"错误: 作业提交失败: {result.stderr.decode(errors='replace').strip()}", flush=True)
+        return None
+
+    # --parsable的输出格式为 "jobid" 或 "jobid;cluster"
+    output = result.stdout.decode(errors='replace').strip()
+    return output.split(';')[0] if output else None
+
+
+def run(name: str, args: Sequence[str]) -> Optional[str]:
+    """调用调度器查询命令, 返回标准输出, 命令失败时返回None"""
+    try:
+        result = subprocess.run(schedulerCommand(name) + list(args),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode(errors='replace')
+
+
+def jobState(jobID: str) -> Dict[str, str]:
+    """查询作业状态
+
+    先查询squeue(排队或运行中的作业), 作业已离开队列时再查询sacct
+
+    返回:
+        Dict[str, str]: state(状态)、reason(排队原因)、partition(分区)、start(预计开始时间),
+            无法查询时state为UNKNOWN
+    """
+    output = run('squeue', ['-h', '-j', jobID, '-o', '%T|%r|%P|%S'])
+    if output and output.strip():
+        state, reason, partition, start = (output.strip().splitlines()[0].split('|') + [''] * 4)[:4]
+        return {'state': state, 'reason': reason, 'partition': partition, 'start': start}
+
+    output = run('sacct', ['-n', '-X', '-P', '-j', jobID, '-o', 'State'])
+    if output and output.strip():
+        # sacct的状态可能带有附加说明, 例如 "CANCELLED by 1000"
+        return {'state': output.strip().splitlines()[0].split()[0], 'reason': '', 'partition': '', 'start': ''}
+
+    return {'state': 'UNKNOWN', 'reason': '', 'partition': '', 'start': ''}
+
+
+def queuePosition(jobID: str, partition: str) -> Optional[Tuple[int, int]]:
+    """查询排队作业在所在分区中按优先级的位置
+
+    返回:
+        Optional[Tuple[int, int]]: (位置, 排队作业总数), 作业不在排队时返回None
+    """
+    args = ['-h', '-t', 'PD', '-o', '%i', '--sort=-p']
+    if partition:
+        args += ['-p', partition]
+    output = run('squeue', args)
+    if not output:
+        return None
+    pending = output.split()
+    if jobID not in pending:
+        return None
+    return pending.index(jobID) + 1, len(pending)
+
+
+def waitForStart(jobID: str, timeout: float, interval: float = 0.5,
+                 maxInterval: float = 30.0) -> Dict[str, str]:
+    """等待作业离开排队状态, 查询间隔按指数增长
+
+    参数:
+        jobID (str): 作业ID
+        timeout (float): 最长等待时间(秒), 为0时只查询一次
+        interval (float): 初始查询间隔(秒)
+        maxInterval (float): 最大查询间隔(秒)
+
+    返回:
+        Dict[str, str]: 最后一次查询到的作业状态
+    """
+    deadline = time.time() + timeout
+    status = jobState(jobID)
+    while status['state'] in PENDING_STATES and time.time() < deadline:
+        time.sleep(min(interval, max(deadline - time.time(), 0)))
+        interval = min(interval * 2, maxInterval)
+        status = jobState(jobID)
+    return status
+
+
+def cancel(jobID: str) -> bool:
+    """取消作业, 返回是否成功"""
+    return run('scancel', [jobID]) is not None
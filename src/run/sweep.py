@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+剪切盒参数扫描模块, 批量生成并提交模拟case
+
+主要功能:
+1. 从TOML/YAML/JSON文件或命令行读取参数网格
+2. 由input模板为每组参数生成case目录与athinput.hgb
+3. 复用编译缓存中configure选项相同的athena可执行文件
+4. 将资源需求相同的case合并为一个Slurm作业数组提交, 而不是逐个sbatch;
+   使用--pack时不足一个节点的case交给pack.py装箱, 多个case共享一个节点
+
+参数网格文件示例(TOML):
+
+    name     = "nuEta"
+    template = "default"
+    walltime = 24
+
+    [params]
+    "problem/nu_iso"  = [1e-4, 2e-4]
+    "problem/eta_ohm" = [1e-4, 2e-4]
+    "mesh/nx"         = ["64x128x64", "128x256x128"]
+
+键为"block/param"时修改athinput中对应的参数, "mesh/nx"同时设置nx1、nx2、nx3;
+键为FP、EoS、rSolver时修改编译选项
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import athinput
+import build
+import decomp
+import pack
+import perf
+import slurm
+
+# 编译选项类参数
+BUILD_KEYS = ['FP', 'EoS', 'rSolver']
+
+# 参数扫描记录所在目录(位于simulations/shearingBox下)
+SWEEP_DIR = '.sweeps'
+
+
+def loadGrid(path: str) -> Dict:
+    """读取参数网格文件, 根据扩展名选择TOML、YAML或JSON格式"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.toml':
+        try:
+            import tomllib as toml
+        except ImportError:
+            try:
+                import tomli as toml
+            except ImportError:
+                print("错误: 读取TOML文件需要Python 3.11+或tomli库", flush=True)
+                sys.exit(1)
+        with open(path, 'rb') as f:
+            return toml.load(f)
+    if ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            print("错误: 读取YAML文件需要PyYAML库", flush=True)
+            sys.exit(1)
+        with open(path, 'r') as f:
+            return yaml.safe_load(f)
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def parseValue(text: str):
+    """将命令行中的参数值转换为数字, 无法转换时保留字符串"""
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            continue
+    return text
+
+
+def parseSet(items: List[str]) -> Dict[str, List]:
+    """解析命令行中的 --set key=v1,v2,... 参数"""
+    params: Dict[str, List] = OrderedDict()
+    for item in items:
+        if '=' not in item:
+            print(f"错误: 参数格式应为 key=v1,v2,...: {item}", flush=True)
+            sys.exit(1)
+        key, values = item.split('=', 1)
+        params[key.strip()] = [parseValue(v.strip()) for v in values.split(',') if v.strip()]
+    return params
+
+
+def expandGrid(params: Dict[str, List]) -> List[Dict]:
+    """展开参数网格为所有参数组合"""
+    keys = list(params)
+    values = [v if isinstance(v, list) else [v] for v in params.values()]
+    return [OrderedDict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def caseName(prefix: str, combo: Dict, varying: List[str]) -> str:
+    """由参数组合生成case名称, 只包含取值多于一个的参数"""
+    parts = [prefix]
+    for key in varying:
+        short = key.split('/')[-1]
+        parts.append(f"{short}{combo[key]}")
+    return re.sub(r'[^A-Za-z0-9._+-]', '', '_'.join(parts))
+
+
+def resolveTemplate(template: str, simulationsDir: str, athenaPath: str) -> Optional[str]:
+    """确定input模板文件: 内置input、已有case或文件路径"""
+    if not template or template == 'default':
+        return os.path.join(athenaPath, 'inputs', 'mhd', 'athinput.hgb')
+    casePath = os.path.join(simulationsDir, template, 'athinput.hgb')
+    if os.path.isfile(casePath):
+        return casePath
+    if os.path.isfile(template):
+        return template
+    return None
+
+
+def inputUpdates(combo: Dict) -> Dict[str, Dict[str, str]]:
+    """将参数组合转换为athinput修改项"""
+    updates: Dict[str, Dict[str, str]] = OrderedDict()
+    for key, value in combo.items():
+        if key in BUILD_KEYS:
+            continue
+        if key == 'mesh/nx':
+            nx = str(value).split('x')
+            for i, n in enumerate(nx, start=1):
+                updates.setdefault('mesh', OrderedDict())[f'nx{i}'] = n
+            continue
+        block, param = key.split('/', 1)
+        updates.setdefault(block, OrderedDict())[param] = value
+    return updates
+
+
+def buildOptions(config: Dict) -> Dict:
+    """由case配置生成编译选项, 与shearingBox.sh保持一致"""
+    eos = config['EoS'].lower()
+    # 等温状态方程只能使用HLLD求解器
+    flux = 'hlld' if eos == 'isothermal' else config['rSolver'].lower()
+    return {'prob': 'hgb', 'flux': flux, 'eos': eos, 'mpi': True, 'hdf5': True,
+            'float': config['FP'] == 'FP32'}
+
+
+def prepareCase(caseDir: str, template: str, combo: Dict, config: Dict,
+                coresPerNode: int, maxNodes: Optional[int]) -> Optional[Tuple[int, int]]:
+    """生成单个case目录与athinput.hgb
+
+    返回:
+        Optional[Tuple[int, int]]: (节点数, 核数), 如果case已有输出或没有可行的meshblock分解则返回None
+    """
+    if os.path.isdir(os.path.join(caseDir, 'outputs')):
+        print(f"错误: case {os.path.basename(caseDir)} 已存在输出文件, 请更换参数扫描名称", flush=True)
+        return None
+
+    os.makedirs(caseDir, exist_ok=True)
+    inputFile = os.path.join(caseDir, 'athinput.hgb')
+    shutil.copy(template, inputFile)
+    athinput.setParams(inputFile, inputUpdates(combo))
+
+    params = athinput.readInput(inputFile)
+    mesh = athinput.getMesh(params)
+    meshblock = athinput.getMeshBlock(params)
+
+    # 改变分辨率后原有meshblock可能无法整除mesh, 此时重新规划分解
+    if any(nx % mb for nx, mb in zip(mesh, meshblock)):
+        plans = decomp.plan(mesh, coresPerNode, maxNodes=maxNodes, FP=config['FP'])
+        if not plans:
+            print(f"错误: {os.path.basename(caseDir)} 没有可行的meshblock分解", flush=True)
+            return None
+        meshblock = plans[0]['meshblock']
+        athinput.setParams(inputFile, {'meshblock': {f'nx{i}': nx for i, nx in enumerate(meshblock, start=1)}})
+
+    cores = 1
+    for nx, mb in zip(mesh, meshblock):
+        cores *= nx // mb
+    nodes = (cores + coresPerNode - 1) // coresPerNode
+
+    with open(os.path.join(caseDir, perf.CONFIG_FILE), 'w') as f:
+        options = buildOptions(config)
+        f.write(f"FP={config['FP']}\nEOS={options['eos']}\nRSOLVER={options['flux']}\n")
+
+    return nodes, cores
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='剪切盒参数扫描工具')
+    parser.add_argument('--grid', type=str, help='参数网格文件(TOML/YAML/JSON)')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=V1,V2',
+                        help='扫描参数, 例如 --set problem/nu_iso=1e-4,2e-4, 可重复使用')
+    parser.add_argument('--name', type=str, help='参数扫描名称, 同时作为case名称前缀')
+    parser.add_argument('--template', type=str, help='input模板: default、已有case名称或文件路径')
+    parser.add_argument('--fp', type=str, choices=['FP64', 'FP32'], help='量化精度')
+    parser.add_argument('--eos', type=str, choices=['isothermal', 'adiabatic'], help='状态方程')
+    parser.add_argument('--rsolver', type=str, choices=['HLLD', 'LHLLD'], help='Riemann求解器')
+    parser.add_argument('--walltime', type=int, help='运行时间限制(小时)')
+    parser.add_argument('--max-nodes', type=int, help='重新规划meshblock时最多可用的节点数, 默认与模板相同')
+    parser.add_argument('--pack', action='store_true', help='不足一个节点的case合并到同一节点运行')
+    parser.add_argument('--dry-run', action='store_true', help='只生成case目录与作业脚本, 不编译也不提交')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    grid = loadGrid(args.grid) if args.grid else {}
+    params: Dict[str, List] = OrderedDict(grid.get('params', {}))
+    params.update(parseSet(args.set))
+    if not params:
+        print("错误: 未指定任何扫描参数(--grid或--set)", flush=True)
+        sys.exit(1)
+
+    name = args.name or grid.get('name')
+    if not name:
+        print("错误: 未指定参数扫描名称(--name)", flush=True)
+        sys.exit(1)
+
+    defaults = {
+        'FP':      args.fp or grid.get('FP', 'FP64'),
+        'EoS':     args.eos or grid.get('EoS', 'isothermal'),
+        'rSolver': args.rsolver or grid.get('rSolver', 'HLLD'),
+    }
+    walltime = args.walltime or int(grid.get('walltime', 24))
+    coresPerNode = int(os.environ.get('CORES_PER_NODE', 64))
+    username = os.environ.get('USERNAME', name)
+
+    athenaPath = os.environ.get('ATHENA_PATH', '')
+    simulationsDir = perf.getSimulationsDir()
+    template = resolveTemplate(args.template or grid.get('template', ''), simulationsDir, athenaPath)
+    if template is None or not os.path.isfile(template):
+        print(f"错误: 未找到input模板: {args.template or grid.get('template')}", flush=True)
+        sys.exit(1)
+
+    # 重新规划meshblock时默认不超过模板所占用的节点数
+    maxNodes = args.max_nodes
+    if maxNodes is None:
+        templateParams = athinput.readInput(template)
+        templateCores = 1
+        for nx, mb in zip(athinput.getMesh(templateParams), athinput.getMeshBlock(templateParams)):
+            templateCores *= max(nx // mb, 1)
+        maxNodes = (templateCores + coresPerNode - 1) // coresPerNode
+
+    combos = expandGrid(params)
+    varying = [key for key, values in params.items() if isinstance(values, list) and len(values) > 1]
+    print(f"\n参数扫描 {name}: 共 {len(combos)} 个case\n", flush=True)
+
+    # 生成case目录
+    cases = []
+    for combo in combos:
+        case = caseName(name, combo, varying)
+        config = OrderedDict((key, combo.get(key, defaults[key])) for key in BUILD_KEYS)
+        resources = prepareCase(os.path.join(simulationsDir, case), template, combo, config,
+                                coresPerNode, maxNodes)
+        if resources is None:
+            sys.exit(1)
+        nodes, cores = resources
+        cases.append({'case': case, 'params': combo, 'config': config, 'nodes': nodes, 'cores': cores})
+        print(f"  {case}: {nodes} 个节点, {cores} 个核心", flush=True)
+
+    # 编译: configure选项相同的case共用同一个缓存的可执行文件
+    if not args.dry_run:
+        if not athenaPath:
+            print("错误: 未找到环境变量ATHENA_PATH", flush=True)
+            sys.exit(1)
+        for entry in cases:
+            binary = build.getBinary(buildOptions(entry['config']), athenaPath)
+            if binary is None:
+                sys.exit(1)
+            build.install(binary, os.path.join(simulationsDir, entry['case']))
+
+    # 资源需求相同的case合并为一个作业数组
+    sweepDir = os.path.join(simulationsDir, SWEEP_DIR, name)
+    os.makedirs(sweepDir, exist_ok=True)
+    groups: Dict[Tuple[int, int], List[Dict]] = OrderedDict()
+    packed = []
+    for entry in cases:
+        if args.pack and entry['cores'] < coresPerNode:
+            packed.append(entry)
+            continue
+        groups.setdefault((entry['nodes'], entry['cores']), []).append(entry)
+
+    wallTimeLimitInMin = walltime * 60 + 1
+    jobs = []
+    for k, ((nodes, cores), entries) in enumerate(groups.items()):
+        listFile = os.path.join(sweepDir, f'cases{k}.txt')
+        with open(listFile, 'w') as f:
+            f.write('\n'.join(os.path.join(simulationsDir, e['case']) for e in entries) + '\n')
+
+        script = os.path.join(sweepDir, f'array{k}.sh')
+        slurm.writeJobScript(script, [
+            ('-J', username),
+            ('-N', nodes),
+            ('-n', cores),
+            ('-t', wallTimeLimitInMin),
+            ('-a', f'0-{len(entries) - 1}'),
+            ('-o', os.path.join(sweepDir, 'slurm-%A_%a.out')),
+        ], [
+            f'caseDir=$(sed -n "$((SLURM_ARRAY_TASK_ID + 1))p" {listFile})',
+            'cd "$caseDir"',
+            '# 日志写到case目录, 便于mon与prf命令使用',
+            'exec > "slurm-${SLURM_ARRAY_JOB_ID}_${SLURM_ARRAY_TASK_ID}.out" 2>&1',
+            f'srun athena -i athinput.hgb -d outputs -t {walltime}:00:00',
+        ])
+
+        jobIDs = []
+        if not args.dry_run:
+            jobID = slurm.submit(script, cwd=sweepDir)
+            if jobID is None:
+                sys.exit(1)
+            print(f"已提交作业数组 {jobID}: {len(entries)} 个case, 每个 {nodes} 个节点 {cores} 个核心", flush=True)
+            jobIDs.append(jobID)
+        jobs.append({'jobIDs': jobIDs, 'script': script, 'cases': [e['case'] for e in entries]})
+
+    if packed:
+        if args.dry_run:
+            # 未编译的case不写入pack.pending标记, 只在内存中参与装箱预览
+            extra = [{'caseDir': os.path.join(simulationsDir, e['case']), 'cores': e['cores'], 'walltime': walltime}
+                     for e in packed]
+            jobIDs = pack.submitPending(simulationsDir, coresPerNode, username, True, extra)
+        else:
+            for entry in packed:
+                caseDir = os.path.join(simulationsDir, entry['case'])
+                # 与 pak add 相同, 只合并已有athena可执行文件的case
+                if not os.path.isfile(os.path.join(caseDir, 'athena')):
+                    print(f"错误: case {entry['case']} 中没有athena可执行文件", flush=True)
+                    sys.exit(1)
+                pack.addPending(caseDir, walltime, coresPerNode)
+            jobIDs = pack.submitPending(simulationsDir, coresPerNode, username)
+        jobs.append({'jobIDs': jobIDs, 'script': None, 'cases': [e['case'] for e in packed]})
+
+    with open(os.path.join(sweepDir, 'sweep.json'), 'w') as f:
+        json.dump({'name': name, 'created': time.time(), 'params': params,
+                   'cases': cases, 'jobs': jobs}, f, indent=2, ensure_ascii=False)
+
+    if args.dry_run:
+        print(f"\n已生成case目录与作业脚本(未提交): {sweepDir}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
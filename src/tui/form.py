@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+curses表单框架, 供run、rst、spc、cor、slc、sfn等TUI共用
+
+主要功能:
+1. 字段: TextField(文本输入)、Cycler(左右方向键循环选择)、Stepper(左右方向键增减整数)、Button(确认按钮),
+   字段可以按其他字段的值禁用, 也可以在值的右侧显示提示(例如可用的时间范围)
+2. 增量重绘: 每一行的内容与属性记为一个元组, 与上一次绘制的不同时才重新写入该行,
+   再用noutrefresh/doupdate一次性刷新到终端; 不再每次按键都stdscr.clear()整屏重绘,
+   避免闪烁, 也减少高延迟SSH连接上的输出量
+3. 终端尺寸变化(KEY_RESIZE)时重新布局并整屏重绘, 超出屏幕的内容按显示宽度截断
+4. 按确认按钮时依次校验各字段, 出错时在底部显示错误信息并把光标移到出错的字段
+
+用法:
+    form = Form("标题", [TextField('t1', "开始时间："), ..., Button()])
+    if curses.wrapper(form.run):
+        values = form.values()
+"""
+
+import curses
+import os
+import unicodedata
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# ESC键默认要等待1秒才能与方向键等转义序列区分, 在curses初始化之前缩短等待时间
+os.environ.setdefault('ESCDELAY', '25')
+
+# 颜色编号, 与原来各TUI中的init_pair一致
+COLOR_NORMAL = 1    # 普通选项
+COLOR_SELECTED = 2  # 选中项
+COLOR_HINT = 3      # 提示信息
+COLOR_INPUT = 4     # 输入文本
+COLOR_TITLE = 5     # 标题框
+
+# 底部的按键说明: (文字, 是否粗体)
+KEY_HINTS = [
+    ("上下方向键：", True), ("选择不同参数", False), ("  ", False),
+    ("左右方向键：", True), ("修改参数的值", False), ("  ", False),
+    ("回车键：", True), ("确认当前参数", False), ("  ", False),
+    ("ESC键或Ctrl+C：", True), ("退出", False)
+]
+
+# 值的最小显示宽度, 提示信息显示在值的右侧, 值较短时提示的位置不随输入移动
+VALUE_WIDTH = 12
+
+# 附加内容在后台更新时的重绘间隔(毫秒)
+REFRESH_MS = 200
+
+# 一行中的一段文字: (起始列, 文字, curses属性)
+Segment = Tuple[int, str, int]
+
+
+def displayWidth(text: str) -> int:
+    """字符串在终端中的显示宽度, 全角字符(中文、全角标点)宽度为2"""
+    return sum(2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1 for char in text)
+
+
+def clip(text: str, width: int) -> str:
+    """按显示宽度截断字符串"""
+    if width <= 0:
+        return ""
+    used = 0
+    for i, char in enumerate(text):
+        used += displayWidth(char)
+        if used > width:
+            return text[:i]
+    return text
+
+
+def _resolve(value, *args):
+    """字段参数可以是常量, 也可以是在绘制时求值的函数"""
+    return value(*args) if callable(value) else value
+
+
+class Field:
+    """表单字段的基类
+
+    参数:
+        name (str): 字段名, Form.values()中的键
+        label (str): 显示的标签
+        enabled (Union[bool, Callable[[], bool]]): 是否可以修改, 不可修改时以暗色显示
+        hint (Union[None, str, Callable[[], Optional[str]]]): 显示在值右侧的提示
+        disabledText (Optional[str]): 不可修改时代替值显示的文字
+        validate (Optional[Callable]): 校验函数, 参数为字段的值, 返回错误信息, 没有错误时返回None
+    """
+
+    # 选中时是否进入文本编辑状态(显示光标)
+    editable = False
+
+    def __init__(self, name: str, label: str, enabled: Union[bool, Callable[[], bool]] = True,
+                 hint=None, disabledText: Optional[str] = None, validate: Optional[Callable] = None):
+        self.name = name
+        self.label = label
+        self._enabled = enabled
+        self._hint = hint
+        self.disabledText = disabledText
+        self.validate = validate
+
+    @property
+    def enabled(self) -> bool:
+        return bool(_resolve(self._enabled))
+
+    def hint(self) -> Optional[str]:
+        """值右侧的提示, 没有时返回None"""
+        return _resolve(self._hint)
+
+    def text(self) -> str:
+        """值的显示文字"""
+        if not self.enabled and self.disabledText is not None:
+            return self.disabledText
+        return "" if self.value is None else str(self.value)
+
+    def step(self, direction: int) -> None:
+        """左右方向键, direction为-1或+1"""
+
+    def edit(self, key: int) -> bool:
+        """文本输入, 返回是否处理了该按键"""
+        return False
+
+    def error(self) -> Optional[str]:
+        """校验字段的值, 返回错误信息"""
+        if self.validate is None or not self.enabled:
+            return None
+        return self.validate(self.value)
+
+
+class TextField(Field):
+    """文本输入字段, 选中时直接进入编辑状态, 只接受可打印ASCII字符"""
+
+    editable = True
+
+    def __init__(self, name: str, label: str, value: str = "", **kwargs):
+        super().__init__(name, label, **kwargs)
+        self.value = value
+
+    def edit(self, key: int) -> bool:
+        if key in (curses.KEY_BACKSPACE, 127, 8):
+            self.value = self.value[:-1]
+            return True
+        if 32 <= key <= 126:
+            self.value += chr(key)
+            return True
+        return False
+
+
+class Cycler(Field):
+    """左右方向键在若干选项之间循环选择
+
+    参数:
+        options (Sequence): 选项
+        index (int): 初始选项的序号
+        format (Optional[Callable]): 选项的显示文字, 默认为str
+        wrap (bool): 是否循环, 为False时在两端停止
+    """
+
+    def __init__(self, name: str, label: str, options: Sequence, index: int = 0,
+                 format: Optional[Callable] = None, wrap: bool = True, **kwargs):
+        super().__init__(name, label, **kwargs)
+        self.options = list(options)
+        self.index = index
+        self.format = format
+        self.wrap = wrap
+
+    @property
+    def value(self):
+        return self.options[self.index] if self.options else None
+
+    def text(self) -> str:
+        if not self.enabled and self.disabledText is not None:
+            return self.disabledText
+        if not self.options:
+            return ""
+        return self.format(self.value) if self.format else str(self.value)
+
+    def step(self, direction: int) -> None:
+        if not self.options:
+            return
+        if self.wrap:
+            self.index = (self.index + direction) % len(self.options)
+        else:
+            self.index = max(0, min(self.index + direction, len(self.options) - 1))
+
+
+class Stepper(Field):
+    """左右方向键增减的整数
+
+    参数:
+        value (int): 初始值
+        minimum (int): 最小值
+        format (Optional[Callable]): 显示文字, 默认为str
+    """
+
+    def __init__(self, name: str, label: str, value: int, minimum: int = 0,
+                 format: Optional[Callable] = None, **kwargs):
+        super().__init__(name, label, **kwargs)
+        self.value = value
+        self.minimum = minimum
+        self.format = format
+
+    def text(self) -> str:
+        if not self.enabled and self.disabledText is not None:
+            return self.disabledText
+        return self.format(self.value) if self.format else str(self.value)
+
+    def step(self, direction: int) -> None:
+        self.value = max(self.minimum, self.value + direction)
+
+
+class Button(Field):
+    """确认按钮, 与上面的字段之间空一行"""
+
+    def __init__(self, label: str = "确认"):
+        super().__init__('', label)
+        self.value = None
+
+
+class Form:
+    """表单: 标题框、字段、可选的附加内容与底部的按键说明
+
+    参数:
+        title (str): 标题
+        fields (List[Field]): 字段, 最后一个通常为Button
+        footer (Optional[Callable[[int, int], List[List[Segment]]]]): 附加内容, 参数为 (屏幕宽度, 可用行数),
+            返回每行的文字段, 显示在确认按钮下方, 超出可用行数的部分不显示; 附加内容有pending()且返回True时
+            (例如正在后台建立索引), 没有按键也每隔REFRESH_MS毫秒重绘一次
+        validate (Optional[Callable[[Form], Optional[str]]]): 表单级校验, 在各字段校验之后调用
+    """
+
+    def __init__(self, title: str, fields: List[Field], footer: Optional[Callable] = None,
+                 validate: Optional[Callable] = None):
+        self.title = title
+        self.fields = fields
+        self.footer = footer
+        self.validateForm = validate
+        self.current = 0
+        self.message = ""
+        # 上一次绘制的每行内容, 行号 -> 文字段元组
+        self._rows: Dict[int, Tuple[Segment, ...]] = {}
+
+    def __getitem__(self, name: str) -> Field:
+        for field in self.fields:
+            if field.name == name:
+                return field
+        raise KeyError(name)
+
+    def values(self) -> Dict:
+        """各字段的值, 字段名 -> 值"""
+        return {field.name: field.value for field in self.fields if field.name}
+
+    def fieldLines(self) -> List[int]:
+        """每个字段所在的行号, 标题框占据前3行, 确认按钮前空一行"""
+        lines = []
+        line = 4
+        for field in self.fields:
+            if isinstance(field, Button):
+                line += 1
+            lines.append(line)
+            line += 1
+        return lines
+
+    def layout(self, height: int, width: int) -> Tuple[Dict[int, Tuple[Segment, ...]], Optional[Tuple[int, int]]]:
+        """计算每一行要显示的内容与光标位置
+
+        返回:
+            Tuple[Dict[int, Tuple[Segment, ...]], Optional[Tuple[int, int]]]: 行号 -> 文字段, 光标位置(不显示时为None)
+        """
+        rows: Dict[int, Tuple[Segment, ...]] = {}
+        cursor = None
+
+        # 标题框
+        titleWidth = displayWidth(self.title)
+        boxWidth = titleWidth + 12
+        boxX = max((width - boxWidth) // 2, 0)
+        frame = curses.color_pair(COLOR_TITLE) | curses.A_BOLD
+        rows[0] = ((boxX, "╔" + "═" * (boxWidth - 2) + "╗", frame),)
+        rows[1] = ((boxX, "║" + " " * (boxWidth - 2) + "║", frame),
+                   (boxX + (boxWidth - titleWidth) // 2, self.title, frame))
+        rows[2] = ((boxX, "╚" + "═" * (boxWidth - 2) + "╝", frame),)
+
+        # 字段
+        lines = self.fieldLines()
+        for i, (field, line) in enumerate(zip(self.fields, lines)):
+            selected = i == self.current
+            color = curses.color_pair(COLOR_SELECTED if selected else COLOR_NORMAL)
+            dim = 0 if selected or field.enabled else curses.A_DIM
+            head = ("> " if selected else "  ") + field.label
+            segments = [(2, head, color | curses.A_BOLD | dim)]
+            valueX = 2 + displayWidth(head)
+            value = field.text()
+            editing = selected and field.editable and field.enabled
+            if value:
+                segments.append((valueX, value, curses.color_pair(COLOR_INPUT) if editing else color | dim))
+            if editing:
+                cursor = (line, valueX + displayWidth(value))
+            hint = field.hint()
+            if hint:
+                hintX = valueX + max(displayWidth(value), VALUE_WIDTH) + 2
+                segments.append((hintX, hint, curses.color_pair(COLOR_HINT)))
+            rows[line] = tuple(segments)
+
+        # 附加内容在确认按钮下方空一行, 最多到错误信息所在行的上一行
+        footerY = lines[-1] + 2 if lines else 4
+        available = height - 4 - footerY
+        if self.footer is not None and available > 0:
+            for k, segments in enumerate(self.footer(width, available)[:available]):
+                rows[footerY + k] = tuple(segments)
+
+        # 错误信息与按键说明
+        if self.message:
+            rows[height - 4] = ((2, self.message, curses.color_pair(COLOR_HINT) | curses.A_BOLD),)
+        segments = []
+        x = 2
+        for text, bold in KEY_HINTS:
+            segments.append((x, text, curses.color_pair(COLOR_HINT) | (curses.A_BOLD if bold else 0)))
+            x += displayWidth(text)
+        rows[height - 2] = tuple(segments)
+        return rows, cursor
+
+    def draw(self, stdscr) -> None:
+        """只重绘内容发生变化的行, 然后一次性刷新到终端"""
+        height, width = stdscr.getmaxyx()
+        rows, cursor = self.layout(height, width)
+
+        for y in sorted(set(self._rows) | set(rows)):
+            if y < 0 or y >= height or self._rows.get(y) == rows.get(y):
+                continue
+            try:
+                stdscr.move(y, 0)
+                stdscr.clrtoeol()
+            except curses.error:
+                continue
+            for x, text, attr in rows.get(y, ()):
+                # 最后一行的最后一列写入后光标越界会报错, 少写一列
+                text = clip(text, width - x - (1 if y == height - 1 else 0))
+                if not text:
+                    continue
+                try:
+                    stdscr.addstr(y, x, text, attr)
+                except curses.error:
+                    pass
+        self._rows = {y: segments for y, segments in rows.items() if 0 <= y < height}
+
+        if cursor is not None and cursor[0] < height and cursor[1] < width:
+            curses.curs_set(1)
+            stdscr.move(*cursor)
+        else:
+            curses.curs_set(0)
+        stdscr.noutrefresh()
+        curses.doupdate()
+
+    def resize(self, stdscr) -> None:
+        """终端尺寸变化后整屏重绘"""
+        curses.update_lines_cols()
+        stdscr.clear()
+        self._rows = {}
+
+    def submit(self) -> bool:
+        """校验各字段与整个表单, 出错时显示错误信息并选中出错的字段"""
+        for i, field in enumerate(self.fields):
+            message = field.error()
+            if message:
+                self.message = f"错误：{message}"
+                self.current = i
+                return False
+        if self.validateForm is not None:
+            message = self.validateForm(self)
+            if message:
+                self.message = f"错误：{message}"
+                return False
+        return True
+
+    def handleKey(self, key: int) -> Optional[bool]:
+        """处理一次按键
+
+        返回:
+            Optional[bool]: True为确认, False为退出, None为继续
+        """
+        field = self.fields[self.current]
+        self.message = ""
+        if key == 27:  # ESC键
+            return False
+        if key == curses.KEY_UP:
+            self.current = (self.current - 1) % len(self.fields)
+        elif key == curses.KEY_DOWN:
+            self.current = (self.current + 1) % len(self.fields)
+        elif key in (10, 13, curses.KEY_ENTER):
+            if isinstance(field, Button):
+                if self.submit():
+                    return True
+            elif field.editable:
+                # 文本输入完成后移到下一个字段
+                self.current = (self.current + 1) % len(self.fields)
+        elif key in (curses.KEY_LEFT, curses.KEY_RIGHT):
+            if field.enabled:
+                field.step(-1 if key == curses.KEY_LEFT else 1)
+        elif field.editable and field.enabled:
+            field.edit(key)
+        return None
+
+    def run(self, stdscr) -> bool:
+        """显示表单直到确认或退出, 供curses.wrapper调用
+
+        返回:
+            bool: 按确认按钮并通过校验时为True, 按ESC键退出时为False
+        """
+        curses.start_color()
+        curses.init_pair(COLOR_NORMAL, curses.COLOR_WHITE, curses.COLOR_BLACK)
+        curses.init_pair(COLOR_SELECTED, curses.COLOR_GREEN, curses.COLOR_BLACK)
+        curses.init_pair(COLOR_HINT, curses.COLOR_YELLOW, curses.COLOR_BLACK)
+        curses.init_pair(COLOR_INPUT, curses.COLOR_WHITE, curses.COLOR_BLACK)
+        curses.init_pair(COLOR_TITLE, curses.COLOR_GREEN, curses.COLOR_BLACK)
+        stdscr.keypad(True)
+        stdscr.clear()
+        self._rows = {}
+
+        while True:
+            self.draw(stdscr)
+            pending = getattr(self.footer, 'pending', None)
+            stdscr.timeout(REFRESH_MS if pending is not None and pending() else -1)
+            key = stdscr.getch()
+            if key == -1:
+                continue  # 等待超时, 重绘附加内容
+            if key == curses.KEY_RESIZE:
+                self.resize(stdscr)
+                continue
+            result = self.handleKey(key)
+            if result is not None:
+                return result
+
+
+def floatOrEmpty(name: str) -> Callable[[str], Optional[str]]:
+    """校验函数: 值为空或可以解析为浮点数"""
+    def validate(value: str) -> Optional[str]:
+        if not value:
+            return None
+        try:
+            float(value)
+        except ValueError:
+            return f"{name}必须是数字：{value}"
+        return None
+    return validate
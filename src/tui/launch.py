@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TUI启动后处理脚本的统一入口
+
+主要功能:
+1. 本地运行时在TUI所在的Python进程中导入src/post下的脚本并调用其main(argv),
+   不再启动第二个解释器, 也不必重新导入numpy等库
+2. 环境变量SLURM_FLAG为ON时仍通过srun在计算节点上启动脚本
+3. 两种方式都返回退出码, 成功时与原来的 "&& clear" 一样清屏
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+from typing import List
+
+# 后处理脚本所在目录
+POST_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "post")
+
+
+def runInProcess(script: str, argv: List[str]) -> int:
+    """在当前进程中调用后处理脚本的main(argv), 返回退出码"""
+    if POST_DIR not in sys.path:
+        sys.path.insert(0, POST_DIR)
+
+    # argparse的程序名与出错信息使用sys.argv[0], 调用期间替换为脚本路径
+    saved_argv = sys.argv
+    sys.argv = [os.path.join(POST_DIR, f"{script}.py")] + list(argv)
+    try:
+        module = importlib.import_module(script)
+        module.main(argv)
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, flush=True)
+        return 1
+    finally:
+        sys.argv = saved_argv
+
+
+def runSrun(script: str, argv: List[str]) -> int:
+    """通过srun在计算节点上运行后处理脚本, 返回退出码"""
+    username = os.environ.get('USERNAME', '')
+    cmd = ['srun', '-J', username, 'python', os.path.join(POST_DIR, f"{script}.py")] + list(argv)
+    try:
+        return subprocess.run(cmd).returncode
+    except OSError as e:
+        print(f"错误：无法启动srun: {e}", flush=True)
+        return 1
+
+
+def runPost(script: str, argv: List[str]) -> int:
+    """运行src/post下的后处理脚本
+
+    参数:
+        script (str): 脚本名, 不含.py, 例如"spectra"
+        argv (List[str]): 命令行参数, 例如["--outn=out2", "--t1=50"]
+
+    返回:
+        int: 退出码, 0为成功
+    """
+    script_path = os.path.join(POST_DIR, f"{script}.py")
+    if not os.path.exists(script_path):
+        print(f"错误：未找到脚本文件 {script_path}")
+        return 1
+
+    # 是否在SLURM环境下运行
+    if os.environ.get('SLURM_FLAG', 'OFF') == 'ON':
+        code = runSrun(script, argv)
+    else:
+        code = runInProcess(script, argv)
+
+    if code == 0:
+        os.system('clear')
+    return code
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后处理TUI(spc、cor、slc、sfn)共用的表单字段: 输出文件格式、开始时间、结束时间与时间切片抽样
+
+输出格式来自catalog缓存的输出文件目录, 字段右侧显示该格式的文件个数与可用的时间范围;
+表单下方显示时间范围内的时间切片数、需要读取的字节数与估计的峰值内存, 随输入的开始、结束时间更新
+"""
+
+import curses
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+import form
+import launch
+
+# 添加src/post路径, 使用其中的输出文件目录
+sys.path.insert(0, launch.POST_DIR)
+
+import catalog
+import estimate
+
+
+def getOutputFormats():
+    """获取outputs目录中所有输出文件格式, 以及每个格式的文件个数与时间范围(来自缓存的输出文件目录)"""
+    try:
+        formats = catalog.listFormats('outputs')
+    except Exception:
+        formats = {}
+    if not formats:
+        return ["out2"], {}  # 如果没有找到或出错，默认为out2
+    return list(formats), formats
+
+
+def formatTime(value: Optional[float]) -> str:
+    """格式化时间, 无法读取时显示为?"""
+    return "?" if value is None else f"{value:g}"
+
+
+def strideOrAuto(value: str) -> Optional[str]:
+    """校验函数: 步长为正整数或auto"""
+    if value == 'auto' or (value.isdigit() and int(value) >= 1):
+        return None
+    return f"时间切片步长必须是正整数或auto：{value}"
+
+
+def positiveOrEmpty(value: str) -> Optional[str]:
+    """校验函数: 最多时间切片数为空或正整数"""
+    if not value or (value.isdigit() and int(value) >= 1):
+        return None
+    return f"最多时间切片数必须是正整数：{value}"
+
+
+def outputFields() -> List[form.Field]:
+    """输出文件格式、开始时间、结束时间、时间切片步长与最多时间切片数五个字段"""
+    output_formats, format_catalog = getOutputFormats()
+
+    # 提示在绘制时求值, 随选择的输出格式变化
+    def formatHint():
+        r = format_catalog.get(outn.value)
+        return f"({r['count']} 个文件, {catalog.formatRange(r)})" if r else None
+
+    def firstHint():
+        r = format_catalog.get(outn.value)
+        return f"(最早: {formatTime(r['t_first'])})" if r else None
+
+    def lastHint():
+        r = format_catalog.get(outn.value)
+        return f"(最新: {formatTime(r['t_last'])})" if r else None
+
+    outn = form.Cycler('outn', "选择输出文件格式：", output_formats, hint=formatHint)
+    t1 = form.TextField('t1', "开始时间：", hint=firstHint, validate=form.floatOrEmpty("开始时间"))
+    t2 = form.TextField('t2', "结束时间：", hint=lastHint, validate=form.floatOrEmpty("结束时间"))
+    stride = form.TextField('stride', "时间切片步长：", "1", hint="(auto: 由hst估计自关联时间)",
+                            validate=strideOrAuto)
+    maxSnapshots = form.TextField('maxSnapshots', "最多时间切片数：", hint="(可选项, 均匀抽取)",
+                                  validate=positiveOrEmpty)
+    return [outn, t1, t2, stride, maxSnapshots]
+
+
+def validateWindow(f: form.Form) -> Optional[str]:
+    """表单级校验: 开始时间不能大于结束时间"""
+    t1, t2 = f['t1'].value, f['t2'].value
+    if t1 and t2 and float(t1) > float(t2):
+        return f"开始时间 {t1} 大于结束时间 {t2}"
+    return None
+
+
+def preview(fields: List[form.Field], job: Callable[[Dict], str]) -> Callable:
+    """时间范围预览(表单的附加内容), 由catalog的时间切片索引估计, 不读取物理量
+
+    第一次建立索引要读取每个文件的时间, 在后台线程中进行; 建立完成之前按首末时间插值粗略估计,
+    表单每隔一段时间重绘, 索引建立后显示准确的估计
+
+    参数:
+        fields (List[form.Field]): 表单的字段, 包括outputFields()
+        job (Callable[[Dict], str]): 由表单的值得到计算方式, 即estimate.QUANTITIES中的键
+    """
+    _, format_catalog = getOutputFormats()
+    # 每个输出格式只建立(或读取)一次索引, 之后每次重绘只做估计; 同一时间只有一个线程写目录缓存
+    records: Dict[str, Optional[Dict]] = {}
+    threads: Dict[str, threading.Thread] = {}
+    lock = threading.Lock()
+
+    def index(outn):
+        with lock:
+            try:
+                records[outn] = catalog.indexFormat('outputs', outn)
+            except Exception:
+                records[outn] = None
+
+    def pending():
+        return any(thread.is_alive() for thread in threads.values())
+
+    def footer(width, available):
+        values = {field.name: field.value for field in fields if field.name}
+        outn = values['outn']
+        if outn not in threads:
+            threads[outn] = threading.Thread(target=index, args=(outn,), daemon=True)
+            threads[outn].start()
+        indexing = outn not in records
+        if indexing:
+            # 索引建立之前用首末时间插值, 没有数据布局
+            record = format_catalog.get(outn)
+            if record is not None:
+                record = dict(record, times=estimate.interpolateTimes(record))
+        else:
+            record = records[outn]
+        if record is None:
+            return []
+
+        color = curses.color_pair(form.COLOR_HINT)
+        try:
+            t1 = float(values['t1']) if values['t1'] else None
+            t2 = float(values['t2']) if values['t2'] else None
+        except ValueError:
+            return [[(2, "时间范围预览：开始时间与结束时间必须是数字", color)]]
+        if strideOrAuto(values['stride']) or positiveOrEmpty(values['maxSnapshots']):
+            return [[(2, "时间范围预览：步长与最多时间切片数必须是正整数", color)]]
+        stride = values['stride'] if values['stride'] == 'auto' else int(values['stride'])
+        maxSnapshots = int(values['maxSnapshots']) if values['maxSnapshots'] else None
+
+        name = job(values)
+        result = estimate.estimateJob(record, name, t1, t2, values.get('mode', 'axis'),
+                                      int(values.get('budget', 2 ** 18)), stride, maxSnapshots)
+        if not result['count']:
+            if indexing:
+                return [[(2, "正在建立时间切片索引...", color)]]
+            return [[(2, "时间范围内没有时间切片", color | curses.A_BOLD)]]
+        text = (f"时间范围内：{'约 ' if indexing else ''}{result['count']} 个时间切片 "
+                f"(t = {formatTime(result['t_first'])} ~ {formatTime(result['t_last'])})")
+        if stride == 'auto':
+            text += ", 步长在计算开始后由hst估计"
+        lines = [[(2, text, color)]]
+        if indexing:
+            lines.append([(2, f"正在建立时间切片索引 ({record['count']} 个文件), 以上按首末时间插值估计...", color)])
+        layout = record.get('layout')
+        if layout is not None:
+            quantities = estimate.QUANTITIES[name]
+            grid = 'x'.join(str(n) for n in layout['grid'])
+            dtypes = '/'.join(sorted({layout['variables'][q][0] for q in quantities if q in layout['variables']}))
+            lines.append([(2, f"读取数据：{len(quantities)} 个物理量, {grid}, {dtypes}, "
+                              f"共 {estimate.formatBytes(result['read'])}", color)])
+            # pymri把所有时间切片保留在内存中, 估计值不含PyMRI计算时的工作内存
+            peak = estimate.formatBytes(result['peak'])
+            lines.append([(2, f"峰值内存：至少 {peak} (所有时间切片同时在内存中)" if name == 'pymri'
+                              else f"峰值内存：约 {peak}", color)])
+        return lines
+
+    # form.Form在pending()返回True时定时重绘, 索引建立后更新预览
+    footer.pending = pending
+    return footer
+
+
+def outputArgs(values: Dict) -> List[str]:
+    """由表单的值构建后处理脚本的 --outn、--t1、--t2 参数"""
+    argv = [f"--outn={values['outn']}"]
+
+    # 添加时间区间参数
+    if values['t1']:
+        argv.append(f"--t1={values['t1']}")
+    if values['t2']:
+        argv.append(f"--t2={values['t2']}")
+
+    # 添加时间切片抽样参数
+    if values['stride'] != "1":
+        argv.append(f"--stride={values['stride']}")
+    if values['maxSnapshots']:
+        argv.append(f"--max-snapshots={values['maxSnapshots']}")
+    return argv
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import curses
+
+import form
+import launch
+import postform
+
+def main():
+    # 输出文件格式、开始时间与结束时间, 以及结构函数计算的参数
+    fields = postform.outputFields() + [
+        # 采样方式: axis为沿坐标轴的位移, random为随机方向的格点对
+        form.Cycler('mode', "采样方式：", ["axis", "random"]),
+        # 每个间隔、每个时间切片的样本数
+        form.Cycler('budget', "样本预算：", ["65536", "262144", "1048576", "4194304"], index=1),
+        form.Button(),
+    ]
+    # 表单下方显示时间范围内的时间切片数、读取量与峰值内存
+    preview = postform.preview(fields, lambda values: 'structure')
+    config = form.Form("结构函数计算配置", fields, footer=preview, validate=postform.validateWindow)
+    if not curses.wrapper(config.run):
+        return  # ESC键退出
+
+    # 构建命令行参数
+    values = config.values()
+    argv = postform.outputArgs(values) + [f"--mode={values['mode']}", f"--budget={values['budget']}"]
+
+    # 在当前进程中运行structure.py, SLURM环境下通过srun运行
+    launch.runPost("structure", argv)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("程序被用户中断")
+    except Exception as e:
+        print(f"发生错误：{e}")